@@ -18,6 +18,13 @@ interface HeatMapSnapshot {
   } | null;
 }
 
+interface HeatMapBinsResponse {
+  zoom: number;
+  cellSize: number;
+  bins: Array<{ lat: number; lng: number; count: number; intensity: number }>;
+  maxIntensity: number;
+}
+
 interface ServiceHeatMapProps {
   onBookService?: () => void;
 }
@@ -27,6 +34,9 @@ export function ServiceHeatMap({ onBookService }: ServiceHeatMapProps) {
   const mapInstanceRef = useRef<any>(null);
   const snapshotOverlayRef = useRef<google.maps.GroundOverlay | null>(null);
   const googleMapsRef = useRef<typeof google | null>(null);
+  const heatLayerRef = useRef<google.maps.visualization.HeatmapLayer | null>(null);
+  const binsAbortRef = useRef<AbortController | null>(null);
+  const [hasBins, setHasBins] = useState(false);
   const [totalCustomers, setTotalCustomers] = useState(0);
   const [isLocating, setIsLocating] = useState(false);
   const [isMapVisible, setIsMapVisible] = useState(false);
@@ -149,6 +159,50 @@ export function ServiceHeatMap({ onBookService }: ServiceHeatMapProps) {
 
         mapInstanceRef.current = map;
 
+        // Job density layer: the server returns pre-binned cells for the current
+        // zoom and viewport, so the payload doesn't grow with job history
+        const heatLayer = new google.maps.visualization.HeatmapLayer({
+          map,
+          radius: 28,
+          opacity: 0.6,
+        });
+        heatLayerRef.current = heatLayer;
+
+        const loadBins = async () => {
+          const bounds = map.getBounds();
+          const zoom = map.getZoom();
+          if (!bounds || zoom === undefined) return;
+
+          binsAbortRef.current?.abort();
+          const controller = new AbortController();
+          binsAbortRef.current = controller;
+
+          const sw = bounds.getSouthWest();
+          const ne = bounds.getNorthEast();
+          // Rounded so small pans reuse the browser-cached response
+          const bbox = [sw.lng(), sw.lat(), ne.lng(), ne.lat()].map((value) => value.toFixed(2)).join(',');
+
+          try {
+            const response = await fetch(`/api/v1/social-proof/service-heat-map?zoom=${zoom}&bbox=${bbox}`, {
+              signal: controller.signal,
+            });
+            if (!response.ok) return;
+
+            const data: HeatMapBinsResponse = await response.json();
+            const maxIntensity = data.maxIntensity || 1;
+            heatLayer.setData(data.bins.map((bin) => ({
+              location: new google.maps.LatLng(bin.lat, bin.lng),
+              weight: bin.intensity / maxIntensity,
+            })));
+            setHasBins(data.bins.length > 0);
+          } catch (error) {
+            if ((error as Error).name !== 'AbortError') {
+              console.error("Error loading heat map bins:", error);
+            }
+          }
+        };
+        map.addListener('idle', loadBins);
+
         // Create polygon following route: Boston to Cape Cod Canal along coast, then I-495 north through Middleboro, Taunton, Raynham, Norton, Foxboro to Waltham
         const serviceAreaBoundary = new google.maps.Polygon({
           paths: [
@@ -429,14 +483,17 @@ export function ServiceHeatMap({ onBookService }: ServiceHeatMapProps) {
     
     // Cleanup function to clear intervals on unmount
     return () => {
+      binsAbortRef.current?.abort();
+      heatLayerRef.current?.setMap(null);
       if (mapInstanceRef.current && (mapInstanceRef.current as any).pulseIntervals) {
         (mapInstanceRef.current as any).pulseIntervals.forEach((id: NodeJS.Timeout) => clearInterval(id));
       }
     };
   }, [isMapVisible]);
 
+  // The static snapshot image is only a fallback until live bins are available
   useEffect(() => {
-    if (!heatMapSnapshot?.imageUrl) {
+    if (!heatMapSnapshot?.imageUrl || hasBins) {
       if (snapshotOverlayRef.current) {
         snapshotOverlayRef.current.setMap(null);
         snapshotOverlayRef.current = null;
@@ -472,7 +529,7 @@ export function ServiceHeatMap({ onBookService }: ServiceHeatMapProps) {
         snapshotOverlayRef.current.setMap(null);
       }
     };
-  }, [heatMapSnapshot?.imageUrl]);
+  }, [heatMapSnapshot?.imageUrl, hasBins]);
 
   if (isLoading) {
     return (
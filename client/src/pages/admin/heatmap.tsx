@@ -33,6 +33,46 @@ export default function AdminHeatMap() {
     refetchIntervalInBackground: false,
   });
 
+  // Historical import progress (polled while an import is running)
+  const { data: importProgress } = useQuery<{
+    status: 'idle' | 'running' | 'completed' | 'failed' | 'interrupted';
+    startDate: string | null;
+    page: number;
+    totalPages?: number;
+    imported: number;
+    skipped: number;
+    error?: string;
+  }>({
+    queryKey: ['/api/v1/admin/heatmap/import'],
+    refetchInterval: (query) => (query.state.data?.status === 'running' ? 3000 : false),
+  });
+
+  // Notify once when a running import finishes
+  const lastImportStatusRef = useRef<string | undefined>(undefined);
+  useEffect(() => {
+    const status = importProgress?.status;
+    if (lastImportStatusRef.current === 'running' && status === 'completed') {
+      toast({
+        title: 'Import Complete',
+        description: `Imported ${importProgress?.imported ?? 0} jobs, skipped ${importProgress?.skipped ?? 0}`,
+      });
+      queryClient.invalidateQueries({ queryKey: ['/api/v1/admin/heatmap/data'] });
+      queryClient.invalidateQueries({ queryKey: ['/api/v1/admin/heatmap/stats'] });
+    } else if (lastImportStatusRef.current === 'running' && status === 'failed') {
+      toast({
+        title: 'Import Failed',
+        description: `${importProgress?.error || 'Unknown error'}. Run the import again to resume.`,
+        variant: 'destructive',
+      });
+    }
+    lastImportStatusRef.current = status;
+  }, [importProgress, toast]);
+
+  const isImporting = importProgress?.status === 'running';
+  // A failed or interrupted import resumes from its checkpoint for the same start date
+  const canResume = (importProgress?.status === 'failed' || importProgress?.status === 'interrupted')
+    && (importProgress.page ?? 0) > 0;
+
   // Import historical data mutation
   const importMutation = useMutation({
     mutationFn: async (startDate: string) => {
@@ -42,11 +82,10 @@ export default function AdminHeatMap() {
     },
     onSuccess: () => {
       toast({
-        title: 'Import Complete',
-        description: 'Historical job data has been imported successfully',
+        title: 'Import Started',
+        description: 'Historical job data is importing in the background',
       });
-      queryClient.invalidateQueries({ queryKey: ['/api/v1/admin/heatmap/data'] });
-      queryClient.invalidateQueries({ queryKey: ['/api/v1/admin/heatmap/stats'] });
+      queryClient.invalidateQueries({ queryKey: ['/api/v1/admin/heatmap/import'] });
     },
     onError: (error: Error) => {
       toast({
@@ -196,12 +235,16 @@ export default function AdminHeatMap() {
         <div className="flex gap-2">
           <Button
             variant="outline"
-            onClick={() => importMutation.mutate('2022-01-01')}
-            disabled={importMutation.isPending}
+            onClick={() => importMutation.mutate(canResume && importProgress?.startDate ? importProgress.startDate : '2022-01-01')}
+            disabled={importMutation.isPending || isImporting}
             data-testid="button-import-historical"
           >
             <Download className="h-4 w-4 mr-2" />
-            {importMutation.isPending ? 'Importing...' : 'Import Historical'}
+            {isImporting
+              ? `Importing... page ${importProgress?.page ?? 0}${importProgress?.totalPages ? `/${importProgress.totalPages}` : ''}`
+              : canResume
+                ? `Resume Import (page ${importProgress?.page})`
+                : 'Import Historical'}
           </Button>
           <Button
             variant="outline"
@@ -0,0 +1,11 @@
+-- Durable webhook processing queue
+-- webhook_events rows double as queue items: workers claim due 'pending'
+-- rows with FOR UPDATE SKIP LOCKED, retry with backoff via next_attempt_at
+-- and move exhausted events to 'dead_letter'.
+
+ALTER TABLE "webhook_events"
+ADD COLUMN IF NOT EXISTS "next_attempt_at" timestamp;
+
+-- Used in: WebhookProcessor.claimBatch (status + due time)
+CREATE INDEX IF NOT EXISTS "webhook_events_queue_idx"
+ON "webhook_events" ("status", "next_attempt_at");
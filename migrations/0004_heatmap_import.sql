@@ -0,0 +1,25 @@
+-- Resumable heat map import
+-- job_locations gets a unique job_id so the historical import can insert
+-- whole pages with ON CONFLICT DO NOTHING, and sync_status stores the
+-- import checkpoint so an interrupted run resumes from its last page.
+
+ALTER TABLE "sync_status"
+ADD COLUMN IF NOT EXISTS "checkpoint" jsonb;
+
+-- Point check-ins at the surviving row before removing duplicate locations
+UPDATE "check_ins" AS c
+SET "job_location_id" = keep."id"
+FROM "job_locations" AS dup
+JOIN (
+  SELECT "job_id", min("id") AS "id" FROM "job_locations" GROUP BY "job_id"
+) AS keep ON keep."job_id" = dup."job_id"
+WHERE c."job_location_id" = dup."id" AND dup."id" <> keep."id";
+
+DELETE FROM "job_locations" AS dup
+USING "job_locations" AS keep
+WHERE dup."job_id" = keep."job_id" AND dup."id" > keep."id";
+
+-- Used in: HeatMapService.importJobPage (batch dedupe + ON CONFLICT target)
+DROP INDEX IF EXISTS "job_id_idx";
+CREATE UNIQUE INDEX IF NOT EXISTS "job_id_idx"
+ON "job_locations" ("job_id");
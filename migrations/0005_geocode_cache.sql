@@ -0,0 +1,22 @@
+-- Geocode cache
+-- Google Geocoding results keyed by normalized address, so repeated lookups
+-- from booking forms, SMS turns and service-area checks are answered locally.
+-- Negative entries (status 'not_found') expire after a day; hits after 90 days.
+
+CREATE TABLE IF NOT EXISTS "geocode_cache" (
+  "id" serial PRIMARY KEY,
+  "normalized_address" text NOT NULL,
+  "result" jsonb NOT NULL,
+  "status" text NOT NULL,
+  "expires_at" timestamp NOT NULL,
+  "created_at" timestamp DEFAULT now() NOT NULL,
+  "updated_at" timestamp DEFAULT now() NOT NULL
+);
+
+-- Used in: geocoding.ts loadStoredEntry / storeEntry (lookup + ON CONFLICT target)
+CREATE UNIQUE INDEX IF NOT EXISTS "geocode_cache_normalized_address_idx"
+ON "geocode_cache" ("normalized_address");
+
+-- Used in: geocoding.ts pruneExpiredEntries (DELETE ... WHERE expires_at < now)
+CREATE INDEX IF NOT EXISTS "geocode_cache_expires_at_idx"
+ON "geocode_cache" ("expires_at");
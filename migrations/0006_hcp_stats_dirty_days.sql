@@ -0,0 +1,8 @@
+-- Daily stats for rescheduled records
+-- When a sync moves a job or estimate to another scheduled day, the day it
+-- left is recorded here so the incremental daily stats run recomputes it.
+
+CREATE TABLE IF NOT EXISTS "hcp_stats_dirty_days" (
+  "day" timestamp PRIMARY KEY,
+  "marked_at" timestamp DEFAULT now() NOT NULL
+);
@@ -0,0 +1,21 @@
+-- Webhook side effects run once
+-- handled_at is set as soon as an event's side effects (HCP mirror, heat map,
+-- referral SMS) have run, so a retry after a failed batch write skips them.
+--
+-- Rows received before this column existed were already handed to the old
+-- processor, so they are backfilled as handled: leftover 'pending' rows still
+-- get their batch writes, but don't resend referral SMS or replay old job
+-- events on the first deploy. The backfill only runs when the column is added.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_name = 'webhook_events' AND column_name = 'handled_at'
+  ) THEN
+    ALTER TABLE "webhook_events" ADD COLUMN "handled_at" timestamp;
+
+    UPDATE "webhook_events"
+       SET "handled_at" = coalesce("processed_at", "received_at");
+  END IF;
+END $$;
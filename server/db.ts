@@ -2,6 +2,7 @@ import { Pool, neonConfig } from '@neondatabase/serverless';
 import { drizzle } from 'drizzle-orm/neon-serverless';
 import ws from "ws";
 import * as schema from "@shared/schema";
+import { trackDependency } from "./src/observability/tracing";
 
 neonConfig.webSocketConstructor = ws;
 
@@ -12,6 +13,28 @@ if (!process.env.DATABASE_URL) {
 }
 
 export const pool = new Pool({ connectionString: process.env.DATABASE_URL });
+
+// Time every promise-style query and attribute it to the current request
+// trace. Callback-style calls (pg internals, e.g. pool.query running on a
+// client) and submittables like cursors pass through untouched.
+function traceQueries(target: { query: (...args: any[]) => any }): void {
+  const query = target.query.bind(target) as (...args: any[]) => any;
+  target.query = (...args: any[]) => {
+    if (typeof args[args.length - 1] === 'function' || typeof args[0]?.submit === 'function') {
+      return query(...args);
+    }
+    const text: string = typeof args[0] === 'string' ? args[0] : args[0]?.text ?? '';
+    const operation = text.trimStart().split(/\s/, 1)[0].toLowerCase() || 'query';
+    return trackDependency('db', operation, () => query(...args));
+  };
+}
+
+// pool.query covers drizzle queries outside transactions; db.transaction()
+// runs on a client checked out with pool.connect(), so wrap each client once
+// when the pool creates it
+traceQueries(pool);
+pool.on('connect', client => traceQueries(client));
+
 export const db = drizzle({ client: pool, schema });
 
 // Graceful shutdown function for database pool
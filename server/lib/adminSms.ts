@@ -5,9 +5,11 @@ import os from 'os';
 import { ZEKE_IDENTITY } from '../../config/zeke';
 import { dbStorage } from '../dbStorage';
 import OpenAI from 'openai';
+import { tracedFetch } from '../src/observability/tracing';
 
 const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
+  apiKey: process.env.OPENAI_API_KEY,
+  fetch: tracedFetch('openai'),
 });
 
 const ADMIN_PHONE = process.env.ADMIN_PHONE_NUMBER;
@@ -6,12 +6,14 @@ import { eq, desc } from 'drizzle-orm';
 import { interactionLogs } from '@shared/schema';
 import { db } from '../db';
 import OpenAI from 'openai';
+import { tracedFetch } from '../src/observability/tracing';
 import { Logger } from '../src/logger';
 import { logInteraction } from './memory';
 import { generateZekePrompt } from './zekePrompt';
 
 const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
+  apiKey: process.env.OPENAI_API_KEY,
+  fetch: tracedFetch('openai'),
 });
 
 // Get the public MCP server URL for OpenAI Responses API
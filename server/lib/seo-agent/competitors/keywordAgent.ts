@@ -1,9 +1,11 @@
 import OpenAI from 'openai';
+import { tracedFetch } from '../../../src/observability/tracing';
 import { Logger } from '../../../src/logger';
 import { CompetitorPage } from './crawler';
 
 const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
+  apiKey: process.env.OPENAI_API_KEY,
+  fetch: tracedFetch('openai'),
 });
 
 export interface ExtractedKeyword {
@@ -1,10 +1,12 @@
 import OpenAI from 'openai';
+import { tracedFetch } from '../../../src/observability/tracing';
 import { Logger } from '../../../src/logger';
 import { dbStorage } from '../../../dbStorage';
 import { generateZekePrompt } from '../../zekePrompt';
 
 const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
+  apiKey: process.env.OPENAI_API_KEY,
+  fetch: tracedFetch('openai'),
 });
 
 export async function draftBlogPost(keyword: string) {
@@ -2,6 +2,7 @@ import { randomUUID } from 'crypto';
 import { parsePhoneNumberFromString, type CountryCode } from 'libphonenumber-js';
 import bcrypt from 'bcryptjs';
 import OpenAI from 'openai';
+import { tracedFetch } from '../src/observability/tracing';
 import { and, desc, eq, gte, sql } from 'drizzle-orm';
 import { db } from '../db';
 import {
@@ -28,6 +29,7 @@ const RECENT_MESSAGE_LIMIT = 12;
 
 const openai = new OpenAI({
   apiKey: process.env.OPENAI_API_KEY,
+  fetch: tracedFetch('openai'),
 });
 
 export function normalizePhoneToE164(input: string): string {
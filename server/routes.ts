@@ -1,4 +1,4 @@
-import type { Express } from "express";
+import type { Express, Request, Response } from "express";
 import { Router } from "express";
 import { createServer, type Server } from "http";
 import { Readable } from "node:stream";
@@ -19,8 +19,10 @@ import { z } from "zod";
 import { db } from "./db";
 import { eq, sql, and, gte, desc } from "drizzle-orm";
 import { CapacityCalculator } from "./src/capacity";
+import { CapacitySnapshotService, type RenderedCapacity } from "./src/capacitySnapshot";
 import { GoogleAdsBridge } from "./src/ads/bridge";
 import { HousecallProClient } from "./src/housecall";
+import { hcpCache } from "./src/hcpGateway";
 import rateLimit from "express-rate-limit";
 import adminRoutes from "./src/adminRoutes";
 import observabilityRoutes from "./src/observabilityRoutes";
@@ -53,6 +55,12 @@ async function callHousecallAPI(endpoint: string, params: Record<string, any> =
     throw new Error('Housecall Pro API key not configured');
   }
 
+  // Shared HCP cache - identical social-proof reads coalesce with the other HCP clients
+  return hcpCache.get(endpoint, params, () => fetchHousecallAPI(endpoint, params));
+}
+
+async function fetchHousecallAPI(endpoint: string, params: Record<string, any>) {
+
   const url = new URL(endpoint, HOUSECALL_API_BASE);
   Object.keys(params).forEach(key => {
     if (params[key] !== undefined && params[key] !== null) {
@@ -87,7 +95,9 @@ async function callHousecallAPI(endpoint: string, params: Record<string, any> =
       statusText: response.statusText,
       responseBody: responseBody.substring(0, 500) // Truncate for logging
     });
-    throw new Error(`Housecall API error: ${response.status} ${response.statusText} - ${responseBody.substring(0, 200)}`);
+    const error = new Error(`Housecall API error: ${response.status} ${response.statusText} - ${responseBody.substring(0, 200)}`);
+    (error as any).status = response.status;
+    throw error;
   }
 
   return response.json();
@@ -2274,13 +2284,23 @@ $50 REFERRAL CREDIT APPLIES - New customer receives $50 credit toward any servic
     }
   });
 
-  // Capacity API Routes
+  // Capacity API Routes - served from snapshots refreshed in the background
+  const capacitySnapshots = CapacitySnapshotService.getInstance();
+  capacitySnapshots.start();
+
+  const sendCapacity = (req: Request, res: Response, rendered: RenderedCapacity) => {
+    res.set('ETag', rendered.etag);
+    // req.fresh compares If-None-Match against the ETag set above
+    if (req.fresh) {
+      return res.status(304).end();
+    }
+    res.type('application/json').send(rendered.body);
+  };
+
   app.get("/api/v1/capacity/today", publicReadLimiter, cachePresets.short(), async (req, res) => {
     try {
       const userZip = req.query.zip as string | undefined;
-      const calculator = CapacityCalculator.getInstance();
-      const capacity = await calculator.getTodayCapacity(userZip);
-      res.json(capacity);
+      sendCapacity(req, res, await capacitySnapshots.getCapacity('today', userZip));
     } catch (error) {
       logError("Error fetching today's capacity:", error);
       res.status(500).json({ 
@@ -2300,9 +2320,7 @@ $50 REFERRAL CREDIT APPLIES - New customer receives $50 credit toward any servic
   app.get("/api/v1/capacity/tomorrow", publicReadLimiter, async (req, res) => {
     try {
       const userZip = req.query.zip as string | undefined;
-      const calculator = CapacityCalculator.getInstance();
-      const capacity = await calculator.getTomorrowCapacity(userZip);
-      res.json(capacity);
+      sendCapacity(req, res, await capacitySnapshots.getCapacity('tomorrow', userZip));
     } catch (error) {
       logError("Error fetching tomorrow's capacity:", error);
       res.status(500).json({ 
@@ -3031,8 +3049,21 @@ Sitemap: ${siteUrl}/sitemap.xml
   }, 5000); // Wait 5 seconds after server start
 
   // Get optimized heat map data from database
-  app.get("/api/v1/social-proof/service-heat-map", publicReadLimiter, async (_req, res) => {
+  app.get("/api/v1/social-proof/service-heat-map", publicReadLimiter, async (req, res) => {
     try {
+      // Zoom-aware clients get pre-binned job density for their viewport
+      if (req.query.zoom !== undefined) {
+        const zoom = Number(req.query.zoom);
+        const [west, south, east, north] = String(req.query.bbox || '').split(',').map(Number);
+        const bounds = [west, south, east, north].every(Number.isFinite)
+          ? { west, south, east, north }
+          : undefined;
+
+        const { heatMapService } = await import('./src/heatmap');
+        res.set('Cache-Control', 'public, max-age=300');
+        return res.json(await heatMapService.getHeatMapBins(zoom, bounds));
+      }
+
       // First check if we have cached data
       const cachedData = await db.select().from(heatMapCache);
       
@@ -3176,6 +3207,7 @@ Sitemap: ${siteUrl}/sitemap.xml
   
   // Import webhook processor
   const { webhookProcessor } = await import('./src/webhooks');
+  webhookProcessor.startQueue();
 
   // Main webhook endpoint to receive events from Housecall Pro
   app.post('/webhooks/housecall', webhookLimiter, async (req, res) => {
@@ -3444,14 +3476,18 @@ Sitemap: ${siteUrl}/sitemap.xml
 
       Logger.info('[HeatMap] Starting historical import...');
       
-      const result = await heatMapService.importHistoricalJobs(apiKey, startDate || '2022-01-01');
-      
-      res.json({
-        success: result.success,
-        imported: result.imported,
-        skipped: result.skipped,
-        error: result.error,
-        message: `Imported ${result.imported} jobs, skipped ${result.skipped}`
+      // Runs in the background (joining any import already running); poll GET for progress
+      heatMapService.importHistoricalJobs(apiKey, startDate || '2022-01-01')
+        .then(result => {
+          Logger.info(`[HeatMap] Imported ${result.imported} jobs, skipped ${result.skipped}`);
+        })
+        .catch(error => logError('[HeatMap] Import error:', error));
+
+      const progress = await heatMapService.getImportProgress();
+      res.status(202).json({
+        success: true,
+        progress,
+        message: 'Historical import started'
       });
     } catch (error) {
       logError('[HeatMap] Import error:', error);
@@ -3459,6 +3495,16 @@ Sitemap: ${siteUrl}/sitemap.xml
     }
   });
 
+  // Historical import progress / last checkpoint (ADMIN ONLY)
+  app.get('/api/v1/admin/heatmap/import', adminLimiter, authenticate, async (_req, res) => {
+    try {
+      res.json(await heatMapService.getImportProgress());
+    } catch (error) {
+      logError('[HeatMap] Error fetching import progress:', error);
+      res.status(500).json({ error: 'Failed to fetch import progress' });
+    }
+  });
+
   // Get heat map data for admin dashboard (real-time) (ADMIN ONLY)
   app.get('/api/v1/admin/heatmap/data', adminLimiter, authenticate, async (req, res) => {
     try {
@@ -3548,8 +3594,8 @@ Sitemap: ${siteUrl}/sitemap.xml
   // Update job intensities (background job) (ADMIN ONLY)
   app.post('/api/v1/admin/heatmap/update-intensities', adminLimiter, authenticate, async (req, res) => {
     try {
-      await heatMapService.updateIntensities();
-      res.json({ success: true, message: 'Intensities updated successfully' });
+      const updated = await heatMapService.updateIntensities();
+      res.json({ success: true, updated, message: 'Intensities updated successfully' });
     } catch (error) {
       logError('[HeatMap] Error updating intensities:', error);
       res.status(500).json({ error: 'Failed to update intensities' });
@@ -2,13 +2,14 @@
 import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
 import { CapacityCalculator } from '../../capacity';
 import { HousecallProClient } from '../../housecall';
+import { invalidateForWrite } from '../../hcpGateway';
 
 // Mock dependencies
 vi.mock('../../housecall', () => ({
     HousecallProClient: {
         getInstance: vi.fn().mockReturnValue({
             getEmployees: vi.fn(),
-            getBookingWindows: vi.fn(),
+            fetchBookingWindows: vi.fn(),
             getEstimates: vi.fn(),
         }),
     },
@@ -64,7 +65,7 @@ describe('CapacityCalculator', () => {
         // 2 hours from now
         const endTime = new Date(now.getTime() + 2 * 60 * 60 * 1000).toISOString();
 
-        mockHcp.getBookingWindows.mockResolvedValue([
+        mockHcp.fetchBookingWindows.mockResolvedValue([
             {
                 start_time: startTime,
                 end_time: endTime,
@@ -82,7 +83,7 @@ describe('CapacityCalculator', () => {
 
     it('should return NEXT_DAY state when no slots available', async () => {
         const now = new Date();
-        mockHcp.getBookingWindows.mockResolvedValue([]); // No windows
+        mockHcp.fetchBookingWindows.mockResolvedValue([]); // No windows
 
         const result = await calculator.calculateCapacity(now);
         expect(result.overall.state).toBe('NEXT_DAY');
@@ -90,7 +91,7 @@ describe('CapacityCalculator', () => {
 
     it('should cache results', async () => {
         const now = new Date();
-        mockHcp.getBookingWindows.mockResolvedValue([]);
+        mockHcp.fetchBookingWindows.mockResolvedValue([]);
 
         const result1 = await calculator.calculateCapacity(now);
         const result2 = await calculator.calculateCapacity(now);
@@ -101,4 +102,94 @@ describe('CapacityCalculator', () => {
         // Results should have the same cache expiration time (indicating they're from cache)
         expect(result1.expires_at).toBe(result2.expires_at);
     });
+
+    it('applies express eligibility per ZIP on top of the cached snapshot', async () => {
+        const date = new Date('2031-03-04T12:00:00Z');
+        mockHcp.fetchBookingWindows.mockResolvedValue([]);
+
+        const inZone = await calculator.calculateCapacity(date, '02169');
+        const outOfZone = await calculator.calculateCapacity(date, '99999');
+
+        expect(inZone.express_eligible).toBe(true);
+        expect(outOfZone.express_eligible).toBe(false);
+        expect(mockHcp.fetchBookingWindows).toHaveBeenCalledTimes(1);
+    });
+
+    it('shares one computation between concurrent callers', async () => {
+        const date = new Date('2031-03-05T12:00:00Z');
+        mockHcp.fetchBookingWindows.mockResolvedValue([]);
+
+        await Promise.all([
+            calculator.calculateCapacity(date),
+            calculator.calculateCapacity(date),
+            calculator.getSnapshot(date),
+        ]);
+
+        expect(mockHcp.getEmployees).toHaveBeenCalledTimes(1);
+        expect(mockHcp.fetchBookingWindows).toHaveBeenCalledTimes(1);
+    });
+
+    it('assigns windows per tech, including windows open to every tech', async () => {
+        const date = new Date('2031-03-06T12:00:00Z');
+        mockHcp.fetchBookingWindows.mockResolvedValue([
+            { start_time: '2031-03-06T14:00:00.000Z', end_time: '2031-03-06T15:00:00.000Z', available: true, employee_ids: ['1'] },
+            { start_time: '2031-03-06T16:00:00.000Z', end_time: '2031-03-06T17:00:00.000Z', available: true },
+            { start_time: '2031-03-06T18:00:00.000Z', end_time: '2031-03-06T19:00:00.000Z', available: false, employee_ids: ['2'] },
+            { start_time: '2031-03-07T14:00:00.000Z', end_time: '2031-03-07T15:00:00.000Z', available: true, employee_ids: ['3'] },
+        ]);
+
+        const result = await calculator.calculateCapacity(date);
+
+        expect(result.tech.nate.open_windows).toEqual(['09:00 - 10:00', '11:00 - 12:00']);
+        expect(result.tech.nate.total_bookable_minutes).toBe(120);
+        expect(result.tech.nick).toMatchObject({ total_bookable_minutes: 60, booked_minutes: 60, score: 0 });
+        expect(result.tech.jahz.open_windows).toEqual(['11:00 - 12:00']);
+        expect(result.express_windows).toEqual(['08:00 - 11:00', '11:00 - 14:00']);
+    });
+
+    it('serves the stale snapshot after a job write until the rebuild replaces it', async () => {
+        const date = new Date('2031-03-08T12:00:00Z');
+        mockHcp.fetchBookingWindows.mockResolvedValue([]);
+        const before = await calculator.getSnapshot(date);
+        expect(calculator.needsRefresh(date)).toBe(false);
+
+        invalidateForWrite('/jobs/job_1/appointments');
+        expect(calculator.needsRefresh(date)).toBe(true);
+
+        let release!: (windows: any[]) => void;
+        mockHcp.fetchBookingWindows.mockReturnValueOnce(new Promise(resolve => { release = resolve; }));
+        expect(await calculator.getSnapshot(date)).toBe(before);
+        expect(await calculator.getSnapshot(date)).toBe(before);
+        expect(mockHcp.fetchBookingWindows).toHaveBeenCalledTimes(2);
+
+        release([]);
+        await vi.waitFor(() => expect(calculator.needsRefresh(date)).toBe(false));
+        const after = await calculator.getSnapshot(date);
+        expect(after).not.toBe(before);
+        expect(mockHcp.fetchBookingWindows).toHaveBeenCalledTimes(2);
+    });
+
+    it('does not cache a build that started before a job write', async () => {
+        const date = new Date('2031-03-10T12:00:00Z');
+        let release!: (windows: any[]) => void;
+        mockHcp.fetchBookingWindows.mockReturnValueOnce(new Promise(resolve => { release = resolve; }));
+
+        const build = calculator.getSnapshot(date);
+        invalidateForWrite('/jobs');
+        release([]);
+        await build;
+
+        expect(calculator.needsRefresh(date)).toBe(true);
+    });
+
+    it('keeps the previous snapshot when booking windows fail to load', async () => {
+        const date = new Date('2031-03-09T12:00:00Z');
+        mockHcp.fetchBookingWindows.mockResolvedValue([]);
+        const previous = await calculator.getSnapshot(date);
+
+        mockHcp.fetchBookingWindows.mockRejectedValueOnce(new Error('HCP 503'));
+        await expect(calculator.getSnapshot(date, { refresh: true })).rejects.toThrow('HCP 503');
+
+        expect(await calculator.getSnapshot(date)).toBe(previous);
+    });
 });
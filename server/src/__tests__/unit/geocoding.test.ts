@@ -0,0 +1,80 @@
+import { describe, it, expect, vi } from 'vitest';
+import { PgDialect } from 'drizzle-orm/pg-core';
+import { db } from '../../../db';
+import { normalizeAddress, extractZipCode, checkServiceArea, geocodeAddress } from '../../geocoding';
+
+vi.mock('../../logger', () => ({
+    logError: vi.fn(),
+}));
+
+vi.mock('../../../db', () => ({
+    db: {
+        select: vi.fn(),
+        insert: vi.fn(),
+        delete: vi.fn(),
+    },
+}));
+
+vi.mock('../../../lib/usageTracker', () => ({
+    trackGoogleMaps: vi.fn(),
+}));
+
+describe('normalizeAddress', () => {
+    it('ignores case, punctuation, spacing and street suffix spelling', () => {
+        expect(normalizeAddress('  123 Main Street,  Quincy, MA ')).toBe('123 main st quincy ma');
+        expect(normalizeAddress('123 main st. quincy ma')).toBe('123 main st quincy ma');
+    });
+});
+
+describe('extractZipCode', () => {
+    it('finds a trailing ZIP or ZIP+4', () => {
+        expect(extractZipCode('123 Main St, Quincy, MA 02169')).toBe('02169');
+        expect(extractZipCode('123 Main St, Quincy, MA 02169-1234, USA')).toBe('02169');
+    });
+
+    it('does not treat a house number as a ZIP', () => {
+        expect(extractZipCode('12345 Main St, Quincy, MA')).toBeNull();
+    });
+});
+
+describe('checkServiceArea', () => {
+    it('answers from the capacity config without geocoding when the address has a ZIP', async () => {
+        const fetchSpy = vi.spyOn(globalThis, 'fetch');
+
+        const result = await checkServiceArea('123 Main St, Quincy, MA 02169');
+
+        expect(result.zipCode).toBe('02169');
+        expect(result.inServiceArea).toBe(true);
+        expect(fetchSpy).not.toHaveBeenCalled();
+        fetchSpy.mockRestore();
+    });
+});
+
+describe('geocodeAddress', () => {
+    it('stores new results and prunes expired rows at most once an hour', async () => {
+        vi.stubEnv('GOOGLE_MAPS_API_KEY', 'test-key');
+        (db.select as any).mockReturnValue({ from: () => ({ where: () => ({ limit: async () => [] }) }) });
+        const onConflictDoUpdate = vi.fn(async () => undefined);
+        (db.insert as any).mockReturnValue({ values: () => ({ onConflictDoUpdate }) });
+        const pruneWhere = vi.fn(async () => undefined);
+        (db.delete as any).mockReturnValue({ where: pruneWhere });
+        const fetchSpy = vi.spyOn(globalThis, 'fetch').mockResolvedValue({
+            json: async () => ({
+                status: 'OK',
+                results: [{ formatted_address: 'Quincy, MA', address_components: [{ long_name: '02169', types: ['postal_code'] }] }],
+            }),
+        } as any);
+
+        expect((await geocodeAddress('1 Prune Ave, Quincy, MA')).zipCode).toBe('02169');
+        await geocodeAddress('2 Prune Ave, Quincy, MA');
+
+        expect(fetchSpy).toHaveBeenCalledTimes(2);
+        expect(onConflictDoUpdate).toHaveBeenCalledTimes(2);
+        await vi.waitFor(() => expect(pruneWhere).toHaveBeenCalledTimes(1));
+        const prune = new PgDialect().sqlToQuery((pruneWhere.mock.calls[0] as any[])[0]).sql;
+        expect(prune).toBe('"geocode_cache"."expires_at" < $1');
+
+        fetchSpy.mockRestore();
+        vi.unstubAllEnvs();
+    });
+});
@@ -0,0 +1,149 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { HcpResponseCache, buildHcpCacheKey, getUpstreamStatus } from '../../hcpGateway';
+import { Logger } from '../../logger';
+import { runWithTrace } from '../../observability/tracing';
+
+// Mock logger to suppress output
+vi.mock('../../logger', () => ({
+    Logger: {
+        info: vi.fn(),
+        debug: vi.fn(),
+        warn: vi.fn(),
+        error: vi.fn(),
+    },
+}));
+
+function upstreamError(status: number) {
+    const error = new Error(`API error: ${status}`);
+    (error as any).status = status;
+    return error;
+}
+
+describe('HcpResponseCache', () => {
+    let cache: HcpResponseCache;
+
+    beforeEach(() => {
+        cache = new HcpResponseCache(3);
+    });
+
+    it('builds the same key regardless of parameter order or scalar type', () => {
+        expect(buildHcpCacheKey('/jobs', { page: 1, page_size: '100' }))
+            .toBe(buildHcpCacheKey('/jobs', { page_size: 100, page: '1', customer_id: undefined }));
+        expect(buildHcpCacheKey('/jobs', { page: 1 })).not.toBe(buildHcpCacheKey('/estimates', { page: 1 }));
+    });
+
+    it('serves repeat GETs from cache', async () => {
+        const loader = vi.fn().mockResolvedValue({ jobs: [] });
+
+        await cache.get('/jobs', { page: 1 }, loader);
+        await cache.get('/jobs', { page: 1 }, loader);
+
+        expect(loader).toHaveBeenCalledTimes(1);
+        expect(cache.getStats()).toMatchObject({ hits: 1, misses: 1 });
+    });
+
+    it('coalesces concurrent identical requests into one upstream call', async () => {
+        let resolve!: (value: unknown) => void;
+        const loader = vi.fn().mockReturnValue(new Promise(r => { resolve = r; }));
+
+        const calls = Promise.all([
+            cache.get('/employees', {}, loader),
+            cache.get('/employees', {}, loader),
+            cache.get('/employees', {}, loader),
+        ]);
+        resolve({ employees: [] });
+
+        expect(await calls).toHaveLength(3);
+        expect(loader).toHaveBeenCalledTimes(1);
+        expect(cache.getStats()).toMatchObject({ misses: 1, coalesced: 2, inFlight: 0 });
+    });
+
+    it('does not cache customer lookups', async () => {
+        const loader = vi.fn().mockResolvedValue({ customers: [] });
+
+        await cache.get('/customers', { q: '5555550100' }, loader);
+        await cache.get('/customers', { q: '5555550100' }, loader);
+
+        expect(loader).toHaveBeenCalledTimes(2);
+    });
+
+    it('serves stale data when HCP rate limits or errors', async () => {
+        vi.useFakeTimers();
+        try {
+            await cache.get('/jobs', {}, () => Promise.resolve({ jobs: ['a'] }));
+            vi.advanceTimersByTime(3 * 60 * 1000);
+
+            const result = await cache.get('/jobs', {}, () => Promise.reject(upstreamError(429)));
+            expect(result).toEqual({ jobs: ['a'] });
+            expect(cache.getStats().staleServed).toBe(1);
+
+            await expect(cache.get('/jobs', {}, () => Promise.reject(upstreamError(404))))
+                .rejects.toThrow('API error: 404');
+        } finally {
+            vi.useRealTimers();
+        }
+    });
+
+    it('evicts the least recently used entry when full', async () => {
+        const load = (value: string) => () => Promise.resolve(value);
+        await cache.get('/jobs', { page: 1 }, load('1'));
+        await cache.get('/jobs', { page: 2 }, load('2'));
+        await cache.get('/jobs', { page: 3 }, load('3'));
+        await cache.get('/jobs', { page: 1 }, load('stale'));
+        await cache.get('/jobs', { page: 4 }, load('4'));
+
+        const reload = vi.fn().mockResolvedValue('2b');
+        expect(await cache.get('/jobs', { page: 2 }, reload)).toBe('2b');
+        expect(await cache.get('/jobs', { page: 1 }, load('x'))).toBe('1');
+        expect(cache.getStats().evictions).toBeGreaterThanOrEqual(1);
+    });
+
+    it('invalidates entries by endpoint prefix', async () => {
+        await cache.get('/jobs', {}, () => Promise.resolve('list'));
+        await cache.get('/jobs/job_1', {}, () => Promise.resolve('detail'));
+        await cache.get('/employees', {}, () => Promise.resolve('staff'));
+
+        expect(cache.invalidate('/jobs')).toBe(2);
+        expect(cache.getStats().size).toBe(1);
+    });
+
+    it('does not cache a load that was invalidated while in flight', async () => {
+        let resolve!: (value: unknown) => void;
+        const stale = cache.get('/company/schedule_availability/booking_windows', {}, () => new Promise(r => { resolve = r; }));
+
+        cache.invalidate('/company/schedule_availability/booking_windows');
+        const fresh = vi.fn().mockResolvedValue('after-write');
+        const next = cache.get('/company/schedule_availability/booking_windows', {}, fresh);
+        resolve('before-write');
+
+        expect(await stale).toBe('before-write');
+        expect(await next).toBe('after-write');
+        expect(fresh).toHaveBeenCalledTimes(1);
+        expect(await cache.get('/company/schedule_availability/booking_windows', {}, () => Promise.resolve('x'))).toBe('after-write');
+    });
+
+    it('logs a failed shared request under the waiting caller correlation ID', async () => {
+        let fail!: (error: Error) => void;
+        const loader = vi.fn(() => new Promise((_, reject) => { fail = reject; }));
+
+        const first = runWithTrace('corr-first', () => cache.get('/jobs', { page: 1 }, loader));
+        const waiter = runWithTrace('corr-waiter', () => cache.get('/jobs', { page: 1 }, loader));
+        fail(upstreamError(502));
+
+        const results = await Promise.allSettled([first, waiter]);
+        expect(results.map(result => result.status)).toEqual(['rejected', 'rejected']);
+        expect(loader).toHaveBeenCalledTimes(1);
+        expect(Logger.warn).toHaveBeenCalledWith('[HcpGateway] Shared HCP request failed', expect.objectContaining({
+            endpoint: '/jobs',
+            correlationId: 'corr-waiter',
+            status: 502,
+        }));
+    });
+
+    it('reads upstream status from each caller error shape', () => {
+        expect(getUpstreamStatus(upstreamError(503))).toBe(503);
+        expect(getUpstreamStatus({ details: { status: 429 } })).toBe(429);
+        expect(getUpstreamStatus(new Error('Housecall API error: 502 Bad Gateway'))).toBe(502);
+        expect(getUpstreamStatus(new Error('network down'))).toBeUndefined();
+    });
+});
@@ -0,0 +1,164 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { PgDialect } from 'drizzle-orm/pg-core';
+import type { SQL } from 'drizzle-orm';
+import { hcpJobs } from '@shared/schema';
+import { db } from '../../../db';
+import { HousecallProClient } from '../../housecall';
+import { getHCPSyncService, vacatedDays } from '../../hcpSync';
+
+vi.mock('../../../db', () => ({
+    db: {
+        query: { hcpSyncLog: { findFirst: vi.fn() } },
+        select: vi.fn(),
+        insert: vi.fn(),
+        update: vi.fn(),
+        execute: vi.fn(),
+    },
+}));
+
+vi.mock('../../housecall', () => {
+    const client = { callAPI: vi.fn() };
+    return { HousecallProClient: { getInstance: vi.fn(() => client) } };
+});
+
+vi.mock('../../logger', () => ({
+    Logger: {
+        info: vi.fn(),
+        warn: vi.fn(),
+        debug: vi.fn(),
+        error: vi.fn(),
+    },
+}));
+
+const dialect = new PgDialect();
+const render = (query: SQL) => dialect.sqlToQuery(query).sql.replace(/\s+/g, ' ');
+
+describe('vacatedDays', () => {
+    it('returns the old day of records moved to another day', () => {
+        const days = vacatedDays(
+            [
+                { id: 'moved', scheduledStart: new Date('2026-03-02T14:00:00Z') },
+                { id: 'same-day', scheduledStart: new Date('2026-03-03T09:00:00Z') },
+                { id: 'unscheduled', scheduledStart: new Date('2026-03-04T09:00:00Z') },
+                { id: 'not-in-batch', scheduledStart: new Date('2026-03-05T09:00:00Z') },
+            ],
+            new Map([
+                ['moved', new Date('2026-03-06T14:00:00Z')],
+                ['same-day', new Date('2026-03-03T16:00:00Z')],
+                ['unscheduled', null],
+                ['new-record', new Date('2026-03-07T10:00:00Z')],
+            ])
+        );
+
+        expect(days.map(day => day.toISOString())).toEqual([
+            '2026-03-02T00:00:00.000Z',
+            '2026-03-04T00:00:00.000Z',
+        ]);
+    });
+});
+
+describe('HCPSyncService.syncDailyStats', () => {
+    beforeEach(() => {
+        vi.clearAllMocks();
+        (db.insert as any).mockReturnValue({ values: () => ({ returning: async () => [{ id: 1 }] }) });
+        (db.update as any).mockReturnValue({ set: () => ({ where: async () => undefined }) });
+        (db.execute as any).mockResolvedValue({ rows: [{ inserted: true }, { inserted: false }] });
+    });
+
+    it('incrementally recomputes synced days and days records moved away from', async () => {
+        (db.query.hcpSyncLog.findFirst as any).mockResolvedValue({ startedAt: new Date('2026-03-01T00:00:00Z') });
+
+        const result = await getHCPSyncService().syncDailyStats(30, 'incremental');
+
+        expect(result).toMatchObject({ status: 'completed', recordsCreated: 1, recordsUpdated: 1 });
+        const [rollup, cleanup] = (db.execute as any).mock.calls.map(([query]: [SQL]) => render(query));
+        expect(rollup).toContain('"hcp_jobs"."synced_at" >=');
+        expect(rollup).toContain('"hcp_estimates"."synced_at" >=');
+        expect(rollup).toContain('SELECT "hcp_stats_dirty_days"."day" AS day FROM "hcp_stats_dirty_days"');
+        expect(rollup).toContain('GROUP BY 1');
+        expect(rollup).toContain('ON CONFLICT (date) DO UPDATE');
+        expect(cleanup).toContain('DELETE FROM "hcp_stats_dirty_days"');
+    });
+
+    it('recomputes every day in range without a previous run', async () => {
+        (db.query.hcpSyncLog.findFirst as any).mockResolvedValue(undefined);
+
+        await getHCPSyncService().syncDailyStats(7, 'incremental');
+
+        expect(db.execute).toHaveBeenCalledTimes(1);
+        const rollup = render((db.execute as any).mock.calls[0][0]);
+        expect(rollup).toContain('generate_series');
+        expect(rollup).not.toContain('hcp_stats_dirty_days');
+    });
+});
+
+describe('HCPSyncService incremental jobs sync', () => {
+    const hcpClient = HousecallProClient.getInstance() as any;
+    let upserted: any[];
+    let conflict: any;
+
+    const job = (id: string, updatedAt: string) => ({ id, updated_at: updatedAt, work_status: 'scheduled' });
+
+    beforeEach(() => {
+        vi.clearAllMocks();
+        upserted = [];
+        (db.select as any).mockReturnValue({ from: () => ({ where: async () => [] }) });
+        (db.update as any).mockReturnValue({ set: () => ({ where: async () => undefined }) });
+        (db.insert as any).mockImplementation((table: unknown) => ({
+            values: (rows: any) => table === hcpJobs
+                ? {
+                    onConflictDoUpdate: (config: any) => {
+                        conflict = config;
+                        upserted.push(...rows);
+                        return { returning: async () => rows.map(() => ({ inserted: false })) };
+                    },
+                }
+                : { returning: async () => [{ id: 1 }] },
+        }));
+    });
+
+    it('takes the watermark from the last completed sync run of the entity', async () => {
+        const startedAt = new Date('2026-03-01T06:00:00Z');
+        (db.query.hcpSyncLog.findFirst as any).mockResolvedValue({ startedAt });
+
+        await expect(getHCPSyncService().getWatermark('jobs')).resolves.toBe(startedAt);
+
+        const { where } = (db.query.hcpSyncLog.findFirst as any).mock.calls[0][0];
+        const query = dialect.sqlToQuery(where);
+        expect(query.sql).toContain('"hcp_sync_log"."sync_type" IN (');
+        expect(query.params).toEqual(['jobs', 'jobs_incremental', 'completed']);
+    });
+
+    it('reads changed jobs newest first, uncached, and stops at the first older record', async () => {
+        const watermark = new Date(Date.now() - 60 * 60 * 1000);
+        (db.query.hcpSyncLog.findFirst as any).mockResolvedValue({ startedAt: watermark });
+        const fresh = new Date().toISOString();
+        hcpClient.callAPI
+            .mockResolvedValueOnce({ jobs: Array.from({ length: 100 }, (_, i) => job(`job_${i}`, fresh)) })
+            .mockResolvedValueOnce({ jobs: [job('job_new', fresh), job('job_old', '2026-01-01T00:00:00Z')] });
+
+        const result = await getHCPSyncService().syncJobs(30, 'incremental');
+
+        expect(result).toMatchObject({ syncType: 'jobs_incremental', status: 'completed', recordsProcessed: 101 });
+        expect(hcpClient.callAPI).toHaveBeenCalledTimes(2);
+        expect(hcpClient.callAPI).toHaveBeenLastCalledWith(
+            '/jobs',
+            { sort_by: 'updated_at', sort_direction: 'desc', page: 2, page_size: 100 },
+            { cache: false }
+        );
+        expect(upserted.map(row => row.hcpJobId)).not.toContain('job_old');
+        expect(render(conflict.setWhere)).toBe(
+            '"hcp_jobs"."hcp_updated_at" IS NULL OR excluded.hcp_updated_at > "hcp_jobs"."hcp_updated_at"'
+        );
+    });
+
+    it('applies job webhooks with updated_at and skips those without', async () => {
+        const service = getHCPSyncService();
+
+        await expect(service.applyJobEvent({ id: 'job_1', work_status: 'completed' })).resolves.toEqual({ created: 0, updated: 0 });
+        expect(db.insert).not.toHaveBeenCalled();
+
+        await expect(service.applyJobEvent({ job: job('job_2', '2026-03-02T10:00:00Z') })).resolves.toEqual({ created: 0, updated: 1 });
+        expect(upserted).toEqual([expect.objectContaining({ hcpJobId: 'job_2', hcpUpdatedAt: new Date('2026-03-02T10:00:00Z') })]);
+    });
+});
@@ -0,0 +1,137 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
+import { PgDialect } from 'drizzle-orm/pg-core';
+import type { SQL } from 'drizzle-orm';
+import { db } from '../../../db';
+import { HeatMapService } from '../../heatmap';
+
+vi.mock('../../../db', () => ({
+    db: {
+        select: vi.fn(),
+        insert: vi.fn(),
+        update: vi.fn(),
+    },
+}));
+
+vi.mock('../../logger', () => ({
+    Logger: {
+        info: vi.fn(),
+        warn: vi.fn(),
+        debug: vi.fn(),
+        error: vi.fn(),
+    },
+}));
+
+const dialect = new PgDialect();
+const render = (query: SQL) => dialect.sqlToQuery(query).sql.replace(/\s+/g, ' ');
+
+const completedJob = (id: string) => ({
+    id,
+    work_status: 'completed',
+    scheduled_end: '2025-06-01T15:00:00Z',
+    address: { latitude: 42.25, longitude: -71.0, city: 'Quincy', state: 'MA' },
+});
+
+// select() reads the import checkpoint, select({ jobId }) the page's existing jobs
+function mockSelects(checkpoint: unknown) {
+    (db.select as any).mockImplementation((fields?: unknown) => ({
+        from: () => ({
+            where: fields
+                ? async () => []
+                : () => ({ limit: async () => (checkpoint ? [{ checkpoint }] : []) }),
+        }),
+    }));
+}
+
+describe('HeatMapService historical import', () => {
+    let savedCheckpoints: any[];
+    let insertedJobs: any[];
+
+    beforeEach(() => {
+        vi.clearAllMocks();
+        savedCheckpoints = [];
+        insertedJobs = [];
+        (db.insert as any).mockImplementation(() => ({
+            values: (values: any) => ({
+                onConflictDoNothing: () => ({
+                    returning: async () => {
+                        insertedJobs.push(...values);
+                        return values.map((_: unknown, i: number) => ({ id: i }));
+                    },
+                }),
+                onConflictDoUpdate: async () => {
+                    savedCheckpoints.push(values.checkpoint);
+                },
+            }),
+        }));
+    });
+
+    afterEach(() => {
+        vi.unstubAllGlobals();
+    });
+
+    it('resumes after the checkpointed page and skips completed pages', async () => {
+        mockSelects({ status: 'running', startDate: '2022-01-01', page: 2, totalPages: 3, imported: 150, skipped: 10 });
+        const fetchMock = vi.fn(async (url: string) => {
+            const page = new URL(url).searchParams.get('page');
+            const jobs = page === '3' ? [completedJob('job_a'), completedJob('job_b'), { id: 'job_c', work_status: 'scheduled' }] : [];
+            return { ok: true, json: async () => ({ jobs, total_pages: 3 }) };
+        });
+        vi.stubGlobal('fetch', fetchMock);
+
+        const result = await new HeatMapService().importHistoricalJobs('key', '2022-01-01');
+
+        expect(fetchMock.mock.calls.map(([url]) => new URL(url).searchParams.get('page'))).toEqual(['3']);
+        expect(result).toMatchObject({ success: true, imported: 152, skipped: 11, resumedFromPage: 3 });
+        expect(insertedJobs.map(job => job.jobId)).toEqual(['job_a', 'job_b']);
+        expect(savedCheckpoints.at(-1)).toMatchObject({ status: 'completed', page: 3, imported: 152 });
+    });
+
+    it('starts over when the checkpoint is for another start date', async () => {
+        mockSelects({ status: 'failed', startDate: '2020-01-01', page: 5, imported: 400, skipped: 0 });
+        const fetchMock = vi.fn(async () => ({ ok: true, json: async () => ({ jobs: [] }) }));
+        vi.stubGlobal('fetch', fetchMock);
+
+        const result = await new HeatMapService().importHistoricalJobs('key', '2022-01-01');
+
+        expect(new URL((fetchMock.mock.calls[0] as any)[0]).searchParams.get('page')).toBe('1');
+        expect(result).toMatchObject({ success: true, imported: 0, resumedFromPage: undefined });
+    });
+
+    it('reports a running checkpoint left by a dead process as interrupted', async () => {
+        mockSelects({ status: 'running', startDate: '2022-01-01', page: 4, imported: 300, skipped: 2 });
+
+        const progress = await new HeatMapService().getImportProgress();
+
+        expect(progress).toMatchObject({ status: 'interrupted', page: 4, startDate: '2022-01-01' });
+    });
+});
+
+describe('HeatMapService.updateIntensities', () => {
+    it('recomputes every changed intensity in a single UPDATE', async () => {
+        let assigned: any;
+        let condition: any;
+        (db.update as any).mockReturnValue({
+            set: (values: any) => {
+                assigned = values;
+                return {
+                    where: (where: any) => {
+                        condition = where;
+                        return { returning: async () => [{ id: 1 }, { id: 2 }] };
+                    },
+                };
+            },
+        });
+
+        const changed = await new HeatMapService().updateIntensities();
+
+        expect(changed).toBe(2);
+        expect(db.update).toHaveBeenCalledTimes(1);
+        const intensity = render(assigned.intensity);
+        expect(intensity).toContain('CASE');
+        expect(intensity).toContain('WHEN extract(epoch from (now() - "job_locations"."job_date")) / 86400 <= 7 THEN 1.0');
+        expect(intensity).toContain('ELSE 0.2');
+        const where = render(condition);
+        expect(where).toContain('"job_locations"."is_active" = $');
+        expect(where).toContain('- "job_locations"."intensity") > 0.05');
+    });
+});
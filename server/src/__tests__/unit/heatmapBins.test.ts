@@ -0,0 +1,63 @@
+import { describe, it, expect } from 'vitest';
+import { HeatMapBinIndex, binCellSize, clampZoom, MAX_BIN_ZOOM, MIN_BIN_ZOOM } from '../../heatmapBins';
+
+function fineCell(lat: number, lng: number, intensity = 1) {
+    const size = binCellSize(MAX_BIN_ZOOM);
+    return {
+        row: Math.floor(lat / size),
+        col: Math.floor(lng / size),
+        count: 1,
+        intensity,
+        latSum: lat,
+        lngSum: lng,
+    };
+}
+
+describe('HeatMapBinIndex', () => {
+    it('clamps zoom to the supported range', () => {
+        expect(clampZoom(1)).toBe(MIN_BIN_ZOOM);
+        expect(clampZoom(20)).toBe(MAX_BIN_ZOOM);
+        expect(clampZoom(NaN)).toBe(MIN_BIN_ZOOM);
+        expect(binCellSize(8)).toBeCloseTo(binCellSize(9) * 2);
+    });
+
+    it('merges fine cells into coarser zoom levels', () => {
+        const index = new HeatMapBinIndex([
+            fineCell(42.2501, -70.9501, 1),
+            fineCell(42.2601, -70.9601, 0.5),
+            fineCell(41.7001, -70.6001, 0.2),
+        ]);
+
+        expect(index.query(MAX_BIN_ZOOM)).toHaveLength(3);
+
+        const coarse = index.query(8);
+        expect(coarse).toHaveLength(2);
+        expect(coarse.reduce((sum, bin) => sum + bin.count, 0)).toBe(3);
+        const quincy = coarse.find(bin => bin.count === 2)!;
+        expect(quincy.intensity).toBeCloseTo(1.5);
+        expect(quincy.lat).toBeCloseTo(42.2551, 4);
+    });
+
+    it('limits bins to the requested bounds', () => {
+        const index = new HeatMapBinIndex([
+            fineCell(42.25, -70.95),
+            fineCell(41.70, -70.60),
+        ]);
+
+        const bins = index.query(10, { west: -71.0, south: 42.0, east: -70.9, north: 42.5 });
+        expect(bins).toHaveLength(1);
+        expect(bins[0].lat).toBeCloseTo(42.25);
+    });
+
+    it('updates only the affected cell at every built level when a point is added', () => {
+        const index = new HeatMapBinIndex([fineCell(42.25, -70.95)]);
+        index.query(8);
+
+        index.addPoint(42.2501, -70.9501, 1);
+        index.addPoint(41.70, -70.60, 1);
+
+        expect(index.query(8).map(bin => bin.count).sort()).toEqual([1, 2]);
+        expect(index.query(MAX_BIN_ZOOM)).toHaveLength(2);
+        expect(index.size).toBe(2);
+    });
+});
@@ -0,0 +1,59 @@
+import { describe, it, expect, vi } from 'vitest';
+import { prefetchPages, chunk } from '../../util/pagination';
+
+async function collect<T>(pages: AsyncGenerator<{ page: number; items: T[] }>) {
+    const seen: Array<{ page: number; items: T[] }> = [];
+    for await (const page of pages) seen.push(page);
+    return seen;
+}
+
+describe('prefetchPages', () => {
+    it('yields every page in order when the total is known', async () => {
+        const fetchPage = vi.fn(async (page: number) => ({ items: [`p${page}`], totalPages: 4 }));
+
+        const seen = await collect(prefetchPages(fetchPage, { concurrency: 2 }));
+
+        expect(seen.map(p => p.page)).toEqual([1, 2, 3, 4]);
+        expect(fetchPage).toHaveBeenCalledTimes(4);
+    });
+
+    it('keeps at most `concurrency` pages in flight', async () => {
+        let inFlight = 0;
+        let peak = 0;
+        const fetchPage = async (page: number) => {
+            inFlight++;
+            peak = Math.max(peak, inFlight);
+            await new Promise(resolve => setTimeout(resolve, 1));
+            inFlight--;
+            return { items: [page], totalPages: 10 };
+        };
+
+        await collect(prefetchPages(fetchPage, { concurrency: 3 }));
+
+        expect(peak).toBeLessThanOrEqual(3);
+    });
+
+    it('stops at the first empty page when the total is unknown', async () => {
+        const fetchPage = vi.fn(async (page: number) => ({ items: page < 3 ? [page] : [] }));
+
+        const seen = await collect(prefetchPages(fetchPage, { concurrency: 5 }));
+
+        expect(seen.map(p => p.page)).toEqual([1, 2, 3]);
+        expect(fetchPage).toHaveBeenCalledTimes(3);
+    });
+
+    it('resumes from a start page', async () => {
+        const fetchPage = vi.fn(async (page: number) => ({ items: [page], totalPages: 5 }));
+
+        const seen = await collect(prefetchPages(fetchPage, { startPage: 4 }));
+
+        expect(seen.map(p => p.page)).toEqual([4, 5]);
+    });
+});
+
+describe('chunk', () => {
+    it('splits arrays into fixed-size chunks', () => {
+        expect(chunk([1, 2, 3, 4, 5], 2)).toEqual([[1, 2], [3, 4], [5]]);
+        expect(chunk([], 3)).toEqual([]);
+    });
+});
@@ -0,0 +1,107 @@
+import { describe, it, expect, vi } from 'vitest';
+import {
+    getCorrelationId,
+    getTraceBreakdown,
+    normalizeEndpoint,
+    runWithTrace,
+    traceDependencyWait,
+    trackDependency,
+} from '../../observability/tracing';
+import { HcpResponseCache } from '../../hcpGateway';
+
+vi.mock('../../logger', () => ({
+    Logger: {
+        info: vi.fn(),
+        warn: vi.fn(),
+        debug: vi.fn(),
+        error: vi.fn(),
+    },
+}));
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+describe('request tracing', () => {
+    it('attributes dependency time to the active trace', async () => {
+        await runWithTrace('corr-1', async (trace) => {
+            expect(getCorrelationId()).toBe('corr-1');
+
+            await trackDependency('db', 'select', () => sleep(5));
+            await trackDependency('hcp', 'GET /jobs', () => sleep(5));
+
+            expect(trace.dependencyCalls.db).toBe(1);
+            expect(trace.dependencyCalls.hcp).toBe(1);
+            expect(trace.dependencyMs.db).toBeGreaterThan(0);
+            expect(trace.dependencyMs.openai).toBe(0);
+        });
+    });
+
+    it('keeps concurrent traces separate', async () => {
+        const calls = await Promise.all(['a', 'b'].map(id =>
+            runWithTrace(id, async (trace) => {
+                await trackDependency('db', 'select', () => sleep(1));
+                return trace.dependencyCalls.db;
+            })
+        ));
+
+        expect(calls).toEqual([1, 1]);
+    });
+
+    it('still records and rethrows failed calls', async () => {
+        await runWithTrace('corr-2', async (trace) => {
+            await expect(trackDependency('openai', 'POST /v1/responses', async () => {
+                throw new Error('boom');
+            })).rejects.toThrow('boom');
+
+            expect(trace.dependencyCalls.openai).toBe(1);
+        });
+    });
+
+    it('floors app time at zero when dependency calls overlap', () => {
+        const breakdown = getTraceBreakdown({
+            correlationId: 'x',
+            startedAt: 0,
+            dependencyMs: { db: 80, hcp: 60, openai: 0 },
+            dependencyCalls: { db: 2, hcp: 1, openai: 0 },
+        }, 100);
+
+        expect(breakdown.app).toBe(0);
+        expect(breakdown.db).toBe(80);
+    });
+});
+
+describe('traceDependencyWait', () => {
+    it('charges a coalesced HCP read to the waiting trace as well as the loader', async () => {
+        const cache = new HcpResponseCache();
+        let release!: (value: unknown) => void;
+        const upstream = new Promise(resolve => { release = resolve; });
+        const loader = vi.fn(() => trackDependency('hcp', 'GET /jobs', () => upstream));
+
+        const first = runWithTrace('first', async trace => {
+            await cache.get('/jobs', {}, loader);
+            return trace;
+        });
+        const second = runWithTrace('second', async trace => {
+            await cache.get('/jobs', {}, loader);
+            return trace;
+        });
+        await sleep(5);
+        release({ jobs: [] });
+
+        const [loaderTrace, waiterTrace] = await Promise.all([first, second]);
+        expect(loader).toHaveBeenCalledTimes(1);
+        expect(loaderTrace.dependencyCalls.hcp).toBe(1);
+        expect(waiterTrace.dependencyCalls.hcp).toBe(1);
+        expect(waiterTrace.dependencyMs.hcp).toBeGreaterThan(0);
+    });
+
+    it('passes through outside a trace', async () => {
+        await expect(traceDependencyWait('hcp', Promise.resolve(42))).resolves.toBe(42);
+    });
+});
+
+describe('normalizeEndpoint', () => {
+    it('collapses id segments', () => {
+        expect(normalizeEndpoint('/customers/cus_8f2a1/addresses')).toBe('/customers/:id/addresses');
+        expect(normalizeEndpoint('/jobs')).toBe('/jobs');
+    });
+});
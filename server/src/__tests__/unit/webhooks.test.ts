@@ -0,0 +1,143 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { PgDialect } from 'drizzle-orm/pg-core';
+import type { SQL } from 'drizzle-orm';
+import { db } from '../../../db';
+import { WebhookProcessor } from '../../webhooks';
+import { getHCPSyncService } from '../../hcpSync';
+import { invalidateForWrite } from '../../hcpGateway';
+
+vi.mock('../../../db', () => ({
+    db: {
+        execute: vi.fn(),
+        insert: vi.fn(),
+        update: vi.fn(),
+        transaction: vi.fn(),
+    },
+}));
+
+vi.mock('../../heatmap', () => ({
+    heatMapService: { processJobCompletion: vi.fn() },
+}));
+
+vi.mock('../../hcpSync', () => {
+    const service = { applyJobEvent: vi.fn(), applyEstimateEvent: vi.fn() };
+    return { getHCPSyncService: () => service };
+});
+
+vi.mock('../../hcpGateway', () => ({
+    invalidateForWrite: vi.fn(),
+}));
+
+const dialect = new PgDialect();
+const render = (query: SQL) => dialect.sqlToQuery(query).sql.replace(/\s+/g, ' ');
+
+const jobEvent = (overrides: Record<string, unknown> = {}) => ({
+    id: 1,
+    eventType: 'job.updated',
+    payload: JSON.stringify({ id: 'job_1', updated_at: '2026-03-01T00:00:00Z' }),
+    retryCount: 0,
+    handledAt: null,
+    ...overrides,
+});
+
+describe('WebhookProcessor queue', () => {
+    let processor: any;
+    let updates: any[];
+    let analyticsRows: any[];
+    let txInserts: any[];
+
+    beforeEach(() => {
+        vi.clearAllMocks();
+        vi.spyOn(console, 'error').mockImplementation(() => undefined);
+        processor = new WebhookProcessor();
+        updates = [];
+        analyticsRows = [];
+        txInserts = [];
+
+        (db.update as any).mockImplementation(() => ({
+            set: (values: any) => {
+                updates.push(values);
+                return { where: async () => undefined };
+            },
+        }));
+        (db.insert as any).mockImplementation(() => ({
+            values: (rows: any) => ({
+                onConflictDoUpdate: async () => {
+                    analyticsRows.push(...rows);
+                },
+            }),
+        }));
+        (db.transaction as any).mockImplementation(async (fn: (tx: any) => Promise<void>) => fn({
+            insert: () => ({
+                values: (rows: any) => {
+                    txInserts.push(rows);
+                    return { onConflictDoUpdate: async () => undefined, then: (resolve: any) => resolve(undefined) };
+                },
+            }),
+            update: () => ({ set: () => ({ where: async () => undefined }) }),
+        }));
+    });
+
+    it('claims due and lease-expired events with SKIP LOCKED and counts reclaims as attempts', async () => {
+        (db.execute as any).mockResolvedValue({ rows: [] });
+
+        await processor.claimBatch();
+
+        const claim = render((db.execute as any).mock.calls[0][0]);
+        expect(claim).toContain("WHERE status IN ('pending', 'processing')");
+        expect(claim).toContain('FOR UPDATE SKIP LOCKED');
+        expect(claim).toContain('retry_count = coalesce(e.retry_count, 0) + CASE WHEN due.reclaimed THEN 1 ELSE 0 END');
+        expect(claim).toContain('e.handled_at AS "handledAt", due.reclaimed');
+    });
+
+    it('backs off failed events and dead-letters them once attempts run out', async () => {
+        await processor.processBatch([
+            jobEvent({ id: 1, payload: '{not json', retryCount: 1 }),
+            jobEvent({ id: 2, payload: '{not json', retryCount: 4 }),
+        ]);
+
+        expect(updates[0]).toMatchObject({ status: 'pending', retryCount: 2 });
+        expect(updates[0].nextAttemptAt.getTime()).toBeGreaterThan(Date.now());
+        expect(updates[1]).toMatchObject({ status: 'dead_letter', retryCount: 5, nextAttemptAt: null });
+        expect(analyticsRows).toEqual([expect.objectContaining({ eventCategory: 'job', failedEvents: 1, totalEvents: 1 })]);
+    });
+
+    it('dead-letters reclaimed events whose lost leases used up their attempts', async () => {
+        (db.execute as any)
+            .mockResolvedValueOnce({ rows: [jobEvent({ reclaimed: true, retryCount: 5 })] })
+            .mockResolvedValueOnce({ rows: [] });
+
+        await processor.runWorker();
+
+        expect(updates).toEqual([expect.objectContaining({ status: 'dead_letter', error: 'Processing lease expired' })]);
+        expect(getHCPSyncService().applyJobEvent).not.toHaveBeenCalled();
+        expect(db.transaction).not.toHaveBeenCalled();
+    });
+
+    it('runs side effects once and marks the event handled', async () => {
+        await processor.processBatch([jobEvent()]);
+
+        expect(getHCPSyncService().applyJobEvent).toHaveBeenCalledTimes(1);
+        expect(invalidateForWrite).toHaveBeenCalledWith('/jobs');
+        expect(updates[0].handledAt).toBeInstanceOf(Date);
+        expect(txInserts[0]).toEqual([expect.objectContaining({ eventId: 1, dataCategory: 'job.updated' })]);
+    });
+
+    it('does not re-run side effects when handled_at is set', async () => {
+        await processor.processBatch([jobEvent({ handledAt: new Date() })]);
+
+        expect(getHCPSyncService().applyJobEvent).not.toHaveBeenCalled();
+        expect(invalidateForWrite).not.toHaveBeenCalled();
+        expect(updates).toEqual([]);
+        expect(txInserts[0]).toEqual([expect.objectContaining({ eventId: 1 })]);
+    });
+
+    it('keeps failure analytics when the batch transaction rolls back', async () => {
+        (db.transaction as any).mockRejectedValue(new Error('connection reset'));
+
+        await processor.processBatch([jobEvent({ handledAt: new Date(), retryCount: 4 })]);
+
+        expect(updates).toEqual([expect.objectContaining({ status: 'dead_letter', error: 'connection reset' })]);
+        expect(analyticsRows).toEqual([expect.objectContaining({ eventCategory: 'job', failedEvents: 1 })]);
+    });
+});
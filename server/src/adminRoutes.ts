@@ -1,5 +1,6 @@
 import { Router } from 'express';
 import { z } from 'zod';
+import { unlink } from 'fs/promises';
 import { db } from '../db';
 import {
   adminUsers, adminSessions, adminTasks, adminDocuments,
@@ -816,7 +817,7 @@ router.get('/dashboard/stats', authenticate, requirePermission('dashboard.view')
     // Get recent webhook events count
     const [eventStats] = await db.select({
       totalEvents: sql<number>`COUNT(*)::int`,
-      failedEvents: sql<number>`COUNT(*) FILTER (WHERE ${webhookEvents.status} = 'failed')::int`
+      failedEvents: sql<number>`COUNT(*) FILTER (WHERE ${webhookEvents.status} IN ('failed', 'dead_letter'))::int`
     })
       .from(webhookEvents)
       .where(gte(webhookEvents.receivedAt, today));
@@ -1209,6 +1210,20 @@ router.get('/webhooks/events', authenticate, requirePermission('dashboard.view')
   }
 });
 
+// Re-queue dead-lettered webhook events (all, or the given ids)
+router.post('/webhooks/dead-letter/requeue', authenticate, requirePermission('settings.edit'), async (req, res) => {
+  try {
+    const ids = Array.isArray(req.body?.ids) ? req.body.ids.map((id: unknown) => parseInt(String(id))).filter(Number.isFinite) : undefined;
+    const { webhookProcessor } = await import('./webhooks');
+    const requeued = await webhookProcessor.requeueDeadLetters(ids);
+    await logActivity((req as any).user?.id, 'webhook_dead_letters_requeued', 'webhook', undefined, { ids, requeued }, req.ip);
+    res.json({ success: true, requeued });
+  } catch (error) {
+    console.error('Requeue webhook events error:', error);
+    res.status(500).json({ error: 'Failed to requeue webhook events' });
+  }
+});
+
 // ============================================
 // TASK MANAGEMENT
 // ============================================
@@ -2035,8 +2050,9 @@ router.post('/hcp/sync/trigger', authenticate, requirePermission('settings.edit'
   try {
     const { getHCPSyncService } = await import('./hcpSync');
     const syncService = getHCPSyncService();
-    const results = await syncService.syncAll();
-    await logActivity((req as any).user?.id, 'hcp_sync_triggered', 'sync', undefined, { results }, req.ip);
+    const mode = req.body?.mode === 'incremental' ? 'incremental' : 'full';
+    const results = await syncService.syncAll(mode);
+    await logActivity((req as any).user?.id, 'hcp_sync_triggered', 'sync', undefined, { mode, results }, req.ip);
     res.json({ success: true, results });
   } catch (error) {
     console.error('HCP sync trigger error:', error);
@@ -2044,6 +2060,26 @@ router.post('/hcp/sync/trigger', authenticate, requirePermission('settings.edit'
   }
 });
 
+// Recompute daily stats rollup for a date range
+router.post('/hcp/sync/daily-stats', authenticate, requirePermission('settings.edit'), async (req, res) => {
+  try {
+    const { startDate, endDate } = req.body || {};
+    const start = new Date(startDate);
+    const end = endDate ? new Date(endDate) : new Date();
+    if (!startDate || isNaN(start.getTime()) || isNaN(end.getTime()) || start > end) {
+      return res.status(400).json({ error: 'Valid startDate (and optional endDate) required' });
+    }
+
+    const { getHCPSyncService } = await import('./hcpSync');
+    const result = await getHCPSyncService().recomputeDailyStats(start, end);
+    await logActivity((req as any).user?.id, 'hcp_daily_stats_recomputed', 'sync', undefined, { startDate, endDate, result }, req.ip);
+    res.json({ success: result.status === 'completed', result });
+  } catch (error) {
+    console.error('HCP daily stats recompute error:', error);
+    res.status(500).json({ error: 'Failed to recompute daily stats' });
+  }
+});
+
 // Get cached jobs with filters
 router.get('/hcp/jobs', authenticate, requirePermission('dashboard.view'), async (req, res) => {
   try {
@@ -2320,6 +2356,53 @@ router.get('/hcp/estimates/pipeline', authenticate, requirePermission('dashboard
   }
 });
 
+// ==============================================
+// DIAGNOSTICS (on-demand profiling)
+// ==============================================
+
+// Capture a CPU profile for durationMs (default 10s, max 60s) as a .cpuprofile download
+router.post('/diagnostics/cpu-profile', authenticate, requirePermission('settings.edit'), async (req, res) => {
+  try {
+    const { captureCpuProfile, isProfilerBusy } = await import('./observability/profiler');
+    if (isProfilerBusy()) {
+      return res.status(409).json({ error: 'A profile capture is already in progress' });
+    }
+
+    const durationMs = parseInt(String(req.body?.durationMs ?? 10000));
+    if (!Number.isFinite(durationMs)) {
+      return res.status(400).json({ error: 'durationMs must be a number' });
+    }
+
+    await logActivity((req as any).user?.id, 'cpu_profile_captured', 'diagnostics', undefined, { durationMs }, req.ip);
+    const profile = await captureCpuProfile(durationMs);
+    res.attachment(`cpu-${Date.now()}.cpuprofile`);
+    res.type('application/json').send(JSON.stringify(profile));
+  } catch (error) {
+    console.error('CPU profile error:', error);
+    res.status(500).json({ error: 'Failed to capture CPU profile' });
+  }
+});
+
+// Capture a V8 heap snapshot as a .heapsnapshot download (pauses the process while writing)
+router.post('/diagnostics/heap-snapshot', authenticate, requirePermission('settings.edit'), async (req, res) => {
+  try {
+    const { captureHeapSnapshot, isProfilerBusy } = await import('./observability/profiler');
+    if (isProfilerBusy()) {
+      return res.status(409).json({ error: 'A profile capture is already in progress' });
+    }
+
+    await logActivity((req as any).user?.id, 'heap_snapshot_captured', 'diagnostics', undefined, {}, req.ip);
+    const file = captureHeapSnapshot();
+    res.download(file, (error) => {
+      if (error) console.error('Heap snapshot download error:', error);
+      unlink(file).catch(() => undefined);
+    });
+  } catch (error) {
+    console.error('Heap snapshot error:', error);
+    res.status(500).json({ error: 'Failed to capture heap snapshot' });
+  }
+});
+
 // ==============================================
 // COMPETITOR TRACKING ROUTES
 // ==============================================
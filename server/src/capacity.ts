@@ -1,4 +1,5 @@
 import { HousecallProClient } from './housecall';
+import { onAvailabilityWrite } from './hcpGateway';
 import { loadConfig } from './config';
 import { Logger } from './logger';
 import {
@@ -42,13 +43,73 @@ export interface CapacityResponse {
   unique_express_windows?: ExpressWindow[];
 }
 
+/** How long a computed capacity snapshot stays fresh */
+export const CAPACITY_TTL_MS = 5 * 60 * 1000;
+
+/**
+ * Zip-independent capacity for one day, plus the booking windows it was
+ * computed from. Express eligibility is applied per request on top of this.
+ */
+export interface CapacitySnapshot {
+  /** Cache key for the Eastern calendar day, e.g. `capacity:2025-08-27` */
+  key: string;
+  /** Date (YYYY-MM-DD) the booking windows were requested for */
+  bookingDate: string;
+  capacity: CapacityResponse;
+  bookingWindows: any[];
+  computedAt: number;
+  expiresAt: number;
+}
+
+interface IndexedWindow {
+  window: any;
+  /** Position in the HCP response, used to keep display order stable */
+  order: number;
+  start: Date;
+  end: Date;
+  /** Eastern "HH:MM - HH:MM" label, only set for available windows */
+  label?: string;
+}
+
+interface TechWindows {
+  available: IndexedWindow[];
+  unavailable: IndexedWindow[];
+}
+
+/**
+ * Booking windows for one day, parsed once and bucketed so per-tech and
+ * per-service-window lookups don't rescan the whole HCP response.
+ */
+interface BookingWindowIndex {
+  dateStr: string;
+  /** Keyed by employee id; ALL_TECHS holds windows without employee_ids */
+  byTech: Map<string, TechWindows>;
+  /** Available windows keyed by UTC start hour */
+  availableByHourUTC: Map<number, IndexedWindow[]>;
+}
+
+const ALL_TECHS = '*';
+
+const estTimeFormat = new Intl.DateTimeFormat('en-US', {
+  timeZone: 'America/New_York',
+  hour: '2-digit',
+  minute: '2-digit',
+  hour12: false
+});
+
 export class CapacityCalculator {
   private static instance: CapacityCalculator;
   private hcpClient: HousecallProClient;
-  private cache: Map<string, { data: CapacityResponse; expires: number }> = new Map();
+  private cache: Map<string, CapacitySnapshot> = new Map();
+  private inFlight: Map<string, Promise<CapacitySnapshot>> = new Map();
+  // Bumped by invalidate() so builds started before a write aren't cached
+  private generation = 0;
+  // Snapshots built before the last availability write; still served until replaced
+  private stale: Set<string> = new Set();
 
   private constructor() {
     this.hcpClient = HousecallProClient.getInstance();
+    onAvailabilityWrite(() => this.invalidate());
   }
 
   static getInstance(): CapacityCalculator {
@@ -59,6 +120,102 @@ export class CapacityCalculator {
   }
 
   async calculateCapacity(date: Date = new Date(), userZip?: string): Promise<CapacityResponse> {
+    const snapshot = await this.getSnapshot(date);
+    return this.withExpressEligibility(snapshot.capacity, userZip);
+  }
+
+  /**
+   * Return the capacity snapshot for `date`, computing it if missing or
+   * expired. Concurrent callers share a single computation; `refresh`
+   * recomputes even when the cached snapshot is still fresh. A snapshot
+   * made stale by a write is still returned while its rebuild runs.
+   */
+  async getSnapshot(date: Date = new Date(), options: { refresh?: boolean } = {}): Promise<CapacitySnapshot> {
+    const cacheKey = this.getCacheKey(date);
+    const cached = this.cache.get(cacheKey);
+
+    // Cache for 5 minutes to reduce API costs
+    if (!options.refresh && cached && cached.expiresAt > Date.now()) {
+      if (this.stale.has(cacheKey)) {
+        this.startBuild(cacheKey, date).catch(error => {
+          Logger.error('[Capacity] Failed to rebuild stale snapshot', { cacheKey, error: (error as Error).message });
+        });
+      }
+      Logger.debug('Capacity cache hit', { date: date.toISOString(), cacheHit: true });
+      return cached;
+    }
+
+    return this.startBuild(cacheKey, date);
+  }
+
+  /**
+   * Mark every snapshot stale after a write that changes availability (a
+   * booking, a job webhook). Stale snapshots keep being served until a
+   * rebuild, started by the next read or the background refresh, replaces
+   * them, so reads never wait on HCP and a failed rebuild leaves the
+   * previous snapshot in place.
+   */
+  invalidate(): void {
+    this.generation++;
+    for (const key of this.cache.keys()) {
+      this.stale.add(key);
+    }
+    // Builds started before the write can't be cached; don't let reads join them
+    this.inFlight.clear();
+  }
+
+  /**
+   * Whether the snapshot for `date` is missing, stale or expires within `aheadMs`.
+   */
+  needsRefresh(date: Date, aheadMs: number = 0): boolean {
+    const cacheKey = this.getCacheKey(date);
+    const cached = this.cache.get(cacheKey);
+    return !cached || this.stale.has(cacheKey) || cached.expiresAt - aheadMs <= Date.now();
+  }
+
+  private startBuild(cacheKey: string, date: Date): Promise<CapacitySnapshot> {
+    const pending = this.inFlight.get(cacheKey);
+    if (pending) {
+      return pending;
+    }
+
+    const generation = this.generation;
+    const build = this.buildSnapshot(cacheKey, date)
+      .then(snapshot => {
+        if (generation === this.generation) {
+          this.pruneExpired();
+          this.cache.set(cacheKey, snapshot);
+          this.stale.delete(cacheKey);
+        }
+        return snapshot;
+      })
+      .finally(() => {
+        if (this.inFlight.get(cacheKey) === build) {
+          this.inFlight.delete(cacheKey);
+        }
+      });
+    this.inFlight.set(cacheKey, build);
+    return build;
+  }
+
+  /**
+   * Apply ZIP-based express eligibility to a snapshot's capacity.
+   */
+  withExpressEligibility(capacity: CapacityResponse, userZip?: string): CapacityResponse {
+    const config = loadConfig();
+
+    let expressEligible = true;
+    if (userZip && config.express_zones) {
+      const tier1Eligible = config.express_zones.tier1?.includes(userZip) || false;
+      const tier2Eligible = (config.express_zones.tier2?.includes(userZip) || false) && capacity.overall.score >= 0.5;
+      const tier3Eligible = (config.express_zones.tier3?.includes(userZip) || false) && capacity.overall.score >= 0.7;
+      expressEligible = tier1Eligible || tier2Eligible || tier3Eligible;
+    }
+
+    return { ...capacity, express_eligible: expressEligible };
+  }
+
+  private getCacheKey(date: Date): string {
     // Use EST/EDT date for cache key
     const estDateStr = date.toLocaleDateString('en-US', {
       timeZone: 'America/New_York',
@@ -67,27 +224,33 @@ export class CapacityCalculator {
       day: '2-digit'
     });
     const [month, day, year] = estDateStr.split('/');
-    const cacheKey = `capacity:${year}-${month.padStart(2, '0')}-${day.padStart(2, '0')}`;
-    const cached = this.cache.get(cacheKey);
-    
-    // Cache for 5 minutes to reduce API costs
-    if (cached && cached.expires > Date.now()) {
-      Logger.debug('Capacity cache hit', { date: date.toISOString(), cacheHit: true });
-      return cached.data;
+    return `capacity:${year}-${month.padStart(2, '0')}-${day.padStart(2, '0')}`;
+  }
+
+  private pruneExpired(): void {
+    const now = Date.now();
+    for (const [key, snapshot] of this.cache) {
+      if (snapshot.expiresAt <= now) {
+        this.cache.delete(key);
+        this.stale.delete(key);
+      }
     }
+  }
 
+  private async buildSnapshot(cacheKey: string, date: Date): Promise<CapacitySnapshot> {
     Logger.info('Calculating capacity', { date: date.toISOString() });
 
     const config = loadConfig();
     const startOfDay = getStartOfDayInTZ(date);
     const endOfDay = getEndOfDayInTZ(date);
     const now = getNowInTZ();
+    const todayStr = date.toISOString().split('T')[0];
 
     // Fetch data from Housecall Pro - ONLY use estimates (jobs API is failing with 400)
     // Use Promise.allSettled to handle individual failures gracefully
     const results = await Promise.allSettled([
       this.hcpClient.getEmployees(),
-      this.hcpClient.getBookingWindows(date.toISOString().split('T')[0]),
+      this.hcpClient.fetchBookingWindows(todayStr),
       this.hcpClient.getEstimates({
         scheduled_start_min: startOfDay.toISOString(),
         scheduled_start_max: endOfDay.toISOString(),
@@ -97,72 +260,47 @@ export class CapacityCalculator {
 
     // Extract results with fallback defaults for failed requests
     const employees = results[0].status === 'fulfilled' ? results[0].value : [];
-    const bookingWindows = results[1].status === 'fulfilled' ? results[1].value : [];
+    // Without booking windows the snapshot would report no availability;
+    // fail the build so callers keep the previous snapshot instead
+    if (results[1].status === 'rejected') {
+      Logger.error('[Capacity] Failed to fetch booking windows:', { error: results[1].reason?.message });
+      throw results[1].reason;
+    }
+    const bookingWindows = results[1].value;
     const estimates = results[2].status === 'fulfilled' ? results[2].value : [];
 
     // Log any failures for debugging
     if (results[0].status === 'rejected') {
       Logger.error('[Capacity] Failed to fetch employees:', { error: results[0].reason?.message });
     }
-    if (results[1].status === 'rejected') {
-      Logger.error('[Capacity] Failed to fetch booking windows:', { error: results[1].reason?.message });
-    }
     if (results[2].status === 'rejected') {
       Logger.error('[Capacity] Failed to fetch estimates:', { error: results[2].reason?.message });
     }
-    
-    const jobs: any[] = []; // Empty jobs array since jobs API is broken
 
-    // Log estimates data for visibility (jobs API is broken, but that's fine)
+    // The booking windows API already factors in ALL scheduled work (jobs + estimates)
+    // so estimates are only logged for visibility
     Logger.debug('Using HCP booking windows as authoritative availability source');
     Logger.debug(`Found ${estimates.length} estimates for debugging purposes`);
-    
-    // The booking windows API already factors in ALL scheduled work (jobs + estimates)
-    // so we don't need to manually calculate from individual items
-    const relevantJobs = estimates; // Keep for legacy compatibility
-    
+
     // Use HCP booking windows as-is (they already reflect all scheduled work)
-    Logger.debug('Using authoritative HCP booking windows - no manual override needed');
     const realBookingWindows = bookingWindows;
-    
-    // Debug: Check if we got real windows
     Logger.debug(`[Capacity] Booking windows received: ${realBookingWindows.length}`);
-    
-    // CRITICAL FIX: The API returns windows with ISO timestamps like "2025-08-27T12:00:00.000Z"
-    // We need to check if the date part matches today, not if date is missing
-    const todayDateStr = date.toISOString().split('T')[0];
-    const availableToday = realBookingWindows.filter(w => {
-      // Check if this window is for today
-      const windowDateStr = w.start_time ? w.start_time.split('T')[0] : (w.date ? w.date.split('T')[0] : '');
-      const isToday = windowDateStr === todayDateStr;
-      const isAvailable = w.available === true;
-      
-      if (isToday && !isAvailable) {
-        Logger.debug(`[Capacity] Window for today but NOT available: ${w.start_time} - ${w.end_time}`);
-      }
-      
-      return isToday && isAvailable;
-    });
-    Logger.debug(`[Capacity] REAL available windows today: ${availableToday.length}`);
+
+    // Parse every window once; everything below reads from the index
+    const index = this.indexBookingWindows(realBookingWindows, todayStr);
 
     // Map employees to our tech names
     const techEmployeeMap = this.mapEmployeesToTechs(employees, config);
-    
+
     // DEBUG: Log employee mapping
     Logger.debug(`[Capacity] Employee mapping:`);
     for (const [techName, employeeId] of techEmployeeMap) {
       const employee = employees.find(e => e.id === employeeId);
       Logger.debug(`[Capacity]   ${techName} -> ${employeeId} (${employee?.first_name} ${employee?.last_name})`);
     }
-    
+
     // Calculate per-tech capacity with real availability
-    const techCapacities = this.calculateTechCapacities(
-      techEmployeeMap,
-      realBookingWindows,
-      jobs,
-      now,
-      date
-    );
+    const techCapacities = this.calculateTechCapacities(techEmployeeMap, index, now);
 
     // Calculate overall capacity and state with real availability
     const overall = this.calculateOverallCapacity(techCapacities, realBookingWindows, now);
@@ -170,61 +308,25 @@ export class CapacityCalculator {
     // Get UI copy based on state
     const uiCopy = config.ui_copy[overall.state] || config.ui_copy.NEXT_DAY;
 
-    // Calculate express eligibility based on user ZIP
-    let expressEligible = true;
-    if (userZip && config.express_zones) {
-      const tier1Eligible = config.express_zones.tier1?.includes(userZip) || false;
-      const tier2Eligible = (config.express_zones.tier2?.includes(userZip) || false) && overall.score >= 0.5;
-      const tier3Eligible = (config.express_zones.tier3?.includes(userZip) || false) && overall.score >= 0.7;
-      expressEligible = tier1Eligible || tier2Eligible || tier3Eligible;
-    }
-
     // Get available express windows for TODAY only
-    const todayStr = date.toISOString().split('T')[0];
     Logger.debug(`[Express] Starting express windows filtering for ${todayStr}. RealBookingWindows count: ${realBookingWindows.length}`);
-    
+
     // Define 3-hour service windows in EST (converted to UTC for comparison)
     // Morning: 8-11 AM EST = 13:00-16:00 UTC
-    // Midday: 11 AM-2 PM EST = 16:00-19:00 UTC  
+    // Midday: 11 AM-2 PM EST = 16:00-19:00 UTC
     // Afternoon: 2-5 PM EST = 19:00-22:00 UTC
     const serviceWindows = [
       { label: 'Morning', startHourUTC: 13, endHourUTC: 16, startEST: '08:00', endEST: '11:00' },
       { label: 'Midday', startHourUTC: 16, endHourUTC: 19, startEST: '11:00', endEST: '14:00' },
       { label: 'Afternoon', startHourUTC: 19, endHourUTC: 22, startEST: '14:00', endEST: '17:00' }
     ];
-    
+
     // Track which service windows have available slots
     const availableServiceWindows: string[] = [];
-    
+
     for (const serviceWindow of serviceWindows) {
       // Check if any 30-min slot falls within this service window
-      const hasAvailableSlot = realBookingWindows.some(window => {
-        // Check if window is for the target date
-        const windowDate = window.start_time ? window.start_time.split('T')[0] : 
-                          (window.date ? window.date.split('T')[0] : todayStr);
-        if (windowDate !== todayStr) return false;
-        
-        // Parse window time
-        let windowStart: Date;
-        if (window.start_time.includes('T') && window.start_time.includes('Z')) {
-          windowStart = new Date(window.start_time);
-        } else {
-          windowStart = this.parseWindowTime(window.start_time, new Date(window.date || date));
-        }
-        
-        const windowHourUTC = windowStart.getUTCHours();
-        
-        // Check if this slot falls within the service window
-        const isInServiceWindow = windowHourUTC >= serviceWindow.startHourUTC && windowHourUTC < serviceWindow.endHourUTC;
-        
-        // Filter out expired windows - must be bookable 30 minutes before start
-        const bookingCutoff = new Date(windowStart.getTime() - 30 * 60000);
-        const isBookable = now < bookingCutoff;
-        
-        return window.available && isBookable && isInServiceWindow;
-      });
-      
-      if (hasAvailableSlot) {
+      if (this.hasBookableSlot(index, serviceWindow.startHourUTC, serviceWindow.endHourUTC, now)) {
         // Add the consolidated 3-hour window as a time string
         availableServiceWindows.push(`${serviceWindow.startEST} - ${serviceWindow.endEST}`);
         Logger.debug(`[Express] Service window ${serviceWindow.label} (${serviceWindow.startEST} - ${serviceWindow.endEST}) has available slots`);
@@ -241,25 +343,100 @@ export class CapacityCalculator {
     Logger.debug(`[Express] Unique express windows count: ${uniqueExpressWindows.length}`, uniqueExpressWindows);
 
     // Calculate expiration time (5 minutes to reduce API costs)
-    const expiresAt = new Date(Date.now() + 300000);
-
-    const response: CapacityResponse = {
-      overall,
-      tech: techCapacities,
-      ui_copy: uiCopy,
-      expires_at: expiresAt.toISOString(),
-      express_eligible: expressEligible,
-      express_windows: expressWindows,
-      unique_express_windows: uniqueExpressWindows,
+    const computedAt = Date.now();
+    const expiresAt = computedAt + CAPACITY_TTL_MS;
+
+    return {
+      key: cacheKey,
+      bookingDate: todayStr,
+      capacity: {
+        overall,
+        tech: techCapacities,
+        ui_copy: uiCopy,
+        expires_at: new Date(expiresAt).toISOString(),
+        express_windows: expressWindows,
+        unique_express_windows: uniqueExpressWindows,
+      },
+      bookingWindows: realBookingWindows,
+      computedAt,
+      expiresAt,
     };
+  }
+
+  /**
+   * Parse the day's booking windows once and bucket them by tech and by
+   * UTC start hour.
+   */
+  private indexBookingWindows(bookingWindows: any[], dateStr: string): BookingWindowIndex {
+    const index: BookingWindowIndex = {
+      dateStr,
+      byTech: new Map(),
+      availableByHourUTC: new Map(),
+    };
+
+    const bucketFor = (techKey: string): TechWindows => {
+      let bucket = index.byTech.get(techKey);
+      if (!bucket) {
+        bucket = { available: [], unavailable: [] };
+        index.byTech.set(techKey, bucket);
+      }
+      return bucket;
+    };
+
+    bookingWindows.forEach((window, order) => {
+      if (!window.start_time || !window.end_time) return;
+
+      // The API returns ISO timestamps like "2025-08-27T12:00:00.000Z"; keep only the target day
+      if (window.start_time.split('T')[0] !== dateStr) return;
+
+      const baseDate = new Date(window.date || dateStr);
+      const entry: IndexedWindow = {
+        window,
+        order,
+        start: this.parseWindowTime(window.start_time, baseDate),
+        end: this.parseWindowTime(window.end_time, baseDate),
+      };
+
+      if (window.available === true) {
+        // Convert UTC timestamps to EST time strings for display; mock data is shown as-is
+        entry.label = window.start_time.includes('T') && window.start_time.includes('Z')
+          ? `${estTimeFormat.format(entry.start)} - ${estTimeFormat.format(entry.end)}`
+          : `${window.start_time} - ${window.end_time}`;
+
+        const hour = entry.start.getUTCHours();
+        const hourBucket = index.availableByHourUTC.get(hour);
+        if (hourBucket) {
+          hourBucket.push(entry);
+        } else {
+          index.availableByHourUTC.set(hour, [entry]);
+        }
+      } else if (window.available !== false) {
+        return;
+      }
 
-    // Cache for 5 minutes to reduce API costs significantly
-    this.cache.set(cacheKey, {
-      data: response,
-      expires: Date.now() + 300000,
+      const techKeys: string[] = window.employee_ids ? Array.from(new Set<string>(window.employee_ids)) : [ALL_TECHS];
+      for (const techKey of techKeys) {
+        const bucket = bucketFor(techKey);
+        (window.available ? bucket.available : bucket.unavailable).push(entry);
+      }
     });
 
-    return response;
+    Logger.debug(`[Capacity] REAL available windows today: ${bucketsTotal(index.availableByHourUTC)}`);
+    return index;
+  }
+
+  /**
+   * Whether any available window starting in [startHourUTC, endHourUTC) can
+   * still be booked (30 minutes before its start).
+   */
+  private hasBookableSlot(index: BookingWindowIndex, startHourUTC: number, endHourUTC: number, now: Date): boolean {
+    for (let hour = startHourUTC; hour < endHourUTC; hour++) {
+      const slots = index.availableByHourUTC.get(hour);
+      if (slots?.some(slot => now.getTime() < slot.start.getTime() - 30 * 60000)) {
+        return true;
+      }
+    }
+    return false;
   }
 
   private mapEmployeesToTechs(employees: any[], config: any): Map<string, string> {
@@ -290,93 +467,48 @@ export class CapacityCalculator {
 
   private calculateTechCapacities(
     techEmployeeMap: Map<string, string>,
-    bookingWindows: any[],
-    jobs: any[],
-    now: Date,
-    targetDate: Date
+    index: BookingWindowIndex,
+    now: Date
   ): any {
     const capacities: any = {};
-    const todayStr = targetDate.toISOString().split('T')[0];
+    const todayStr = index.dateStr;
+    const shared = index.byTech.get(ALL_TECHS);
+
+    // Windows without employee_ids apply to every tech; merge them back in HCP order
+    const windowsFor = (employeeId: string, kind: keyof TechWindows): IndexedWindow[] => {
+      const own = index.byTech.get(employeeId)?.[kind] || [];
+      const all = shared?.[kind] || [];
+      if (own.length === 0) return all;
+      if (all.length === 0) return own;
+      return [...own, ...all].sort((a, b) => a.order - b.order);
+    };
 
-    const techEntries = Array.from(techEmployeeMap.entries());
-    
-    // DEBUG: Check the actual booking windows we got from API
-    const availableWindowsToday = bookingWindows.filter(w => {
-      const windowDateStr = w.start_time ? w.start_time.split('T')[0] : '';
-      return windowDateStr === todayStr && w.available === true;
-    });
-    Logger.debug(`[Capacity] calculateTechCapacities: ${availableWindowsToday.length} available windows for ${todayStr}`);
-    
-    for (const [techName, employeeId] of techEntries) {
+    for (const [techName, employeeId] of techEmployeeMap) {
       // Get windows for this tech - TODAY ONLY
-      const techWindows = bookingWindows.filter(window => {
-        // Check if window is for today
-        const windowDateStr = window.start_time ? window.start_time.split('T')[0] : 
-                             (window.date ? window.date.split('T')[0] : todayStr);
-        const isToday = windowDateStr === todayStr;
-        const isAvailable = window.available === true;
-        const isTechAssigned = !window.employee_ids || window.employee_ids.includes(employeeId);
-        
-        return isToday && isAvailable && isTechAssigned;
-      });
-      
+      const techWindows = windowsFor(employeeId, 'available');
+
       // Debug: Log if no windows found
       if (techWindows.length === 0) {
         Logger.debug(`[Capacity] No available windows for ${techName} on ${todayStr}`);
       }
 
       // Get open windows (not yet passed)
-      const openWindows = techWindows.filter(window => {
-        const windowEnd = this.parseWindowTime(window.end_time, new Date(window.date));
-        return windowEnd > now;
-      }).map(window => {
-        // Convert UTC timestamps to EST time strings for display
-        if (window.start_time.includes('T') && window.start_time.includes('Z')) {
-          const startDate = new Date(window.start_time);
-          const endDate = new Date(window.end_time);
-          const startTimeEST = startDate.toLocaleTimeString('en-US', { 
-            timeZone: 'America/New_York', 
-            hour: '2-digit', 
-            minute: '2-digit',
-            hour12: false 
-          });
-          const endTimeEST = endDate.toLocaleTimeString('en-US', { 
-            timeZone: 'America/New_York', 
-            hour: '2-digit', 
-            minute: '2-digit',
-            hour12: false 
-          });
-          return `${startTimeEST} - ${endTimeEST}`;
-        } else {
-          // Simple time strings from mock data
-          return `${window.start_time} - ${window.end_time}`;
-        }
-      });
+      const openWindows = techWindows
+        .filter(slot => slot.end > now)
+        .map(slot => slot.label as string);
 
       // Calculate total bookable minutes for today
-      const totalBookableMinutes = techWindows.reduce((sum, window) => {
-        const start = this.parseWindowTime(window.start_time, new Date(window.date));
-        const end = this.parseWindowTime(window.end_time, new Date(window.date));
-        return sum + (end.getTime() - start.getTime()) / 60000;
-      }, 0);
+      const totalBookableMinutes = techWindows.reduce(
+        (sum, slot) => sum + (slot.end.getTime() - slot.start.getTime()) / 60000,
+        0
+      );
 
       // Calculate booked minutes - use booking windows since they already reflect scheduled work
       // Since booking windows are authoritative, unavailable windows = booked time
-      const unavailableWindows = bookingWindows.filter(window => {
-        const windowDateStr = window.start_time ? window.start_time.split('T')[0] : 
-                             (window.date ? window.date.split('T')[0] : todayStr);
-        const isToday = windowDateStr === todayStr;
-        const isUnavailable = window.available === false;
-        const isTechAssigned = !window.employee_ids || window.employee_ids.includes(employeeId);
-        
-        return isToday && isUnavailable && isTechAssigned;
-      });
-
-      const bookedMinutes = unavailableWindows.reduce((sum, window) => {
-        const start = this.parseWindowTime(window.start_time, new Date(window.date || todayStr));
-        const end = this.parseWindowTime(window.end_time, new Date(window.date || todayStr));
-        return sum + (end.getTime() - start.getTime()) / 60000;
-      }, 0);
+      const bookedMinutes = windowsFor(employeeId, 'unavailable').reduce(
+        (sum, slot) => sum + (slot.end.getTime() - slot.start.getTime()) / 60000,
+        0
+      );
 
       // Calculate capacity score
       const score = totalBookableMinutes > 0 
@@ -905,8 +1037,10 @@ export class CapacityCalculator {
     return correctedWindows;
   }
 
-  async getTodayCapacity(userZip?: string): Promise<CapacityResponse> {
-    // Get today's date in EST/EDT timezone
+  /**
+   * Noon on today's Eastern calendar date, the reference time for "today" capacity.
+   */
+  getTodayDate(): Date {
     const now = new Date();
     const estDateStr = now.toLocaleDateString('en-US', {
       timeZone: 'America/New_York',
@@ -915,12 +1049,21 @@ export class CapacityCalculator {
       day: '2-digit'
     });
     const [month, day, year] = estDateStr.split('/');
-    const todayEST = new Date(`${year}-${month.padStart(2, '0')}-${day.padStart(2, '0')}T12:00:00`);
-    
-    return this.calculateCapacity(todayEST, userZip);
+    return new Date(`${year}-${month.padStart(2, '0')}-${day.padStart(2, '0')}T12:00:00`);
+  }
+
+  async getTodayCapacity(userZip?: string): Promise<CapacityResponse> {
+    // Get today's date in EST/EDT timezone
+    return this.calculateCapacity(this.getTodayDate(), userZip);
   }
 
   async getTomorrowCapacity(userZip?: string): Promise<CapacityResponse> {
     return this.calculateCapacity(getTomorrowInTZ(), userZip);
   }
 }
+
+function bucketsTotal(buckets: Map<number, IndexedWindow[]>): number {
+  let total = 0;
+  for (const bucket of buckets.values()) total += bucket.length;
+  return total;
+}
@@ -0,0 +1,166 @@
+/**
+ * Capacity snapshot service
+ *
+ * Keeps today's and tomorrow's capacity precomputed so the capacity endpoints
+ * and the MCP availability tools read from memory instead of calling HCP on
+ * the request path:
+ * - Background refresh shortly before each snapshot expires
+ * - Responses rendered once per snapshot and ZIP eligibility, with a strong ETag
+ * - The snapshot's booking windows are shared with search_availability
+ */
+
+import { createHash } from 'crypto';
+import { CapacityCalculator, type CapacityResponse, type CapacitySnapshot } from './capacity';
+import { onAvailabilityWrite } from './hcpGateway';
+import { Logger } from './logger';
+import { getTomorrowInTZ } from './util/time';
+
+export type CapacityDay = 'today' | 'tomorrow';
+
+export interface RenderedCapacity {
+  capacity: CapacityResponse;
+  /** Serialized JSON body, so handlers don't re-stringify per request */
+  body: string;
+  etag: string;
+}
+
+const CAPACITY_DAYS: CapacityDay[] = ['today', 'tomorrow'];
+
+// Refresh when a snapshot has less than this long left, checked every REFRESH_CHECK_MS
+const REFRESH_AHEAD_MS = 90 * 1000;
+const REFRESH_CHECK_MS = 30 * 1000;
+
+export class CapacitySnapshotService {
+  private static instance: CapacitySnapshotService;
+  private calculator: CapacityCalculator;
+  private refreshTimer: NodeJS.Timeout | null = null;
+  private refreshing = false;
+  private refreshRequested = false;
+  // Keyed by snapshot object so renders are dropped along with the snapshot
+  private rendered: WeakMap<CapacitySnapshot, Map<boolean, RenderedCapacity>> = new WeakMap();
+
+  private constructor() {
+    this.calculator = CapacityCalculator.getInstance();
+    // The calculator registers first, so its snapshots are already marked
+    // stale when this rebuilds them
+    onAvailabilityWrite(() => {
+      if (this.refreshTimer) void this.refreshDue();
+    });
+  }
+
+  static getInstance(): CapacitySnapshotService {
+    if (!this.instance) {
+      this.instance = new CapacitySnapshotService();
+    }
+    return this.instance;
+  }
+
+  /**
+   * Compute today's and tomorrow's snapshots now and keep them fresh in the
+   * background.
+   */
+  start(): void {
+    if (this.refreshTimer) return;
+
+    void this.refreshDue();
+    this.refreshTimer = setInterval(() => void this.refreshDue(), REFRESH_CHECK_MS);
+    this.refreshTimer.unref?.();
+    Logger.info('[CapacitySnapshot] Background refresh started', { checkIntervalMs: REFRESH_CHECK_MS });
+  }
+
+  stop(): void {
+    if (this.refreshTimer) {
+      clearInterval(this.refreshTimer);
+      this.refreshTimer = null;
+    }
+  }
+
+  /**
+   * Capacity for `day` with express eligibility for `userZip` applied.
+   * Only computes inline if the background refresh hasn't produced a
+   * snapshot yet (e.g. the first request after boot).
+   */
+  async getCapacity(day: CapacityDay, userZip?: string): Promise<RenderedCapacity> {
+    const snapshot = await this.calculator.getSnapshot(this.dateFor(day));
+    const capacity = this.calculator.withExpressEligibility(snapshot.capacity, userZip);
+    const eligible = capacity.express_eligible === true;
+
+    let variants = this.rendered.get(snapshot);
+    if (!variants) {
+      variants = new Map();
+      this.rendered.set(snapshot, variants);
+    }
+
+    let rendered = variants.get(eligible);
+    if (!rendered) {
+      const body = JSON.stringify(capacity);
+      const etag = `"${createHash('sha1').update(body).digest('base64url')}"`;
+      rendered = { capacity, body, etag };
+      variants.set(eligible, rendered);
+    }
+    return rendered;
+  }
+
+  /**
+   * Booking windows for `days` days starting at `startDate` (YYYY-MM-DD),
+   * or null unless every day in the range has a today/tomorrow snapshot.
+   */
+  async getBookingWindows(startDate: string, days: number = 1): Promise<any[] | null> {
+    const covered = new Map<string, Date>();
+    for (const day of CAPACITY_DAYS) {
+      const dayDate = this.dateFor(day);
+      covered.set(dayDate.toISOString().split('T')[0], dayDate);
+    }
+
+    const dates: Date[] = [];
+    const cursor = new Date(`${startDate}T00:00:00Z`);
+    for (let i = 0; i < days; i++) {
+      const dayDate = covered.get(cursor.toISOString().split('T')[0]);
+      if (!dayDate) return null;
+      dates.push(dayDate);
+      cursor.setUTCDate(cursor.getUTCDate() + 1);
+    }
+
+    const snapshots = await Promise.all(dates.map(date => this.calculator.getSnapshot(date)));
+    return snapshots.flatMap(snapshot => snapshot.bookingWindows);
+  }
+
+  private dateFor(day: CapacityDay): Date {
+    return day === 'today' ? this.calculator.getTodayDate() : getTomorrowInTZ();
+  }
+
+  private async refreshDue(): Promise<void> {
+    if (this.refreshing) {
+      // A write landed mid-refresh; run again once this pass finishes
+      this.refreshRequested = true;
+      return;
+    }
+    this.refreshing = true;
+    this.refreshRequested = false;
+
+    try {
+      for (const day of CAPACITY_DAYS) {
+        const date = this.dateFor(day);
+        if (!this.calculator.needsRefresh(date, REFRESH_AHEAD_MS)) continue;
+
+        try {
+          const startTime = Date.now();
+          await this.calculator.getSnapshot(date, { refresh: true });
+          Logger.debug('[CapacitySnapshot] Refreshed snapshot', { day, durationMs: Date.now() - startTime });
+        } catch (error) {
+          // Keep serving the previous snapshot until it expires; retry on the next tick
+          Logger.error('[CapacitySnapshot] Failed to refresh snapshot', {
+            day,
+            error: (error as Error).message,
+          });
+        }
+      }
+    } finally {
+      this.refreshing = false;
+    }
+
+    if (this.refreshRequested) {
+      await this.refreshDue();
+    }
+  }
+}
@@ -1,7 +1,22 @@
+/**
+ * Geocoding and service-area checks
+ *
+ * Google Geocoding calls are cached so retried booking forms, SMS agent turns
+ * and service-area checks don't pay for the same address twice:
+ * - Normalized-address keys (case, punctuation and street-suffix insensitive)
+ * - Hot in-memory LRU in front of the geocode_cache table
+ * - Negative caching: unknown addresses for a day, upstream failures briefly
+ * - Single-flight coalescing of concurrent lookups for the same address
+ * - Expired geocode_cache rows pruned at most hourly, piggybacked on writes
+ * - ZIP-first service-area checks that skip Google when the address has a ZIP
+ */
+
+import { and, eq, gt, lt, sql } from 'drizzle-orm';
+import { geocodeCache } from '@shared/schema';
 import { logError } from './logger';
 import { loadConfig } from './config.js';
 
-interface GeocodeResult {
+export interface GeocodeResult {
   zipCode: string | null;
   city: string | null;
   state: string | null;
@@ -10,42 +25,193 @@ interface GeocodeResult {
   longitude: number | null;
 }
 
+type GeocodeStatus = 'ok' | 'not_found' | 'error';
+
+interface GeocodeCacheEntry {
+  result: GeocodeResult;
+  status: GeocodeStatus;
+  expiresAt: number;
+}
+
+const HOUR = 60 * 60 * 1000;
+const DAY = 24 * HOUR;
+
+// Addresses don't move; unknown addresses are rechecked daily in case of typos
+// fixed upstream, and failures (quota, network) only briefly so they recover.
+const TTL_MS: Record<GeocodeStatus, number> = {
+  ok: 90 * DAY,
+  not_found: 1 * DAY,
+  error: 60 * 1000,
+};
+
+const MAX_ENTRIES = parseInt(process.env.GEOCODE_CACHE_MAX_ENTRIES || '1000', 10);
+const PRUNE_INTERVAL_MS = 1 * HOUR;
+
+// Google statuses that mean the address itself can't be resolved
+const NOT_FOUND_STATUSES = new Set(['ZERO_RESULTS', 'INVALID_REQUEST']);
+
+const STREET_SUFFIXES: Record<string, string> = {
+  street: 'st',
+  avenue: 'ave',
+  road: 'rd',
+  drive: 'dr',
+  lane: 'ln',
+  court: 'ct',
+  place: 'pl',
+  boulevard: 'blvd',
+  circle: 'cir',
+  terrace: 'ter',
+  parkway: 'pkwy',
+  highway: 'hwy',
+  apartment: 'apt',
+  suite: 'ste',
+};
+
+// A 5-digit ZIP (optionally ZIP+4) at the end of the address, so house
+// numbers like "12345 Main St" aren't mistaken for one
+const TRAILING_ZIP = /\b(\d{5})(?:-\d{4})?\s*(?:,?\s*(?:usa|us|united states))?\s*$/i;
+
+function emptyResult(): GeocodeResult {
+  return {
+    zipCode: null,
+    city: null,
+    state: null,
+    formattedAddress: null,
+    latitude: null,
+    longitude: null,
+  };
+}
+
 /**
- * Geocodes an address using Google Maps Geocoding API
- * @param address - The address to geocode
- * @returns Geocoded address information including ZIP code
+ * Cache key for an address: lowercased, punctuation stripped, whitespace
+ * collapsed and common street suffixes abbreviated.
  */
-export async function geocodeAddress(address: string): Promise<GeocodeResult> {
-  const apiKey = process.env.GOOGLE_MAPS_API_KEY;
+export function normalizeAddress(address: string): string {
+  return address
+    .toLowerCase()
+    .replace(/[.,;:'"()]/g, ' ')
+    .split(/\s+/)
+    .filter(Boolean)
+    .map(word => STREET_SUFFIXES[word] ?? word)
+    .join(' ');
+}
 
-  if (!apiKey) {
-    logError('GOOGLE_MAPS_API_KEY not configured', new Error('Missing API Key'));
-    return {
-      zipCode: null,
-      city: null,
-      state: null,
-      formattedAddress: null,
-      latitude: null,
-      longitude: null,
-    };
+/**
+ * ZIP code written at the end of an address, if any.
+ */
+export function extractZipCode(address: string): string | null {
+  return address.match(TRAILING_ZIP)?.[1] ?? null;
+}
+
+const memoryCache: Map<string, GeocodeCacheEntry> = new Map();
+const inFlight: Map<string, Promise<GeocodeResult>> = new Map();
+
+function getCached(key: string): GeocodeCacheEntry | undefined {
+  const entry = memoryCache.get(key);
+  if (!entry) return undefined;
+  if (entry.expiresAt <= Date.now()) {
+    memoryCache.delete(key);
+    return undefined;
   }
+  // Map preserves insertion order, so re-inserting marks the key most recent
+  memoryCache.delete(key);
+  memoryCache.set(key, entry);
+  return entry;
+}
 
+function setCached(key: string, entry: GeocodeCacheEntry): void {
+  memoryCache.delete(key);
+  memoryCache.set(key, entry);
+  while (memoryCache.size > MAX_ENTRIES) {
+    const oldest = memoryCache.keys().next().value;
+    if (oldest === undefined) break;
+    memoryCache.delete(oldest);
+  }
+}
+
+// The database and usage tracker are loaded lazily so geocoding (and the
+// ZIP fast path) keeps working in scripts and tests without DATABASE_URL.
+async function loadStoredEntry(key: string): Promise<GeocodeCacheEntry | undefined> {
+  try {
+    const { db } = await import('../db');
+    const [row] = await db
+      .select()
+      .from(geocodeCache)
+      .where(and(eq(geocodeCache.normalizedAddress, key), gt(geocodeCache.expiresAt, new Date())))
+      .limit(1);
+
+    if (row) {
+      return {
+        result: row.result as GeocodeResult,
+        status: row.status as GeocodeStatus,
+        expiresAt: row.expiresAt.getTime(),
+      };
+    }
+  } catch (error) {
+    logError('Error reading geocode cache:', error);
+  }
+  return undefined;
+}
+
+async function storeEntry(key: string, entry: GeocodeCacheEntry): Promise<void> {
+  try {
+    const { db } = await import('../db');
+    const expiresAt = new Date(entry.expiresAt);
+    await db
+      .insert(geocodeCache)
+      .values({ normalizedAddress: key, result: entry.result, status: entry.status, expiresAt })
+      .onConflictDoUpdate({
+        target: geocodeCache.normalizedAddress,
+        set: { result: entry.result, status: entry.status, expiresAt, updatedAt: sql`now()` },
+      });
+  } catch (error) {
+    logError('Error writing geocode cache:', error);
+  }
+  void pruneExpiredEntries();
+}
+
+let lastPrunedAt = 0;
+
+// Delete expired rows so geocode_cache doesn't grow without bound. Runs on
+// the write path, throttled per process, instead of on its own timer.
+async function pruneExpiredEntries(now: number = Date.now()): Promise<void> {
+  if (now - lastPrunedAt < PRUNE_INTERVAL_MS) return;
+  lastPrunedAt = now;
+
+  try {
+    const { db } = await import('../db');
+    await db.delete(geocodeCache).where(lt(geocodeCache.expiresAt, new Date(now)));
+  } catch (error) {
+    logError('Error pruning geocode cache:', error);
+  }
+}
+
+async function trackGeocodeRequest(status: string): Promise<void> {
+  try {
+    const { trackGoogleMaps } = await import('../lib/usageTracker');
+    await trackGoogleMaps('geocode', 1, { status });
+  } catch (error) {
+    logError('Error tracking geocode usage:', error);
+  }
+}
+
+/**
+ * Calls the Google Geocoding API for one address.
+ */
+async function fetchGeocode(address: string, apiKey: string): Promise<{ result: GeocodeResult; status: GeocodeStatus }> {
   try {
     const encodedAddress = encodeURIComponent(address);
     const url = `https://maps.googleapis.com/maps/api/geocode/json?address=${encodedAddress}&key=${apiKey}`;
 
     const response = await fetch(url);
     const data = await response.json();
+    void trackGeocodeRequest(data.status);
 
     if (data.status !== 'OK' || !data.results || data.results.length === 0) {
       logError('Geocoding API error:', { status: data.status, error: data.error_message });
       return {
-        zipCode: null,
-        city: null,
-        state: null,
-        formattedAddress: null,
-        latitude: null,
-        longitude: null,
+        result: emptyResult(),
+        status: NOT_FOUND_STATUSES.has(data.status) ? 'not_found' : 'error',
       };
     }
 
@@ -70,47 +236,79 @@ export async function geocodeAddress(address: string): Promise<GeocodeResult> {
     const location = result.geometry?.location;
 
     return {
-      zipCode,
-      city,
-      state,
-      formattedAddress: result.formatted_address || null,
-      latitude: location?.lat || null,
-      longitude: location?.lng || null,
+      result: {
+        zipCode,
+        city,
+        state,
+        formattedAddress: result.formatted_address || null,
+        latitude: location?.lat || null,
+        longitude: location?.lng || null,
+      },
+      status: 'ok',
     };
   } catch (error) {
     logError('Error geocoding address:', error);
-    return {
-      zipCode: null,
-      city: null,
-      state: null,
-      formattedAddress: null,
-      latitude: null,
-      longitude: null,
-    };
+    return { result: emptyResult(), status: 'error' };
   }
 }
 
+async function resolveGeocode(key: string, address: string, apiKey: string): Promise<GeocodeResult> {
+  const persisted = await loadStoredEntry(key);
+  if (persisted) {
+    setCached(key, persisted);
+    return persisted.result;
+  }
+
+  const { result, status } = await fetchGeocode(address, apiKey);
+  const entry: GeocodeCacheEntry = { result, status, expiresAt: Date.now() + TTL_MS[status] };
+  setCached(key, entry);
+  // Transient failures stay in memory only so other processes retry on their own
+  if (status !== 'error') {
+    await storeEntry(key, entry);
+  }
+  return result;
+}
+
+function lookup(key: string, address: string, apiKey: string): Promise<GeocodeResult> {
+  const pending = inFlight.get(key);
+  if (pending) return pending;
+
+  const request = resolveGeocode(key, address, apiKey).finally(() => inFlight.delete(key));
+  inFlight.set(key, request);
+  return request;
+}
+
 /**
- * Checks if an address is within the service area
- * @param address - The address to check
- * @returns Object with inServiceArea status and additional info
+ * Geocodes an address using Google Maps Geocoding API
+ * @param address - The address to geocode
+ * @returns Geocoded address information including ZIP code
  */
-export async function checkServiceArea(address: string): Promise<{
+export async function geocodeAddress(address: string): Promise<GeocodeResult> {
+  const apiKey = process.env.GOOGLE_MAPS_API_KEY;
+
+  if (!apiKey) {
+    logError('GOOGLE_MAPS_API_KEY not configured', new Error('Missing API Key'));
+    return emptyResult();
+  }
+
+  const key = normalizeAddress(address);
+  if (!key) return emptyResult();
+
+  const cached = getCached(key);
+  if (cached) return cached.result;
+
+  return lookup(key, address, apiKey);
+}
+
+/**
+ * Service-area status for a ZIP code from the capacity config
+ */
+function resolveServiceArea(zipCode: string): {
   inServiceArea: boolean;
   message: string;
   zipCode: string | null;
   tier?: string;
-}> {
-  const geocodeResult = await geocodeAddress(address);
-
-  if (!geocodeResult.zipCode) {
-    return {
-      inServiceArea: false,
-      message: "We couldn't verify your address. Please ensure you've entered a valid address.",
-      zipCode: null,
-    };
-  }
-
+} {
   // Get service area ZIP codes from capacity config
   const config = loadConfig();
   const allZipCodes = config.geos || [];
@@ -118,8 +316,6 @@ export async function checkServiceArea(address: string): Promise<{
   const tier2Zips = config.express_zones?.tier2 || [];
   const tier3Zips = config.express_zones?.tier3 || [];
 
-  const zipCode = geocodeResult.zipCode;
-
   // Check if ZIP code is in service area
   if (allZipCodes.includes(zipCode)) {
     let tier: string | undefined;
@@ -146,3 +342,33 @@ export async function checkServiceArea(address: string): Promise<{
     zipCode,
   };
 }
+
+/**
+ * Checks if an address is within the service area
+ * @param address - The address to check
+ * @returns Object with inServiceArea status and additional info
+ */
+export async function checkServiceArea(address: string): Promise<{
+  inServiceArea: boolean;
+  message: string;
+  zipCode: string | null;
+  tier?: string;
+}> {
+  // Service area is decided by ZIP alone, so skip Google when the address has one
+  const writtenZip = extractZipCode(address);
+  if (writtenZip) {
+    return resolveServiceArea(writtenZip);
+  }
+
+  const geocodeResult = await geocodeAddress(address);
+
+  if (!geocodeResult.zipCode) {
+    return {
+      inServiceArea: false,
+      message: "We couldn't verify your address. Please ensure you've entered a valid address.",
+      zipCode: null,
+    };
+  }
+
+  return resolveServiceArea(geocodeResult.zipCode);
+}
@@ -0,0 +1,307 @@
+/**
+ * Shared Housecall Pro response cache
+ *
+ * Every process path that reads from HCP (HousecallProClient, the MCP booker's
+ * hcpGet and the social-proof routes) goes through this gateway so identical
+ * GETs share one cache and one in-flight request:
+ * - Size-bounded LRU with per-endpoint TTLs
+ * - Single-flight coalescing of concurrent identical GETs
+ * - Stale-while-revalidate when HCP answers 429/5xx
+ * - Canonical (parameter-order independent) cache keys
+ * - Hit/miss/coalesced counters for rate-limit budgeting
+ */
+
+import { createHash } from 'crypto';
+import { Logger } from './logger';
+import { getCorrelationId, traceDependencyWait } from './observability/tracing';
+
+interface EndpointPolicy {
+  /** Fresh lifetime in ms. 0 disables caching but keeps request coalescing. */
+  ttlMs: number;
+  /** How long past expiry an entry may still be served if HCP is failing. */
+  staleMs: number;
+}
+
+interface CacheEntry {
+  data: unknown;
+  endpoint: string;
+  fetchedAt: number;
+  expiresAt: number;
+  staleUntil: number;
+}
+
+export interface HcpCacheStats {
+  size: number;
+  maxEntries: number;
+  hits: number;
+  misses: number;
+  coalesced: number;
+  staleServed: number;
+  evictions: number;
+  inFlight: number;
+  hitRate: number;
+}
+
+const MINUTE = 60 * 1000;
+
+// Ordered most-specific first; the first prefix match wins.
+const ENDPOINT_POLICIES: Array<[prefix: string, policy: EndpointPolicy]> = [
+  ['/company/schedule_availability/booking_windows', { ttlMs: 1 * MINUTE, staleMs: 10 * MINUTE }],
+  ['/employees', { ttlMs: 10 * MINUTE, staleMs: 60 * MINUTE }],
+  ['/jobs', { ttlMs: 2 * MINUTE, staleMs: 15 * MINUTE }],
+  ['/estimates', { ttlMs: 2 * MINUTE, staleMs: 15 * MINUTE }],
+  // Customer lookups gate customer creation, so never serve them from cache -
+  // only collapse concurrent identical searches into one request.
+  ['/customers', { ttlMs: 0, staleMs: 0 }],
+];
+
+const DEFAULT_POLICY: EndpointPolicy = { ttlMs: 5 * MINUTE, staleMs: 15 * MINUTE };
+
+const MAX_ENTRIES = parseInt(process.env.HCP_CACHE_MAX_ENTRIES || '500', 10);
+
+function matchesPrefix(endpoint: string, prefix: string): boolean {
+  return endpoint === prefix || endpoint.startsWith(`${prefix}/`) || endpoint.startsWith(`${prefix}?`);
+}
+
+function policyFor(endpoint: string): EndpointPolicy {
+  for (const [prefix, policy] of ENDPOINT_POLICIES) {
+    if (matchesPrefix(endpoint, prefix)) {
+      return policy;
+    }
+  }
+  return DEFAULT_POLICY;
+}
+
+/**
+ * Normalize query params so `{ a: 1, b: '2' }` and `{ b: 2, a: '1' }` map to
+ * the same key. Undefined/null values are dropped, scalars are stringified the
+ * same way they end up in the query string.
+ */
+function canonicalize(value: unknown): unknown {
+  if (value === undefined || value === null) return undefined;
+  if (Array.isArray(value)) {
+    return value.map(canonicalize).filter(v => v !== undefined);
+  }
+  if (typeof value === 'object') {
+    const out: Record<string, unknown> = {};
+    for (const key of Object.keys(value as Record<string, unknown>).sort()) {
+      const v = canonicalize((value as Record<string, unknown>)[key]);
+      if (v !== undefined) out[key] = v;
+    }
+    return out;
+  }
+  return String(value);
+}
+
+export function buildHcpCacheKey(endpoint: string, params: Record<string, any> = {}): string {
+  const digest = createHash('sha1')
+    .update(JSON.stringify(canonicalize(params)))
+    .digest('hex');
+  return `GET:${endpoint}:${digest}`;
+}
+
+/**
+ * Extract the upstream HTTP status from the different error shapes the three
+ * HCP callers throw (`status` property, structured `details.status`, or a
+ * message containing the status code).
+ */
+export function getUpstreamStatus(error: unknown): number | undefined {
+  const err = error as any;
+  if (typeof err?.status === 'number') return err.status;
+  if (typeof err?.details?.status === 'number') return err.details.status;
+  const match = typeof err?.message === 'string' ? err.message.match(/\b(429|5\d\d)\b/) : null;
+  return match ? parseInt(match[1], 10) : undefined;
+}
+
+function isStaleEligible(error: unknown): boolean {
+  const status = getUpstreamStatus(error);
+  return status === 429 || (status !== undefined && status >= 500);
+}
+
+export class HcpResponseCache {
+  private entries: Map<string, CacheEntry> = new Map();
+  private inFlight: Map<string, { endpoint: string; request: Promise<unknown> }> = new Map();
+  // Bumped by every invalidate(); a load only caches its response if none of
+  // its endpoint's prefixes were invalidated after the load started.
+  private generation = 0;
+  private invalidatedAt: Map<string, number> = new Map();
+  private counters = { hits: 0, misses: 0, coalesced: 0, staleServed: 0, evictions: 0 };
+
+  constructor(private readonly maxEntries: number = MAX_ENTRIES) { }
+
+  /**
+   * Return a cached GET response or run `loader` once for all concurrent
+   * callers asking for the same endpoint + params.
+   */
+  async get<T>(endpoint: string, params: Record<string, any>, loader: () => Promise<T>): Promise<T> {
+    const key = buildHcpCacheKey(endpoint, params);
+    const now = Date.now();
+    const entry = this.entries.get(key);
+
+    if (entry && entry.expiresAt > now) {
+      this.counters.hits++;
+      this.touch(key, entry);
+      return entry.data as T;
+    }
+
+    const pending = this.inFlight.get(key);
+    if (pending) {
+      this.counters.coalesced++;
+      // The loader's HCP time lands in the first caller's trace; charge the
+      // wait to this one too so it isn't reported as app time
+      return traceDependencyWait('hcp', pending.request as Promise<T>).catch(error => {
+        // The loader logged the failure under the first caller's correlation
+        // ID; log it again under this caller's so its request can be traced
+        Logger.warn('[HcpGateway] Shared HCP request failed', {
+          endpoint,
+          correlationId: getCorrelationId(),
+          status: getUpstreamStatus(error),
+          error: (error as Error)?.message,
+        });
+        throw error;
+      });
+    }
+
+    this.counters.misses++;
+    const request = this.load(key, endpoint, loader);
+    this.inFlight.set(key, { endpoint, request });
+    try {
+      return await request;
+    } finally {
+      // invalidate() may already have replaced or dropped this entry
+      if (this.inFlight.get(key)?.request === request) {
+        this.inFlight.delete(key);
+      }
+    }
+  }
+
+  private async load<T>(key: string, endpoint: string, loader: () => Promise<T>): Promise<T> {
+    const policy = policyFor(endpoint);
+    const startGeneration = this.generation;
+    try {
+      const data = await loader();
+      if (policy.ttlMs > 0 && !this.invalidatedSince(endpoint, startGeneration)) {
+        // Up to 10% jitter so entries written together don't expire together
+        const ttl = policy.ttlMs + Math.random() * policy.ttlMs * 0.1;
+        const fetchedAt = Date.now();
+        const expiresAt = fetchedAt + ttl;
+        this.set(key, { data, endpoint, fetchedAt, expiresAt, staleUntil: expiresAt + policy.staleMs });
+      }
+      return data;
+    } catch (error) {
+      const stale = this.entries.get(key);
+      if (stale && stale.staleUntil > Date.now() && isStaleEligible(error)) {
+        this.counters.staleServed++;
+        Logger.warn('[HcpGateway] Serving stale response after upstream failure', {
+          endpoint,
+          status: getUpstreamStatus(error),
+          ageMs: Date.now() - stale.fetchedAt,
+        });
+        return stale.data as T;
+      }
+      throw error;
+    }
+  }
+
+  private set(key: string, entry: CacheEntry): void {
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    while (this.entries.size > this.maxEntries) {
+      const oldest = this.entries.keys().next().value;
+      if (oldest === undefined) break;
+      this.entries.delete(oldest);
+      this.counters.evictions++;
+    }
+  }
+
+  private touch(key: string, entry: CacheEntry): void {
+    // Map preserves insertion order, so re-inserting marks the key most recent
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+  }
+
+  /**
+   * Drop every cached response for an endpoint prefix, e.g. after a write
+   * that changes `/jobs` or booking availability.
+   */
+  invalidate(endpointPrefix: string): number {
+    this.invalidatedAt.set(endpointPrefix, ++this.generation);
+
+    let removed = 0;
+    for (const [key, entry] of this.entries) {
+      if (entry.endpoint === endpointPrefix || entry.endpoint.startsWith(`${endpointPrefix}/`)) {
+        this.entries.delete(key);
+        removed++;
+      }
+    }
+    // Loads already in flight may carry pre-write data; new callers start fresh
+    for (const [key, pending] of this.inFlight) {
+      if (matchesPrefix(pending.endpoint, endpointPrefix)) {
+        this.inFlight.delete(key);
+      }
+    }
+    return removed;
+  }
+
+  private invalidatedSince(endpoint: string, generation: number): boolean {
+    for (const [prefix, invalidatedAt] of this.invalidatedAt) {
+      if (invalidatedAt > generation && matchesPrefix(endpoint, prefix)) {
+        return true;
+      }
+    }
+    return false;
+  }
+
+  clear(): void {
+    this.entries.clear();
+  }
+
+  getStats(): HcpCacheStats {
+    const { hits, misses, coalesced, staleServed, evictions } = this.counters;
+    const lookups = hits + misses + coalesced;
+    return {
+      size: this.entries.size,
+      maxEntries: this.maxEntries,
+      hits,
+      misses,
+      coalesced,
+      staleServed,
+      evictions,
+      inFlight: this.inFlight.size,
+      hitRate: lookups > 0 ? (hits + coalesced) / lookups : 0,
+    };
+  }
+}
+
+// Singleton shared by every HCP caller in this process
+export const hcpCache = new HcpResponseCache();
+
+// Caches built from availability (capacity snapshots) register here so they
+// are dropped by the same writes, without hcpGateway importing them
+const availabilityListeners: Array<() => void> = [];
+
+export function onAvailabilityWrite(listener: () => void): void {
+  availabilityListeners.push(listener);
+}
+
+/**
+ * Invalidate cached reads affected by a write to `endpoint`.
+ * Job and appointment writes change availability as well as job listings.
+ */
+export function invalidateForWrite(endpoint: string): void {
+  if (endpoint.startsWith('/jobs') || endpoint.startsWith('/leads')) {
+    hcpCache.invalidate('/jobs');
+    hcpCache.invalidate('/company/schedule_availability/booking_windows');
+    for (const listener of availabilityListeners) {
+      try {
+        listener();
+      } catch (error) {
+        Logger.error('[HcpGateway] Availability listener failed', { error: (error as Error).message });
+      }
+    }
+  } else if (endpoint.startsWith('/estimates')) {
+    hcpCache.invalidate('/estimates');
+  } else if (endpoint.startsWith('/customers')) {
+    hcpCache.invalidate('/customers');
+  }
+}
@@ -9,12 +9,14 @@
 
 import { db } from '../db';
 import {
-  hcpJobs, hcpEstimates, hcpSyncLog, hcpDailyStats,
+  hcpJobs, hcpEstimates, hcpSyncLog, hcpDailyStats, hcpStatsDirtyDays,
   InsertHcpJob, InsertHcpEstimate
 } from '@shared/schema';
-import { eq, gte, lte, and, sql } from 'drizzle-orm';
+import { eq, and, sql, inArray, getTableColumns, type SQL } from 'drizzle-orm';
+import type { PgTable } from 'drizzle-orm/pg-core';
 import { HousecallProClient } from './housecall';
 import { Logger } from './logger';
+import { prefetchPages, chunk } from './util/pagination';
 
 const logger = {
   info: (msg: string, meta?: any) => Logger.info(`[hcp-sync] ${msg}`, meta),
@@ -90,6 +92,70 @@ interface HCPApiEstimate {
   updated_at?: string;
 }
 
+// Rows per multi-row INSERT ... ON CONFLICT statement
+const UPSERT_CHUNK_SIZE = 200;
+// HCP pages fetched ahead of the one being written
+const PAGE_PREFETCH_CONCURRENCY = 3;
+const HCP_PAGE_SIZE = 100;
+// Re-read this much before the watermark to absorb clock skew between HCP writes
+const WATERMARK_OVERLAP_MS = 5 * 60 * 1000;
+
+/**
+ * full: re-pull everything scheduled in the last `daysBack` days.
+ * incremental: pull only records updated since the stored high-water mark.
+ */
+export type SyncMode = 'full' | 'incremental';
+
+interface UpsertCounts {
+  created: number;
+  updated: number;
+}
+
+/**
+ * Build an ON CONFLICT DO UPDATE `set` that copies every column from the
+ * proposed row (`excluded.*`), except the key columns.
+ */
+function excludedColumns<TTable extends PgTable>(table: TTable, skip: string[]): Record<string, SQL> {
+  const set: Record<string, SQL> = {};
+  for (const [key, column] of Object.entries(getTableColumns(table))) {
+    if (skip.includes(key)) continue;
+    set[key] = sql.raw(`excluded."${column.name}"`);
+  }
+  return set;
+}
+
+/**
+ * Keep the last occurrence of each key - a single INSERT ... ON CONFLICT
+ * cannot touch the same row twice.
+ */
+function dedupeBy<T>(rows: T[], key: (row: T) => string): T[] {
+  const byKey = new Map<string, T>();
+  for (const row of rows) byKey.set(key(row), row);
+  return Array.from(byKey.values());
+}
+
+/**
+ * Days that records are being moved away from: the current scheduled day of
+ * each existing row whose incoming scheduled_start falls on a different day.
+ * Days are UTC midnights, matching date_trunc('day', ...) on the stored
+ * UTC wall-time timestamps.
+ */
+export function vacatedDays(
+  existing: Array<{ id: string; scheduledStart: Date | null }>,
+  incoming: Map<string, Date | null>
+): Date[] {
+  const dayOf = (date: Date) => Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), date.getUTCDate());
+  const days = new Set<number>();
+  for (const row of existing) {
+    if (!row.scheduledStart || !incoming.has(row.id)) continue;
+    const next = incoming.get(row.id);
+    if (!next || dayOf(next) !== dayOf(row.scheduledStart)) {
+      days.add(dayOf(row.scheduledStart));
+    }
+  }
+  return Array.from(days, day => new Date(day));
+}
+
 interface SyncResult {
   syncType: string;
   status: 'completed' | 'failed';
@@ -105,6 +171,7 @@ export class HCPSyncService {
   private hcpClient: HousecallProClient;
   private isSyncing = false;
   private syncInterval: NodeJS.Timeout | null = null;
+  private reconcileInterval: NodeJS.Timeout | null = null;
 
   private constructor() {
     this.hcpClient = HousecallProClient.getInstance();
@@ -118,28 +185,37 @@ export class HCPSyncService {
   }
 
   /**
-   * Start periodic sync (every 30 minutes)
+   * Start periodic sync: an incremental delta every `intervalMs` (30 minutes)
+   * and a full 30-day reconcile every `reconcileIntervalMs` (24 hours).
+   * Webhooks keep hcp_jobs/hcp_estimates current between ticks.
    */
-  startPeriodicSync(intervalMs = 30 * 60 * 1000): void {
-    if (this.syncInterval) {
-      clearInterval(this.syncInterval);
-    }
+  startPeriodicSync(intervalMs = 30 * 60 * 1000, reconcileIntervalMs = 24 * 60 * 60 * 1000): void {
+    this.stopPeriodicSync();
 
-    logger.info('Starting periodic HCP sync', { intervalMs });
+    logger.info('Starting periodic HCP sync', { intervalMs, reconcileIntervalMs });
 
-    // Initial sync
-    this.syncAll().catch(err => logger.error('Initial sync failed', { error: err.message }));
+    // Initial sync (falls back to a full pull when there is no watermark yet)
+    this.syncAll('incremental').catch(err => logger.error('Initial sync failed', { error: err.message }));
 
-    // Periodic sync
+    // Periodic delta sync
     this.syncInterval = setInterval(() => {
-      this.syncAll().catch(err => logger.error('Periodic sync failed', { error: err.message }));
+      this.syncAll('incremental').catch(err => logger.error('Periodic sync failed', { error: err.message }));
     }, intervalMs);
+
+    // Slow full reconcile catches anything deltas and webhooks missed
+    this.reconcileInterval = setInterval(() => {
+      this.syncAll('full').catch(err => logger.error('Full reconcile failed', { error: err.message }));
+    }, reconcileIntervalMs);
   }
 
   /**
    * Stop periodic sync
    */
   stopPeriodicSync(): void {
+    if (this.reconcileInterval) {
+      clearInterval(this.reconcileInterval);
+      this.reconcileInterval = null;
+    }
     if (this.syncInterval) {
       clearInterval(this.syncInterval);
       this.syncInterval = null;
@@ -150,7 +226,7 @@ export class HCPSyncService {
   /**
    * Sync all data (jobs, estimates, daily stats)
    */
-  async syncAll(): Promise<SyncResult[]> {
+  async syncAll(mode: SyncMode = 'full'): Promise<SyncResult[]> {
     if (this.isSyncing) {
       logger.warn('Sync already in progress, skipping');
       return [];
@@ -161,18 +237,18 @@ export class HCPSyncService {
 
     try {
       // Sync jobs for last 30 days
-      const jobsResult = await this.syncJobs(30);
+      const jobsResult = await this.syncJobs(30, mode);
       results.push(jobsResult);
 
       // Sync estimates for last 30 days
-      const estimatesResult = await this.syncEstimates(30);
+      const estimatesResult = await this.syncEstimates(30, mode);
       results.push(estimatesResult);
 
       // Update daily stats
-      const statsResult = await this.syncDailyStats(30);
+      const statsResult = await this.syncDailyStats(30, mode);
       results.push(statsResult);
 
-      logger.info('Full sync completed', { results });
+      logger.info(`${mode === 'full' ? 'Full' : 'Incremental'} sync completed`, { results });
     } finally {
       this.isSyncing = false;
     }
@@ -180,18 +256,110 @@ export class HCPSyncService {
     return results;
   }
 
+  /**
+   * High-water mark for an entity: the start of the last completed full or
+   * incremental sync of that entity. Not derived from the mirrored rows -
+   * webhook upserts advance hcp_updated_at and would hide changes whose
+   * webhook was missed. Returns null when nothing has been synced yet.
+   */
+  async getWatermark(entity: 'jobs' | 'estimates'): Promise<Date | null> {
+    const lastSync = await db.query.hcpSyncLog.findFirst({
+      where: and(
+        sql`${hcpSyncLog.syncType} IN (${entity}, ${`${entity}_incremental`})`,
+        eq(hcpSyncLog.status, 'completed')
+      ),
+      orderBy: (log, { desc }) => [desc(log.startedAt)],
+    });
+    return lastSync?.startedAt ?? null;
+  }
+
+  /**
+   * Page through every record scheduled in [startDate, endDate], prefetching
+   * the next pages while the current one is written.
+   */
+  private async *fetchPagesInRange<T>(
+    endpoint: '/jobs' | '/estimates',
+    startDate: Date,
+    endDate: Date
+  ): AsyncGenerator<T[]> {
+    const pages = prefetchPages<T>(async (page) => {
+      const data = await this.hcpClient.callAPI<Record<string, any>>(endpoint, {
+        scheduled_start_min: startDate.toISOString(),
+        scheduled_start_max: endDate.toISOString(),
+        page,
+        page_size: HCP_PAGE_SIZE,
+      }, { cache: false });
+      return { items: (data[endpoint.slice(1)] as T[]) || [], totalPages: data.total_pages };
+    }, { concurrency: PAGE_PREFETCH_CONCURRENCY });
+
+    for await (const { items } of pages) {
+      yield items;
+    }
+  }
+
+  /**
+   * Page through an HCP list endpoint newest-update-first and yield only the
+   * records changed after `since`, stopping at the first page that reaches it.
+   */
+  private async *fetchChangedSince<T extends { updated_at?: string }>(
+    endpoint: '/jobs' | '/estimates',
+    since: Date
+  ): AsyncGenerator<T[]> {
+    const cutoff = since.getTime() - WATERMARK_OVERLAP_MS;
+    // Pages are read one at a time - we usually stop after the first one
+    const pages = prefetchPages<T>(async (page) => {
+      const data = await this.hcpClient.callAPI<Record<string, any>>(endpoint, {
+        sort_by: 'updated_at',
+        sort_direction: 'desc',
+        page,
+        page_size: HCP_PAGE_SIZE,
+      }, { cache: false });
+      return { items: (data[endpoint.slice(1)] as T[]) || [], totalPages: data.total_pages };
+    }, { concurrency: 1 });
+
+    for await (const { items } of pages) {
+      const changed = items.filter(item => !item.updated_at || new Date(item.updated_at).getTime() > cutoff);
+      if (changed.length > 0) yield changed;
+      if (changed.length < items.length || items.length < HCP_PAGE_SIZE) break;
+    }
+  }
+
+  /**
+   * Apply a job.* webhook payload straight to hcp_jobs.
+   * Payloads without updated_at can't be ordered against what we hold (and
+   * may be partial), so they're left for the next sync.
+   */
+  async applyJobEvent(payload: any): Promise<UpsertCounts> {
+    const job = (payload?.job ?? payload) as HCPApiJob;
+    if (!job?.id || !job.updated_at) return { created: 0, updated: 0 };
+    return this.upsertJobs([job]);
+  }
+
+  /**
+   * Apply an estimate.* webhook payload straight to hcp_estimates; same
+   * rules as applyJobEvent
+   */
+  async applyEstimateEvent(payload: any): Promise<UpsertCounts> {
+    const estimate = (payload?.estimate ?? payload) as HCPApiEstimate;
+    if (!estimate?.id || !estimate.updated_at) return { created: 0, updated: 0 };
+    return this.upsertEstimates([estimate]);
+  }
+
   /**
    * Sync jobs from HCP
    */
-  async syncJobs(daysBack = 30): Promise<SyncResult> {
+  async syncJobs(daysBack = 30, mode: SyncMode = 'full'): Promise<SyncResult> {
     const startTime = Date.now();
     let recordsProcessed = 0;
     let recordsCreated = 0;
     let recordsUpdated = 0;
 
+    const watermark = mode === 'incremental' ? await this.getWatermark('jobs') : null;
+    const syncType = watermark ? 'jobs_incremental' : 'jobs';
+
     // Log sync start
     const [syncLog] = await db.insert(hcpSyncLog).values({
-      syncType: 'jobs',
+      syncType,
       status: 'started',
     }).returning();
 
@@ -200,73 +368,16 @@ export class HCPSyncService {
       const startDate = new Date();
       startDate.setDate(startDate.getDate() - daysBack);
 
-      // Fetch jobs from HCP
-      const jobsRaw = await this.hcpClient.getJobs({
-        scheduled_start_min: startDate.toISOString(),
-        scheduled_start_max: endDate.toISOString(),
-      });
-      const jobs = jobsRaw as unknown as HCPApiJob[];
-
-      recordsProcessed = jobs.length;
-
-      // Upsert each job
-      for (const job of jobs) {
-        const jobData: InsertHcpJob = {
-          hcpJobId: job.id,
-          customerId: job.customer?.id || null,
-          customerName: job.customer?.name || `${job.customer?.first_name || ''} ${job.customer?.last_name || ''}`.trim() || null,
-          customerPhone: job.customer?.mobile_number || job.customer?.phone || null,
-          customerEmail: job.customer?.email || null,
-          addressStreet: job.address?.street || null,
-          addressCity: job.address?.city || null,
-          addressState: job.address?.state || null,
-          addressZip: job.address?.zip || null,
-          jobName: job.name || job.line_items?.[0]?.name || null,
-          jobDescription: job.description || null,
-          invoiceNumber: job.invoice_number || null,
-          workStatus: job.work_status || 'scheduled',
-          totalAmount: Math.round((job.total_amount || 0) * 100), // Convert to cents
-          outstandingBalance: Math.round((job.outstanding_balance || 0) * 100),
-          scheduledStart: job.scheduled_start ? new Date(job.scheduled_start) : null,
-          scheduledEnd: job.scheduled_end ? new Date(job.scheduled_end) : null,
-          completedAt: job.completed_at ? new Date(job.completed_at) : null,
-          assignedTechIds: job.assigned_employees?.map(e => e.id) || [],
-          assignedTechNames: job.assigned_employees?.map(e => `${e.first_name} ${e.last_name}`) || [],
-          tags: job.tags || [],
-          isEmergency: job.tags?.some(t =>
-            t.toLowerCase().includes('emergency') || t.toLowerCase().includes('urgent')
-          ) || job.description?.toLowerCase().includes('emergency') || false,
-          source: job.source || null,
-          hcpCreatedAt: job.created_at ? new Date(job.created_at) : null,
-          hcpUpdatedAt: job.updated_at ? new Date(job.updated_at) : null,
-          rawData: job as Record<string, any>,
-        };
-
-        // Upsert
-        const existing = await db.query.hcpJobs.findFirst({
-          where: eq(hcpJobs.hcpJobId, job.id),
-        });
-
-        if (existing) {
-          await db.update(hcpJobs)
-            .set({
-              ...jobData,
-              syncedAt: new Date(),
-              tags: jobData.tags as string[],
-              assignedTechIds: jobData.assignedTechIds as string[],
-              assignedTechNames: jobData.assignedTechNames as string[],
-            })
-            .where(eq(hcpJobs.hcpJobId, job.id));
-          recordsUpdated++;
-        } else {
-          await db.insert(hcpJobs).values({
-            ...jobData,
-            tags: jobData.tags as string[],
-            assignedTechIds: jobData.assignedTechIds as string[],
-            assignedTechNames: jobData.assignedTechNames as string[],
-          });
-          recordsCreated++;
-        }
+      // Page through HCP, writing each page while the next ones are prefetched
+      const pages = watermark
+        ? this.fetchChangedSince<HCPApiJob>('/jobs', watermark)
+        : this.fetchPagesInRange<HCPApiJob>('/jobs', startDate, endDate);
+
+      for await (const jobs of pages) {
+        recordsProcessed += jobs.length;
+        const counts = await this.upsertJobs(jobs);
+        recordsCreated += counts.created;
+        recordsUpdated += counts.updated;
       }
 
       const durationMs = Date.now() - startTime;
@@ -283,10 +394,10 @@ export class HCPSyncService {
         })
         .where(eq(hcpSyncLog.id, syncLog.id));
 
-      logger.info('Jobs sync completed', { recordsProcessed, recordsCreated, recordsUpdated, durationMs });
+      logger.info('Jobs sync completed', { syncType, recordsProcessed, recordsCreated, recordsUpdated, durationMs });
 
       return {
-        syncType: 'jobs',
+        syncType,
         status: 'completed',
         recordsProcessed,
         recordsCreated,
@@ -305,10 +416,10 @@ export class HCPSyncService {
         })
         .where(eq(hcpSyncLog.id, syncLog.id));
 
-      logger.error('Jobs sync failed', { error: error.message });
+      logger.error('Jobs sync failed', { syncType, error: error.message });
 
       return {
-        syncType: 'jobs',
+        syncType,
         status: 'failed',
         recordsProcessed,
         recordsCreated,
@@ -322,14 +433,17 @@ export class HCPSyncService {
   /**
    * Sync estimates from HCP
    */
-  async syncEstimates(daysBack = 30): Promise<SyncResult> {
+  async syncEstimates(daysBack = 30, mode: SyncMode = 'full'): Promise<SyncResult> {
     const startTime = Date.now();
     let recordsProcessed = 0;
     let recordsCreated = 0;
     let recordsUpdated = 0;
 
+    const watermark = mode === 'incremental' ? await this.getWatermark('estimates') : null;
+    const syncType = watermark ? 'estimates_incremental' : 'estimates';
+
     const [syncLog] = await db.insert(hcpSyncLog).values({
-      syncType: 'estimates',
+      syncType,
       status: 'started',
     }).returning();
 
@@ -338,54 +452,15 @@ export class HCPSyncService {
       const startDate = new Date();
       startDate.setDate(startDate.getDate() - daysBack);
 
-      const estimatesRaw = await this.hcpClient.getEstimates({
-        scheduled_start_min: startDate.toISOString(),
-        scheduled_start_max: endDate.toISOString(),
-      });
-      const estimates = estimatesRaw as unknown as HCPApiEstimate[];
-
-      recordsProcessed = estimates.length;
-
-      for (const estimate of estimates) {
-        const estimateData: InsertHcpEstimate = {
-          hcpEstimateId: estimate.id,
-          customerId: estimate.customer?.id || null,
-          customerName: estimate.customer?.name || `${estimate.customer?.first_name || ''} ${estimate.customer?.last_name || ''}`.trim() || null,
-          customerPhone: estimate.customer?.mobile_number || estimate.customer?.phone || null,
-          customerEmail: estimate.customer?.email || null,
-          addressStreet: estimate.address?.street || null,
-          addressCity: estimate.address?.city || null,
-          addressState: estimate.address?.state || null,
-          addressZip: estimate.address?.zip || null,
-          estimateName: estimate.name || null,
-          estimateNumber: estimate.estimate_number || null,
-          status: estimate.status || 'draft',
-          totalAmount: Math.round((estimate.total_amount || 0) * 100),
-          scheduledStart: estimate.scheduled_start ? new Date(estimate.scheduled_start) : null,
-          sentAt: estimate.sent_at ? new Date(estimate.sent_at) : null,
-          viewedAt: estimate.viewed_at ? new Date(estimate.viewed_at) : null,
-          respondedAt: estimate.responded_at ? new Date(estimate.responded_at) : null,
-          expiresAt: estimate.expires_at ? new Date(estimate.expires_at) : null,
-          convertedToJobId: estimate.converted_to_job_id || null,
-          convertedAt: estimate.converted_at ? new Date(estimate.converted_at) : null,
-          hcpCreatedAt: estimate.created_at ? new Date(estimate.created_at) : null,
-          hcpUpdatedAt: estimate.updated_at ? new Date(estimate.updated_at) : null,
-          rawData: estimate as Record<string, any>,
-        };
-
-        const existing = await db.query.hcpEstimates.findFirst({
-          where: eq(hcpEstimates.hcpEstimateId, estimate.id),
-        });
-
-        if (existing) {
-          await db.update(hcpEstimates)
-            .set({ ...estimateData, syncedAt: new Date() })
-            .where(eq(hcpEstimates.hcpEstimateId, estimate.id));
-          recordsUpdated++;
-        } else {
-          await db.insert(hcpEstimates).values(estimateData);
-          recordsCreated++;
-        }
+      const pages = watermark
+        ? this.fetchChangedSince<HCPApiEstimate>('/estimates', watermark)
+        : this.fetchPagesInRange<HCPApiEstimate>('/estimates', startDate, endDate);
+
+      for await (const estimates of pages) {
+        recordsProcessed += estimates.length;
+        const counts = await this.upsertEstimates(estimates);
+        recordsCreated += counts.created;
+        recordsUpdated += counts.updated;
       }
 
       const durationMs = Date.now() - startTime;
@@ -401,10 +476,10 @@ export class HCPSyncService {
         })
         .where(eq(hcpSyncLog.id, syncLog.id));
 
-      logger.info('Estimates sync completed', { recordsProcessed, recordsCreated, recordsUpdated, durationMs });
+      logger.info('Estimates sync completed', { syncType, recordsProcessed, recordsCreated, recordsUpdated, durationMs });
 
       return {
-        syncType: 'estimates',
+        syncType,
         status: 'completed',
         recordsProcessed,
         recordsCreated,
@@ -423,10 +498,10 @@ export class HCPSyncService {
         })
         .where(eq(hcpSyncLog.id, syncLog.id));
 
-      logger.error('Estimates sync failed', { error: error.message });
+      logger.error('Estimates sync failed', { syncType, error: error.message });
 
       return {
-        syncType: 'estimates',
+        syncType,
         status: 'failed',
         recordsProcessed,
         recordsCreated,
@@ -438,9 +513,231 @@ export class HCPSyncService {
   }
 
   /**
-   * Calculate and store daily stats from cached data
+   * Map an HCP API job to an hcp_jobs row
+   */
+  private toJobRow(job: HCPApiJob): InsertHcpJob {
+    return {
+      hcpJobId: job.id,
+      customerId: job.customer?.id || null,
+      customerName: job.customer?.name || `${job.customer?.first_name || ''} ${job.customer?.last_name || ''}`.trim() || null,
+      customerPhone: job.customer?.mobile_number || job.customer?.phone || null,
+      customerEmail: job.customer?.email || null,
+      addressStreet: job.address?.street || null,
+      addressCity: job.address?.city || null,
+      addressState: job.address?.state || null,
+      addressZip: job.address?.zip || null,
+      jobName: job.name || job.line_items?.[0]?.name || null,
+      jobDescription: job.description || null,
+      invoiceNumber: job.invoice_number || null,
+      workStatus: job.work_status || 'scheduled',
+      totalAmount: Math.round((job.total_amount || 0) * 100), // Convert to cents
+      outstandingBalance: Math.round((job.outstanding_balance || 0) * 100),
+      scheduledStart: job.scheduled_start ? new Date(job.scheduled_start) : null,
+      scheduledEnd: job.scheduled_end ? new Date(job.scheduled_end) : null,
+      completedAt: job.completed_at ? new Date(job.completed_at) : null,
+      assignedTechIds: job.assigned_employees?.map(e => e.id) || [],
+      assignedTechNames: job.assigned_employees?.map(e => `${e.first_name} ${e.last_name}`) || [],
+      tags: job.tags || [],
+      isEmergency: job.tags?.some(t =>
+        t.toLowerCase().includes('emergency') || t.toLowerCase().includes('urgent')
+      ) || job.description?.toLowerCase().includes('emergency') || false,
+      source: job.source || null,
+      hcpCreatedAt: job.created_at ? new Date(job.created_at) : null,
+      hcpUpdatedAt: job.updated_at ? new Date(job.updated_at) : null,
+      rawData: job as Record<string, any>,
+    };
+  }
+
+  /**
+   * Map an HCP API estimate to an hcp_estimates row
+   */
+  private toEstimateRow(estimate: HCPApiEstimate): InsertHcpEstimate {
+    return {
+      hcpEstimateId: estimate.id,
+      customerId: estimate.customer?.id || null,
+      customerName: estimate.customer?.name || `${estimate.customer?.first_name || ''} ${estimate.customer?.last_name || ''}`.trim() || null,
+      customerPhone: estimate.customer?.mobile_number || estimate.customer?.phone || null,
+      customerEmail: estimate.customer?.email || null,
+      addressStreet: estimate.address?.street || null,
+      addressCity: estimate.address?.city || null,
+      addressState: estimate.address?.state || null,
+      addressZip: estimate.address?.zip || null,
+      estimateName: estimate.name || null,
+      estimateNumber: estimate.estimate_number || null,
+      status: estimate.status || 'draft',
+      totalAmount: Math.round((estimate.total_amount || 0) * 100),
+      scheduledStart: estimate.scheduled_start ? new Date(estimate.scheduled_start) : null,
+      sentAt: estimate.sent_at ? new Date(estimate.sent_at) : null,
+      viewedAt: estimate.viewed_at ? new Date(estimate.viewed_at) : null,
+      respondedAt: estimate.responded_at ? new Date(estimate.responded_at) : null,
+      expiresAt: estimate.expires_at ? new Date(estimate.expires_at) : null,
+      convertedToJobId: estimate.converted_to_job_id || null,
+      convertedAt: estimate.converted_at ? new Date(estimate.converted_at) : null,
+      hcpCreatedAt: estimate.created_at ? new Date(estimate.created_at) : null,
+      hcpUpdatedAt: estimate.updated_at ? new Date(estimate.updated_at) : null,
+      rawData: estimate as Record<string, any>,
+    };
+  }
+
+  /**
+   * Bulk upsert jobs in chunked multi-row INSERT ... ON CONFLICT statements.
+   *
+   * Existing rows are only overwritten by a strictly newer hcp_updated_at, so
+   * out-of-order webhooks, retries and unchanged records leave them untouched
+   * (and uncounted); `xmax = 0` in RETURNING distinguishes inserts from updates.
+   */
+  private async upsertJobs(jobs: HCPApiJob[]): Promise<UpsertCounts> {
+    const counts: UpsertCounts = { created: 0, updated: 0 };
+    const rows = dedupeBy(jobs.map(job => this.toJobRow(job)), row => row.hcpJobId);
+
+    for (const batch of chunk(rows, UPSERT_CHUNK_SIZE)) {
+      const existing = await db.select({ id: hcpJobs.hcpJobId, scheduledStart: hcpJobs.scheduledStart })
+        .from(hcpJobs)
+        .where(inArray(hcpJobs.hcpJobId, batch.map(row => row.hcpJobId)));
+      await this.markDirtyDays(vacatedDays(existing, new Map(batch.map(row => [row.hcpJobId, row.scheduledStart ?? null]))));
+
+      const written = await db.insert(hcpJobs)
+        .values(batch as Array<typeof hcpJobs.$inferInsert>)
+        .onConflictDoUpdate({
+          target: hcpJobs.hcpJobId,
+          set: {
+            ...excludedColumns(hcpJobs, ['id', 'hcpJobId', 'syncedAt']),
+            syncedAt: sql`now()`,
+          },
+          setWhere: sql`${hcpJobs.hcpUpdatedAt} IS NULL OR excluded.hcp_updated_at > ${hcpJobs.hcpUpdatedAt}`,
+        })
+        .returning({ inserted: sql<boolean>`(xmax = 0)` });
+
+      for (const row of written) {
+        if (row.inserted) counts.created++;
+        else counts.updated++;
+      }
+    }
+
+    return counts;
+  }
+
+  /**
+   * Bulk upsert estimates; same semantics as upsertJobs
    */
-  async syncDailyStats(daysBack = 30): Promise<SyncResult> {
+  private async upsertEstimates(estimates: HCPApiEstimate[]): Promise<UpsertCounts> {
+    const counts: UpsertCounts = { created: 0, updated: 0 };
+    const rows = dedupeBy(estimates.map(estimate => this.toEstimateRow(estimate)), row => row.hcpEstimateId);
+
+    for (const batch of chunk(rows, UPSERT_CHUNK_SIZE)) {
+      const existing = await db.select({ id: hcpEstimates.hcpEstimateId, scheduledStart: hcpEstimates.scheduledStart })
+        .from(hcpEstimates)
+        .where(inArray(hcpEstimates.hcpEstimateId, batch.map(row => row.hcpEstimateId)));
+      await this.markDirtyDays(vacatedDays(existing, new Map(batch.map(row => [row.hcpEstimateId, row.scheduledStart ?? null]))));
+
+      const written = await db.insert(hcpEstimates)
+        .values(batch)
+        .onConflictDoUpdate({
+          target: hcpEstimates.hcpEstimateId,
+          set: {
+            ...excludedColumns(hcpEstimates, ['id', 'hcpEstimateId', 'syncedAt']),
+            syncedAt: sql`now()`,
+          },
+          setWhere: sql`${hcpEstimates.hcpUpdatedAt} IS NULL OR excluded.hcp_updated_at > ${hcpEstimates.hcpUpdatedAt}`,
+        })
+        .returning({ inserted: sql<boolean>`(xmax = 0)` });
+
+      for (const row of written) {
+        if (row.inserted) counts.created++;
+        else counts.updated++;
+      }
+    }
+
+    return counts;
+  }
+
+  /**
+   * Record days a batch is moving records away from. Marked before the rows
+   * are written, so a failure in between only costs an extra recompute.
+   */
+  private async markDirtyDays(days: Date[]): Promise<void> {
+    if (days.length === 0) return;
+    await db.insert(hcpStatsDirtyDays)
+      .values(days.map(day => ({ day })))
+      .onConflictDoUpdate({ target: hcpStatsDirtyDays.day, set: { markedAt: sql`now()` } });
+  }
+
+  /**
+   * Calculate and store daily stats from cached data.
+   *
+   * full: recompute every day in the last `daysBack` days.
+   * incremental: recompute only days with jobs/estimates synced since the
+   * last daily stats run, plus days records were rescheduled away from
+   * (falls back to full when there is no previous run).
+   */
+  async syncDailyStats(daysBack = 30, mode: SyncMode = 'full'): Promise<SyncResult> {
+    const endDate = new Date();
+    endDate.setHours(23, 59, 59, 999);
+
+    const startDate = new Date();
+    startDate.setDate(startDate.getDate() - daysBack);
+    startDate.setHours(0, 0, 0, 0);
+
+    if (mode === 'incremental') {
+      const lastRun = await db.query.hcpSyncLog.findFirst({
+        where: and(eq(hcpSyncLog.syncType, 'daily_stats'), eq(hcpSyncLog.status, 'completed')),
+        orderBy: (log, { desc }) => [desc(log.startedAt)],
+      });
+
+      if (lastRun) {
+        // Timestamps are stored as UTC wall time (timestamp without time zone)
+        const since = lastRun.startedAt.toISOString();
+        const result = await this.runDailyStats(sql`
+          SELECT DISTINCT date_trunc('day', ${hcpJobs.scheduledStart}) AS day
+            FROM ${hcpJobs}
+           WHERE ${hcpJobs.syncedAt} >= ${since}::timestamp AND ${hcpJobs.scheduledStart} IS NOT NULL
+          UNION
+          SELECT DISTINCT date_trunc('day', ${hcpEstimates.scheduledStart}) AS day
+            FROM ${hcpEstimates}
+           WHERE ${hcpEstimates.syncedAt} >= ${since}::timestamp AND ${hcpEstimates.scheduledStart} IS NOT NULL
+          UNION
+          SELECT ${hcpStatsDirtyDays.day} AS day FROM ${hcpStatsDirtyDays}
+        `);
+
+        if (result.status === 'completed') {
+          // Days marked after this run started are kept for the next one
+          await db.execute(sql`
+            DELETE FROM ${hcpStatsDirtyDays}
+             WHERE ${hcpStatsDirtyDays.markedAt} <= (
+               SELECT max(${hcpSyncLog.startedAt}) FROM ${hcpSyncLog}
+                WHERE ${hcpSyncLog.syncType} = 'daily_stats' AND ${hcpSyncLog.status} = 'completed'
+             )
+          `);
+        }
+        return result;
+      }
+    }
+
+    return this.recomputeDailyStats(startDate, endDate);
+  }
+
+  /**
+   * Recompute daily stats for every day in [startDate, endDate] on demand
+   */
+  async recomputeDailyStats(startDate: Date, endDate: Date): Promise<SyncResult> {
+    return this.runDailyStats(sql`
+      SELECT generate_series(
+        date_trunc('day', ${startDate.toISOString()}::timestamp),
+        date_trunc('day', ${endDate.toISOString()}::timestamp),
+        interval '1 day'
+      ) AS day
+    `);
+  }
+
+  /**
+   * Roll hcp_jobs/hcp_estimates up into hcp_daily_stats for the days
+   * selected by `daysQuery` (a query returning a single `day` column).
+   *
+   * One grouped aggregation per table, joined onto the day list and written
+   * with a single INSERT ... ON CONFLICT (date) DO UPDATE - no row data
+   * (or raw_data JSON) leaves the database.
+   */
+  private async runDailyStats(daysQuery: SQL): Promise<SyncResult> {
     const startTime = Date.now();
     let recordsProcessed = 0;
     let recordsCreated = 0;
@@ -452,99 +749,84 @@ export class HCPSyncService {
     }).returning();
 
     try {
-      const endDate = new Date();
-      endDate.setHours(23, 59, 59, 999);
-
-      const startDate = new Date();
-      startDate.setDate(startDate.getDate() - daysBack);
-      startDate.setHours(0, 0, 0, 0);
-
-      // Process each day
-      const currentDate = new Date(startDate);
-      while (currentDate <= endDate) {
-        const dayStart = new Date(currentDate);
-        dayStart.setHours(0, 0, 0, 0);
-        const dayEnd = new Date(currentDate);
-        dayEnd.setHours(23, 59, 59, 999);
-
-        // Get jobs for this day
-        const dayJobs = await db.query.hcpJobs.findMany({
-          where: and(
-            gte(hcpJobs.scheduledStart, dayStart),
-            lte(hcpJobs.scheduledStart, dayEnd)
-          ),
-        });
-
-        // Get estimates for this day
-        const dayEstimates = await db.query.hcpEstimates.findMany({
-          where: and(
-            gte(hcpEstimates.scheduledStart, dayStart),
-            lte(hcpEstimates.scheduledStart, dayEnd)
-          ),
-        });
-
-        // Calculate metrics
-        const jobsScheduled = dayJobs.filter(j => j.workStatus === 'scheduled').length;
-        const jobsCompleted = dayJobs.filter(j => j.workStatus === 'completed').length;
-        const jobsCancelled = dayJobs.filter(j => j.workStatus === 'cancelled').length;
-        const jobsInProgress = dayJobs.filter(j => j.workStatus === 'in_progress').length;
-
-        const revenueCompleted = dayJobs
-          .filter(j => j.workStatus === 'completed')
-          .reduce((sum, j) => sum + (j.totalAmount || 0), 0);
-        const revenueScheduled = dayJobs
-          .filter(j => j.workStatus === 'scheduled' || j.workStatus === 'in_progress')
-          .reduce((sum, j) => sum + (j.totalAmount || 0), 0);
-
-        const completedJobs = dayJobs.filter(j => j.workStatus === 'completed');
-        const averageJobValue = completedJobs.length > 0
-          ? Math.round(revenueCompleted / completedJobs.length)
-          : 0;
-
-        const estimatesSent = dayEstimates.filter(e => e.status === 'sent' || e.sentAt).length;
-        const estimatesAccepted = dayEstimates.filter(e => e.status === 'accepted').length;
-        const estimatesDeclined = dayEstimates.filter(e => e.status === 'declined').length;
-        const estimateConversionRate = estimatesSent > 0
-          ? estimatesAccepted / estimatesSent
-          : 0;
-        const estimatesValue = dayEstimates.reduce((sum, e) => sum + (e.totalAmount || 0), 0);
-
-        const emergencyJobs = dayJobs.filter(j => j.isEmergency).length;
-
-        // Upsert daily stats
-        const statsData = {
-          date: dayStart,
-          jobsScheduled,
-          jobsCompleted,
-          jobsCancelled,
-          jobsInProgress,
-          revenueCompleted,
-          revenueScheduled,
-          averageJobValue,
-          estimatesSent,
-          estimatesAccepted,
-          estimatesDeclined,
-          estimateConversionRate,
-          estimatesValue,
-          emergencyJobs,
-        };
-
-        const existing = await db.query.hcpDailyStats.findFirst({
-          where: eq(hcpDailyStats.date, dayStart),
-        });
-
-        if (existing) {
-          await db.update(hcpDailyStats)
-            .set({ ...statsData, syncedAt: new Date() })
-            .where(eq(hcpDailyStats.id, existing.id));
-          recordsUpdated++;
-        } else {
-          await db.insert(hcpDailyStats).values(statsData);
-          recordsCreated++;
-        }
-
+      const result = await db.execute(sql`
+        WITH days AS (${daysQuery}),
+        bounds AS (
+          SELECT min(day) AS first_day, max(day) + interval '1 day' AS end_day FROM days
+        ),
+        job_stats AS (
+          SELECT date_trunc('day', j.scheduled_start) AS day,
+                 count(*) FILTER (WHERE j.work_status = 'scheduled') AS jobs_scheduled,
+                 count(*) FILTER (WHERE j.work_status = 'completed') AS jobs_completed,
+                 count(*) FILTER (WHERE j.work_status = 'cancelled') AS jobs_cancelled,
+                 count(*) FILTER (WHERE j.work_status = 'in_progress') AS jobs_in_progress,
+                 coalesce(sum(j.total_amount) FILTER (WHERE j.work_status = 'completed'), 0) AS revenue_completed,
+                 coalesce(sum(j.total_amount) FILTER (WHERE j.work_status IN ('scheduled', 'in_progress')), 0) AS revenue_scheduled,
+                 count(*) FILTER (WHERE j.is_emergency) AS emergency_jobs
+            FROM hcp_jobs j, bounds b
+           WHERE j.scheduled_start >= b.first_day AND j.scheduled_start < b.end_day
+           GROUP BY 1
+        ),
+        estimate_stats AS (
+          SELECT date_trunc('day', e.scheduled_start) AS day,
+                 count(*) FILTER (WHERE e.status = 'sent' OR e.sent_at IS NOT NULL) AS estimates_sent,
+                 count(*) FILTER (WHERE e.status = 'accepted') AS estimates_accepted,
+                 count(*) FILTER (WHERE e.status = 'declined') AS estimates_declined,
+                 coalesce(sum(e.total_amount), 0) AS estimates_value
+            FROM hcp_estimates e, bounds b
+           WHERE e.scheduled_start >= b.first_day AND e.scheduled_start < b.end_day
+           GROUP BY 1
+        )
+        INSERT INTO hcp_daily_stats (
+          date, jobs_scheduled, jobs_completed, jobs_cancelled, jobs_in_progress,
+          revenue_completed, revenue_scheduled, average_job_value,
+          estimates_sent, estimates_accepted, estimates_declined,
+          estimate_conversion_rate, estimates_value, emergency_jobs, synced_at
+        )
+        SELECT d.day,
+               coalesce(js.jobs_scheduled, 0)::int,
+               coalesce(js.jobs_completed, 0)::int,
+               coalesce(js.jobs_cancelled, 0)::int,
+               coalesce(js.jobs_in_progress, 0)::int,
+               coalesce(js.revenue_completed, 0)::int,
+               coalesce(js.revenue_scheduled, 0)::int,
+               CASE WHEN coalesce(js.jobs_completed, 0) > 0
+                    THEN round(js.revenue_completed::numeric / js.jobs_completed)::int
+                    ELSE 0 END,
+               coalesce(es.estimates_sent, 0)::int,
+               coalesce(es.estimates_accepted, 0)::int,
+               coalesce(es.estimates_declined, 0)::int,
+               CASE WHEN coalesce(es.estimates_sent, 0) > 0
+                    THEN es.estimates_accepted::real / es.estimates_sent
+                    ELSE 0 END,
+               coalesce(es.estimates_value, 0)::int,
+               coalesce(js.emergency_jobs, 0)::int,
+               now()
+          FROM days d
+          LEFT JOIN job_stats js ON js.day = d.day
+          LEFT JOIN estimate_stats es ON es.day = d.day
+        ON CONFLICT (date) DO UPDATE SET
+          jobs_scheduled = excluded.jobs_scheduled,
+          jobs_completed = excluded.jobs_completed,
+          jobs_cancelled = excluded.jobs_cancelled,
+          jobs_in_progress = excluded.jobs_in_progress,
+          revenue_completed = excluded.revenue_completed,
+          revenue_scheduled = excluded.revenue_scheduled,
+          average_job_value = excluded.average_job_value,
+          estimates_sent = excluded.estimates_sent,
+          estimates_accepted = excluded.estimates_accepted,
+          estimates_declined = excluded.estimates_declined,
+          estimate_conversion_rate = excluded.estimate_conversion_rate,
+          estimates_value = excluded.estimates_value,
+          emergency_jobs = excluded.emergency_jobs,
+          synced_at = excluded.synced_at
+        RETURNING (xmax = 0) AS inserted
+      `);
+
+      for (const row of result.rows as Array<{ inserted: boolean }>) {
         recordsProcessed++;
-        currentDate.setDate(currentDate.getDate() + 1);
+        if (row.inserted) recordsCreated++;
+        else recordsUpdated++;
       }
 
       const durationMs = Date.now() - startTime;
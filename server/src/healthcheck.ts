@@ -1,6 +1,7 @@
 import { db } from '../db';
 import { sql } from 'drizzle-orm';
 import { HousecallProClient } from './housecall';
+import { hcpCache } from './hcpGateway';
 import { Logger } from './logger';
 import { getEnvSummary, type EnvSummary } from './envValidator';
 import type { Request, Response, Router } from 'express';
@@ -117,6 +118,7 @@ class HealthChecker {
         status: 'pass',
         message: 'HousecallPro API healthy',
         responseTime,
+        details: { cache: hcpCache.getStats() },
       };
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : 'Unknown error';
@@ -3,17 +3,60 @@ import {
   jobLocations,
   checkIns,
   heatMapSnapshots,
+  syncStatus,
   InsertJobLocation,
   InsertCheckIn,
   InsertHeatMapSnapshot
 } from '@shared/schema';
-import { eq, sql, and, desc, gte } from 'drizzle-orm';
+import { eq, sql, and, desc, gte, inArray } from 'drizzle-orm';
 import { Logger } from './logger';
+import { prefetchPages, chunk } from './util/pagination';
+import { HeatMapBinIndex, HeatMapBounds, HeatMapBin, binCellSize, clampZoom, MAX_BIN_ZOOM } from './heatmapBins';
 
 // Privacy offset range (roughly 100-300 meters)
 const PRIVACY_OFFSET_LAT = 0.0015; // ~165m at equator
 const PRIVACY_OFFSET_LNG = 0.0020; // Slightly more for longitude
 
+// Historical import tuning
+const IMPORT_SYNC_TYPE = 'heatmap_import';
+const IMPORT_PAGE_SIZE = 100;
+const IMPORT_PAGE_CONCURRENCY = 3;
+const IMPORT_INSERT_CHUNK_SIZE = 500;
+
+export interface HeatMapImportProgress {
+  /** 'interrupted': saved as running, but no import is running in this process */
+  status: 'idle' | 'running' | 'completed' | 'failed' | 'interrupted';
+  startDate: string | null;
+  /** Last page whose jobs are fully written */
+  page: number;
+  totalPages?: number;
+  imported: number;
+  skipped: number;
+  startedAt?: string;
+  updatedAt?: string;
+  error?: string;
+}
+
+// Binned heat map cache; job completions update it in place, the TTL ages out old jobs
+const HEAT_MAP_DAYS_BACK = 730;
+const BIN_INDEX_TTL_MS = 60 * 60 * 1000;
+
+export interface HeatMapBinsResponse {
+  zoom: number;
+  /** Cell edge length in degrees */
+  cellSize: number;
+  bins: HeatMapBin[];
+  maxIntensity: number;
+}
+
+interface ImportResult {
+  success: boolean;
+  imported: number;
+  skipped: number;
+  resumedFromPage?: number;
+  error?: string;
+}
+
 export class HeatMapService {
   // Add privacy offset to coordinates
   private addPrivacyOffset(lat: number, lng: number): { displayLat: number; displayLng: number } {
@@ -40,152 +83,274 @@ export class HeatMapService {
     return 0.2;
   }
 
-  // Import historical jobs from Housecall Pro
-  async importHistoricalJobs(apiKey: string, startDate: string = '2022-01-01'): Promise<{
-    success: boolean;
-    imported: number;
-    skipped: number;
-    error?: string
-  }> {
+  private binIndex: HeatMapBinIndex | null = null;
+  private binIndexExpiresAt = 0;
+  private binIndexLoad: Promise<HeatMapBinIndex> | null = null;
+  private activeImport: Promise<ImportResult> | null = null;
+  private importProgress: HeatMapImportProgress | null = null;
+
+  /**
+   * Import historical jobs from Housecall Pro.
+   *
+   * Pages are prefetched with bounded concurrency, deduped against existing
+   * job IDs with one query per page and written with multi-row
+   * `ON CONFLICT DO NOTHING` inserts. A checkpoint is saved after every page,
+   * so an interrupted import for the same start date resumes where it
+   * stopped. Concurrent calls join the import already in progress.
+   */
+  importHistoricalJobs(apiKey: string, startDate: string = '2022-01-01'): Promise<ImportResult> {
+    if (!this.activeImport) {
+      this.importProgress = { status: 'running', startDate, page: 0, imported: 0, skipped: 0 };
+      this.activeImport = this.runImport(apiKey, startDate).finally(() => {
+        this.activeImport = null;
+        // runImport rejects only if the checkpoint couldn't be read
+        if (this.importProgress?.status === 'running') {
+          this.importProgress.status = 'failed';
+        }
+      });
+    }
+    return this.activeImport;
+  }
+
+  // Progress of the running import, or the last saved checkpoint
+  async getImportProgress(): Promise<HeatMapImportProgress> {
+    if (this.activeImport && this.importProgress) {
+      return { ...this.importProgress };
+    }
+
+    const checkpoint = await this.loadImportCheckpoint();
+    if (!checkpoint) {
+      return { status: 'idle', startDate: null, page: 0, imported: 0, skipped: 0 };
+    }
+    // The process died mid-import; the next import call resumes from this checkpoint
+    if (checkpoint.status === 'running') {
+      return { ...checkpoint, status: 'interrupted' };
+    }
+    return checkpoint;
+  }
+
+  private async runImport(apiKey: string, startDate: string): Promise<ImportResult> {
     Logger.info('[HeatMap] Starting historical job import...');
 
-    let imported = 0;
-    let skipped = 0;
-    let page = 1;
-    const pageSize = 100;
+    // Resume an unfinished import for the same start date
+    const checkpoint = await this.loadImportCheckpoint();
+    const resume = checkpoint && checkpoint.status !== 'completed' && checkpoint.startDate === startDate;
+
+    const progress: HeatMapImportProgress = {
+      status: 'running',
+      startDate,
+      page: resume ? checkpoint.page : 0,
+      totalPages: resume ? checkpoint.totalPages : undefined,
+      imported: resume ? checkpoint.imported : 0,
+      skipped: resume ? checkpoint.skipped : 0,
+      startedAt: resume && checkpoint.startedAt ? checkpoint.startedAt : new Date().toISOString(),
+    };
+    this.importProgress = progress;
 
-    try {
-      while (true) {
-        // Fetch jobs from Housecall Pro API
-        const url = new URL('https://api.housecallpro.com/jobs');
-        url.searchParams.append('page', page.toString());
-        url.searchParams.append('page_size', pageSize.toString());
-        url.searchParams.append('sort_direction', 'desc');
-        url.searchParams.append('scheduled_start_min', startDate);
-
-        const response = await fetch(url.toString(), {
-          headers: {
-            'Authorization': `Bearer ${apiKey}`,
-            'Content-Type': 'application/json',
-          },
-        });
+    if (resume) {
+      Logger.info(`[HeatMap] Resuming import after page ${progress.page} (${progress.imported} imported so far)`);
+    }
 
-        if (!response.ok) {
-          throw new Error(`API error: ${response.status}`);
-        }
+    try {
+      await this.saveImportCheckpoint(progress);
 
-        const data = await response.json();
-        const jobs = data.jobs || [];
+      const pages = prefetchPages<any>(
+        (page) => this.fetchHistoricalPage(apiKey, startDate, page),
+        { startPage: progress.page + 1, concurrency: IMPORT_PAGE_CONCURRENCY }
+      );
 
+      for await (const { page, items: jobs, totalPages } of pages) {
         if (jobs.length === 0) {
           Logger.info('[HeatMap] No more jobs to import');
           break;
         }
 
-        // Process each job
-        for (const job of jobs) {
-          try {
-            // Check job completion status (API uses 'status' field, webhooks use 'work_status')
-            const status = (job.work_status ?? job.status ?? '').toLowerCase() as string;
-            // Housecall Pro statuses: "complete rated", "complete unrated", "completed", "paid"
-            const isCompleted = status.startsWith('complete') || status === 'paid' || job.completed_on;
-
-            if (!isCompleted) {
-              skipped++;
-              Logger.debug(`[HeatMap] Skipping job ${job.id}: not completed (status: ${job.status || job.work_status})`);
-              continue;
-            }
-
-            if (!job.address) {
-              skipped++;
-              Logger.debug(`[HeatMap] Skipping job ${job.id}: no address`);
-              continue;
-            }
-
-            // Check if job already exists
-            const existing = await db.select()
-              .from(jobLocations)
-              .where(eq(jobLocations.jobId, job.id))
-              .limit(1);
-
-            if (existing.length > 0) {
-              skipped++;
-              continue;
-            }
-
-            // Get coordinates (either from API or geocode address)
-            let lat = job.address.latitude;
-            let lng = job.address.longitude;
-
-            if (!lat || !lng) {
-              // Skip if no coordinates available
-              skipped++;
-              Logger.debug(`[HeatMap] Skipping job ${job.id}: no coordinates (lat: ${lat}, lng: ${lng})`);
-              continue;
-            }
-
-            // Add privacy offset
-            const { displayLat, displayLng } = this.addPrivacyOffset(lat, lng);
-
-            // Calculate intensity based on job date
-            const jobDate = new Date(job.scheduled_end || job.scheduled_start || job.created_at);
-            const intensity = this.calculateIntensity(jobDate);
-
-            // Insert job location
-            await db.insert(jobLocations).values({
-              jobId: job.id,
-              customerId: job.customer?.id,
-              latitude: lat,
-              longitude: lng,
-              displayLat,
-              displayLng,
-              city: job.address.city,
-              state: job.address.state,
-              serviceType: job.description || 'General Service',
-              jobDate,
-              source: 'historical',
-              intensity,
-              isActive: true,
-            });
-
-            imported++;
-
-            // Log progress every 50 jobs
-            if (imported % 50 === 0) {
-              Logger.info(`[HeatMap] Imported ${imported} jobs so far...`);
-            }
-          } catch (error) {
-            Logger.error('[HeatMap] Error processing job:', error as any);
-            skipped++;
-          }
-        }
+        const result = await this.importJobPage(jobs);
+        progress.imported += result.imported;
+        progress.skipped += result.skipped;
+        progress.page = page;
+        progress.totalPages = totalPages;
+        await this.saveImportCheckpoint(progress);
+
+        Logger.info(`[HeatMap] Page ${page}${totalPages ? `/${totalPages}` : ''}: ${progress.imported} imported, ${progress.skipped} skipped so far`);
 
-        // Check if there are more pages
-        if (jobs.length < pageSize) {
+        // A short page is the last one when the total isn't reported
+        if (!totalPages && jobs.length < IMPORT_PAGE_SIZE) {
           break;
         }
-
-        page++;
       }
 
-      Logger.info(`[HeatMap] Import complete: ${imported} imported, ${skipped} skipped`);
+      progress.status = 'completed';
+      await this.saveImportCheckpoint(progress);
+      this.invalidateHeatMapBins();
+      Logger.info(`[HeatMap] Import complete: ${progress.imported} imported, ${progress.skipped} skipped`);
 
       return {
         success: true,
-        imported,
-        skipped
+        imported: progress.imported,
+        skipped: progress.skipped,
+        resumedFromPage: resume ? checkpoint.page + 1 : undefined,
       };
     } catch (error) {
       Logger.error('[HeatMap] Historical import failed:', error as any);
+      progress.status = 'failed';
+      progress.error = error instanceof Error ? error.message : 'Unknown error';
+      await this.saveImportCheckpoint(progress).catch(() => undefined);
+
       return {
         success: false,
-        imported,
-        skipped,
-        error: error instanceof Error ? error.message : 'Unknown error'
+        imported: progress.imported,
+        skipped: progress.skipped,
+        error: progress.error,
       };
     }
   }
 
+  private async fetchHistoricalPage(apiKey: string, startDate: string, page: number): Promise<{ items: any[]; totalPages?: number }> {
+    // Ascending order keeps earlier pages stable while new jobs are added, so checkpoints stay valid
+    const url = new URL('https://api.housecallpro.com/jobs');
+    url.searchParams.append('page', page.toString());
+    url.searchParams.append('page_size', IMPORT_PAGE_SIZE.toString());
+    url.searchParams.append('sort_direction', 'asc');
+    url.searchParams.append('scheduled_start_min', startDate);
+
+    const response = await fetch(url.toString(), {
+      headers: {
+        'Authorization': `Bearer ${apiKey}`,
+        'Content-Type': 'application/json',
+      },
+    });
+
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`);
+    }
+
+    const data = await response.json();
+    return { items: data.jobs || [], totalPages: data.total_pages };
+  }
+
+  // Turn one page of HCP jobs into job_locations rows and insert the new ones
+  private async importJobPage(jobs: any[]): Promise<{ imported: number; skipped: number }> {
+    let skipped = 0;
+    const rows = new Map<string, InsertJobLocation>();
+
+    for (const job of jobs) {
+      // Check job completion status (API uses 'status' field, webhooks use 'work_status')
+      const status = (job.work_status ?? job.status ?? '').toLowerCase() as string;
+      // Housecall Pro statuses: "complete rated", "complete unrated", "completed", "paid"
+      const isCompleted = status.startsWith('complete') || status === 'paid' || job.completed_on;
+
+      if (!isCompleted) {
+        skipped++;
+        Logger.debug(`[HeatMap] Skipping job ${job.id}: not completed (status: ${job.status || job.work_status})`);
+        continue;
+      }
+
+      if (!job.address) {
+        skipped++;
+        Logger.debug(`[HeatMap] Skipping job ${job.id}: no address`);
+        continue;
+      }
+
+      const lat = job.address.latitude;
+      const lng = job.address.longitude;
+
+      if (!lat || !lng) {
+        // Skip if no coordinates available
+        skipped++;
+        Logger.debug(`[HeatMap] Skipping job ${job.id}: no coordinates (lat: ${lat}, lng: ${lng})`);
+        continue;
+      }
+
+      if (rows.has(job.id)) {
+        skipped++;
+        continue;
+      }
+
+      // Add privacy offset
+      const { displayLat, displayLng } = this.addPrivacyOffset(lat, lng);
+
+      // Calculate intensity based on job date
+      const jobDate = new Date(job.scheduled_end || job.scheduled_start || job.created_at);
+
+      rows.set(job.id, {
+        jobId: job.id,
+        customerId: job.customer?.id,
+        latitude: lat,
+        longitude: lng,
+        displayLat,
+        displayLng,
+        city: job.address.city,
+        state: job.address.state,
+        serviceType: job.description || 'General Service',
+        jobDate,
+        source: 'historical',
+        intensity: this.calculateIntensity(jobDate),
+        isActive: true,
+      });
+    }
+
+    if (rows.size === 0) {
+      return { imported: 0, skipped };
+    }
+
+    // One lookup for the whole page instead of a SELECT per job
+    const existing = await db.select({ jobId: jobLocations.jobId })
+      .from(jobLocations)
+      .where(inArray(jobLocations.jobId, Array.from(rows.keys())));
+
+    for (const { jobId } of existing) {
+      if (rows.delete(jobId)) skipped++;
+    }
+
+    let imported = 0;
+    for (const batch of chunk(Array.from(rows.values()), IMPORT_INSERT_CHUNK_SIZE)) {
+      // ON CONFLICT covers jobs inserted by a webhook since the lookup above
+      const inserted = await db.insert(jobLocations)
+        .values(batch)
+        .onConflictDoNothing({ target: jobLocations.jobId })
+        .returning({ id: jobLocations.id });
+
+      imported += inserted.length;
+      skipped += batch.length - inserted.length;
+    }
+
+    return { imported, skipped };
+  }
+
+  private async loadImportCheckpoint(): Promise<HeatMapImportProgress | null> {
+    const [row] = await db.select()
+      .from(syncStatus)
+      .where(eq(syncStatus.syncType, IMPORT_SYNC_TYPE))
+      .limit(1);
+
+    if (!row?.checkpoint) return null;
+    return row.checkpoint as HeatMapImportProgress;
+  }
+
+  private async saveImportCheckpoint(progress: HeatMapImportProgress): Promise<void> {
+    progress.updatedAt = new Date().toISOString();
+    const checkpoint = { ...progress };
+
+    await db.insert(syncStatus).values({
+      syncType: IMPORT_SYNC_TYPE,
+      status: progress.status,
+      lastSyncAt: new Date(),
+      recordsProcessed: progress.imported,
+      error: progress.error ?? null,
+      checkpoint,
+    }).onConflictDoUpdate({
+      target: syncStatus.syncType,
+      set: {
+        status: progress.status,
+        lastSyncAt: new Date(),
+        recordsProcessed: progress.imported,
+        error: progress.error ?? null,
+        checkpoint,
+      }
+    });
+  }
+
   // Process job completion webhook
   async processJobCompletion(job: any): Promise<void> {
     try {
@@ -215,7 +380,7 @@ export class HeatMapService {
       // Job just completed, so full intensity
       const jobDate = new Date(job.scheduled_end || job.scheduled_start || new Date());
 
-      // Insert job location
+      // Insert job location (a concurrent import may have just written it)
       const [jobLocation] = await db.insert(jobLocations).values({
         jobId: job.id,
         customerId: job.customer?.id,
@@ -230,7 +395,12 @@ export class HeatMapService {
         source: 'webhook',
         intensity: 1.0, // Recent job = full intensity
         isActive: true,
-      }).returning();
+      }).onConflictDoNothing({ target: jobLocations.jobId }).returning();
+
+      if (!jobLocation) {
+        Logger.info('[HeatMap] Job location already exists:', job.id);
+        return;
+      }
 
       // Create check-in entry
       await db.insert(checkIns).values({
@@ -247,6 +417,9 @@ export class HeatMapService {
         isVisible: true,
       });
 
+      // Only the cells containing this job change
+      this.binIndex?.addPoint(displayLat, displayLng, jobLocation.intensity);
+
       Logger.info(`[HeatMap] Added job location: ${job.id} in ${job.address.city}`);
     } catch (error) {
       Logger.error('[HeatMap] Error processing job completion:', error as any);
@@ -283,6 +456,76 @@ export class HeatMapService {
     }));
   }
 
+  /**
+   * Aggregated heat map cells for a map zoom level, optionally limited to a
+   * viewport. The bin count depends on the viewport, not on job history.
+   */
+  async getHeatMapBins(zoom: number, bounds?: HeatMapBounds): Promise<HeatMapBinsResponse> {
+    const level = clampZoom(zoom);
+    const index = await this.getBinIndex();
+    const bins = index.query(level, bounds);
+
+    return {
+      zoom: level,
+      cellSize: binCellSize(level),
+      bins,
+      maxIntensity: bins.reduce((max, bin) => Math.max(max, bin.intensity), 0),
+    };
+  }
+
+  // Drop the binned cache so the next request re-aggregates from the database
+  invalidateHeatMapBins(): void {
+    this.binIndex = null;
+    this.binIndexExpiresAt = 0;
+  }
+
+  private async getBinIndex(): Promise<HeatMapBinIndex> {
+    if (this.binIndex && this.binIndexExpiresAt > Date.now()) {
+      return this.binIndex;
+    }
+
+    if (!this.binIndexLoad) {
+      this.binIndexLoad = this.loadBinIndex()
+        .then(index => {
+          this.binIndex = index;
+          this.binIndexExpiresAt = Date.now() + BIN_INDEX_TTL_MS;
+          return index;
+        })
+        .finally(() => {
+          this.binIndexLoad = null;
+        });
+    }
+    return this.binIndexLoad;
+  }
+
+  // Aggregate active job locations into the finest grid in one query
+  private async loadBinIndex(): Promise<HeatMapBinIndex> {
+    const startTime = Date.now();
+    const cellSize = binCellSize(MAX_BIN_ZOOM);
+    const cutoffDate = new Date();
+    cutoffDate.setDate(cutoffDate.getDate() - HEAT_MAP_DAYS_BACK);
+
+    const cells = await db.select({
+      row: sql<number>`floor(${jobLocations.displayLat} / ${cellSize})`.mapWith(Number),
+      col: sql<number>`floor(${jobLocations.displayLng} / ${cellSize})`.mapWith(Number),
+      count: sql<number>`count(*)`.mapWith(Number),
+      intensity: sql<number>`sum(${jobLocations.intensity})`.mapWith(Number),
+      latSum: sql<number>`sum(${jobLocations.displayLat})`.mapWith(Number),
+      lngSum: sql<number>`sum(${jobLocations.displayLng})`.mapWith(Number),
+    })
+      .from(jobLocations)
+      .where(
+        and(
+          eq(jobLocations.isActive, true),
+          gte(jobLocations.jobDate, cutoffDate)
+        )
+      )
+      .groupBy(sql`1`, sql`2`);
+
+    Logger.info(`[HeatMap] Binned ${cells.length} cells in ${Date.now() - startTime}ms`);
+    return new HeatMapBinIndex(cells);
+  }
+
   // Get recent check-ins for activity feed
   async getRecentCheckIns(limit: number = 20): Promise<any[]> {
     const checkInsData = await db.select()
@@ -294,25 +537,33 @@ export class HeatMapService {
     return checkInsData;
   }
 
-  // Update job intensities based on age
-  async updateIntensities(): Promise<void> {
+  // Update job intensities based on age, in one statement (mirrors calculateIntensity)
+  async updateIntensities(): Promise<number> {
     Logger.info('[HeatMap] Updating job intensities...');
 
-    const jobs = await db.select()
-      .from(jobLocations)
-      .where(eq(jobLocations.isActive, true));
-
-    for (const job of jobs) {
-      const newIntensity = this.calculateIntensity(job.jobDate);
-
-      if (Math.abs(newIntensity - job.intensity) > 0.05) {
-        await db.update(jobLocations)
-          .set({ intensity: newIntensity })
-          .where(eq(jobLocations.id, job.id));
-      }
+    const ageDays = sql`extract(epoch from (now() - ${jobLocations.jobDate})) / 86400`;
+    const newIntensity = sql<number>`CASE
+      WHEN ${ageDays} <= 7 THEN 1.0
+      WHEN ${ageDays} <= 30 THEN 0.8
+      WHEN ${ageDays} <= 90 THEN 0.5
+      WHEN ${ageDays} <= 180 THEN 0.3
+      ELSE 0.2
+    END`;
+
+    const updated = await db.update(jobLocations)
+      .set({ intensity: newIntensity })
+      .where(and(
+        eq(jobLocations.isActive, true),
+        sql`abs(${newIntensity} - ${jobLocations.intensity}) > 0.05`
+      ))
+      .returning({ id: jobLocations.id });
+
+    if (updated.length > 0) {
+      this.invalidateHeatMapBins();
     }
 
-    Logger.info('[HeatMap] Intensity update complete');
+    Logger.info(`[HeatMap] Intensity update complete: ${updated.length} locations changed`);
+    return updated.length;
   }
 
   // Generate and save heat map snapshot
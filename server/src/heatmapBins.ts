@@ -0,0 +1,145 @@
+// Zoom-aware spatial binning for the service heat map
+//
+// Points are binned once into a fine lat/lng grid. Coarser zoom levels are
+// derived from it in memory: each level doubles the cell size, so a fine cell
+// belongs to exactly one cell per coarser level (a quadtree-style hierarchy).
+// Responses stay proportional to the viewport, not to the job history.
+
+export const MIN_BIN_ZOOM = 3;
+// ~120m cells at the finest level, close to the privacy offset on job locations
+export const MAX_BIN_ZOOM = 13;
+// 256px map tiles split into 16px cells
+const CELLS_PER_TILE = 16;
+
+export interface HeatMapBin {
+  lat: number;
+  lng: number;
+  count: number;
+  /** Summed intensity of the points in the cell */
+  intensity: number;
+}
+
+export interface HeatMapBounds {
+  west: number;
+  south: number;
+  east: number;
+  north: number;
+}
+
+/** One aggregated cell at the finest zoom, as loaded from the database */
+export interface HeatMapCell {
+  row: number;
+  col: number;
+  count: number;
+  intensity: number;
+  latSum: number;
+  lngSum: number;
+}
+
+interface CellAccumulator {
+  count: number;
+  intensity: number;
+  latSum: number;
+  lngSum: number;
+}
+
+export function clampZoom(zoom: number): number {
+  if (!Number.isFinite(zoom)) return MIN_BIN_ZOOM;
+  return Math.min(MAX_BIN_ZOOM, Math.max(MIN_BIN_ZOOM, Math.round(zoom)));
+}
+
+/** Cell size in degrees for a zoom level */
+export function binCellSize(zoom: number): number {
+  return 360 / (2 ** clampZoom(zoom)) / CELLS_PER_TILE;
+}
+
+export class HeatMapBinIndex {
+  private levels: Map<number, Map<string, CellAccumulator>> = new Map();
+
+  constructor(cells: HeatMapCell[] = []) {
+    const finest = new Map<string, CellAccumulator>();
+    for (const cell of cells) {
+      finest.set(`${cell.row}:${cell.col}`, {
+        count: cell.count,
+        intensity: cell.intensity,
+        latSum: cell.latSum,
+        lngSum: cell.lngSum,
+      });
+    }
+    this.levels.set(MAX_BIN_ZOOM, finest);
+  }
+
+  /**
+   * Bins for `zoom` whose centroid falls inside `bounds` (all bins if omitted).
+   */
+  query(zoom: number, bounds?: HeatMapBounds): HeatMapBin[] {
+    const bins: HeatMapBin[] = [];
+    for (const cell of this.level(clampZoom(zoom)).values()) {
+      const lat = cell.latSum / cell.count;
+      const lng = cell.lngSum / cell.count;
+      if (bounds && (lat < bounds.south || lat > bounds.north || lng < bounds.west || lng > bounds.east)) {
+        continue;
+      }
+      bins.push({
+        lat: Number(lat.toFixed(5)),
+        lng: Number(lng.toFixed(5)),
+        count: cell.count,
+        intensity: Number(cell.intensity.toFixed(3)),
+      });
+    }
+    return bins;
+  }
+
+  /**
+   * Fold a new point into its cell at every level built so far, so a job
+   * completion only touches the cells it falls in.
+   */
+  addPoint(lat: number, lng: number, intensity: number): void {
+    const cellSize = binCellSize(MAX_BIN_ZOOM);
+    const row = Math.floor(lat / cellSize);
+    const col = Math.floor(lng / cellSize);
+
+    for (const [zoom, cells] of this.levels) {
+      // Derive coarser keys from the fine cell, exactly as level() merges them
+      const factor = 2 ** (MAX_BIN_ZOOM - zoom);
+      const key = `${Math.floor(row / factor)}:${Math.floor(col / factor)}`;
+      const cell = cells.get(key);
+      if (cell) {
+        cell.count++;
+        cell.intensity += intensity;
+        cell.latSum += lat;
+        cell.lngSum += lng;
+      } else {
+        cells.set(key, { count: 1, intensity, latSum: lat, lngSum: lng });
+      }
+    }
+  }
+
+  get size(): number {
+    return this.levels.get(MAX_BIN_ZOOM)!.size;
+  }
+
+  private level(zoom: number): Map<string, CellAccumulator> {
+    const existing = this.levels.get(zoom);
+    if (existing) return existing;
+
+    // floor(x / (c * 2^k)) === floor(floor(x / c) / 2^k), so merging fine cells is exact
+    const factor = 2 ** (MAX_BIN_ZOOM - zoom);
+    const merged = new Map<string, CellAccumulator>();
+    for (const [key, cell] of this.levels.get(MAX_BIN_ZOOM)!) {
+      const [row, col] = key.split(':').map(Number);
+      const parentKey = `${Math.floor(row / factor)}:${Math.floor(col / factor)}`;
+      const parent = merged.get(parentKey);
+      if (parent) {
+        parent.count += cell.count;
+        parent.intensity += cell.intensity;
+        parent.latSum += cell.latSum;
+        parent.lngSum += cell.lngSum;
+      } else {
+        merged.set(parentKey, { ...cell });
+      }
+    }
+    this.levels.set(zoom, merged);
+    return merged;
+  }
+}
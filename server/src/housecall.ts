@@ -1,4 +1,6 @@
 import { Logger } from './logger';
+import { hcpCache, invalidateForWrite } from './hcpGateway';
+import { getCorrelationId, normalizeEndpoint, trackDependency } from './observability/tracing';
 
 const HCP_API_BASE = process.env.HCP_API_BASE || 'https://api.housecallpro.com';
 const API_KEY = process.env.HCP_COMPANY_API_KEY || process.env.HOUSECALL_PRO_API_KEY;
@@ -40,7 +42,6 @@ interface HCPJob {
 
 export class HousecallProClient {
   private static instance: HousecallProClient;
-  private cache: Map<string, { data: any; expires: number }> = new Map();
   private circuitBreakerState: 'closed' | 'open' | 'half-open' = 'closed';
   private failureCount = 0;
   private lastFailureTime = 0;
@@ -97,7 +98,29 @@ export class HousecallProClient {
   async callAPI<T>(
     endpoint: string,
     params: Record<string, any> = {},
-    options: RetryOptions & { method?: string; body?: any } = {}
+    options: RetryOptions & { method?: string; body?: any; cache?: boolean } = {}
+  ): Promise<T> {
+    const method = options.method || 'GET';
+
+    // GETs are served from the shared HCP cache; writes invalidate it.
+    // `cache: false` is for bulk reads (sync pages) that must be fresh and
+    // shouldn't evict the hot keys.
+    if (method === 'GET') {
+      if (options.cache === false) {
+        return this.request<T>(endpoint, params, options);
+      }
+      return hcpCache.get<T>(endpoint, params, () => this.request<T>(endpoint, params, options));
+    }
+
+    const result = await this.request<T>(endpoint, params, options);
+    invalidateForWrite(endpoint);
+    return result;
+  }
+
+  private async request<T>(
+    endpoint: string,
+    params: Record<string, any>,
+    options: RetryOptions & { method?: string; body?: any }
   ): Promise<T> {
     const {
       maxRetries = 3,
@@ -108,17 +131,13 @@ export class HousecallProClient {
       body
     } = options;
 
-    // Check circuit breaker
-    this.checkCircuitBreaker();
-
-    // Only cache GET requests
-    const cacheKey = `${method}:${endpoint}:${JSON.stringify(params)}`;
-    if (method === 'GET') {
-      const cached = this.cache.get(cacheKey);
-      if (cached && cached.expires > Date.now()) {
-        Logger.debug('Cache hit', { endpoint, cacheHit: true });
-        return cached.data;
-      }
+    // Check circuit breaker (an open breaker is reported as 503 so the
+    // shared cache can fall back to a stale response)
+    try {
+      this.checkCircuitBreaker();
+    } catch (error) {
+      (error as any).status = 503;
+      throw error;
     }
 
     // FAIL FAST if no API key is configured - never serve mock data in production
@@ -129,6 +148,7 @@ export class HousecallProClient {
     }
 
     let lastError: Error | null = null;
+    let lastStatus: number | undefined;
     let delay = initialDelay;
 
     for (let attempt = 0; attempt <= maxRetries; attempt++) {
@@ -166,9 +186,15 @@ export class HousecallProClient {
           fetchOptions.body = JSON.stringify(body);
         }
 
-        const response = await fetch(url.toString(), fetchOptions);
+        const response = await trackDependency(
+          'hcp',
+          `${method} ${normalizeEndpoint(endpoint)}`,
+          () => fetch(url.toString(), fetchOptions),
+          res => res.ok
+        );
 
         const latency = Date.now() - startTime;
+        lastStatus = response.status;
 
         if (response.status === 429) {
           // Rate limit - extract retry-after header
@@ -221,18 +247,9 @@ export class HousecallProClient {
 
         const data = await response.json();
 
-        // Only cache GET requests
-        if (method === 'GET') {
-          // Cache for 5 minutes + random jitter to prevent thundering herd
-          const cacheTime = 300000 + Math.random() * 60000; // 5-6 minutes
-          this.cache.set(cacheKey, {
-            data,
-            expires: Date.now() + cacheTime,
-          });
-        }
-
         Logger.info('API call successful', {
           requestId,
+          correlationId: getCorrelationId(),
           endpoint,
           method,
           latency,
@@ -247,6 +264,7 @@ export class HousecallProClient {
 
         Logger.error(`API call failed (attempt ${attempt + 1}/${maxRetries + 1})`, {
           requestId,
+          correlationId: getCorrelationId(),
           endpoint,
           error: lastError.message,
           attempt,
@@ -266,7 +284,9 @@ export class HousecallProClient {
     });
 
     // NO FAKE DATA - Throw error instead of returning mock data
-    throw new Error(`API call failed after ${maxRetries} retries: ${lastError?.message}`);
+    const failure = new Error(`API call failed after ${maxRetries} retries: ${lastError?.message}`);
+    (failure as any).status = lastStatus;
+    throw failure;
   }
 
   async getEmployees(): Promise<HCPEmployee[]> {
@@ -283,31 +303,39 @@ export class HousecallProClient {
 
   async getBookingWindows(date: string): Promise<HCPBookingWindow[]> {
     try {
-      Logger.debug(`[HousecallProClient] Getting booking windows for date: ${date}`);
-      const data = await this.callAPI<{ booking_windows: HCPBookingWindow[] }>(
-        '/company/schedule_availability/booking_windows',
-        {
-          start_date: date,
-          end_date: date,
-        }
-      );
-      Logger.debug(`[HousecallProClient] Booking windows response: ${JSON.stringify(data.booking_windows)}`);
-      Logger.debug(`[HousecallProClient] First window available? ${data.booking_windows?.[0]?.available}`);
-
-      const windows = data.booking_windows || [];
-
-      // Log availability summary
-      const availableCount = windows.filter(w => w.available).length;
-      Logger.debug(`[HousecallProClient] ${availableCount} of ${windows.length} windows are available`);
-
-      // NO FAKE DATA - Return exactly what the API gives us
-      return windows;
+      return await this.fetchBookingWindows(date);
     } catch (error) {
       Logger.error('Failed to fetch booking windows', { error: (error as Error).message, date });
       return []; // Graceful degradation - show no slots instead of crashing
     }
   }
 
+  /**
+   * Like getBookingWindows, but rethrows HCP errors. For the capacity
+   * snapshot, where an empty list would be cached as "fully booked".
+   */
+  async fetchBookingWindows(date: string): Promise<HCPBookingWindow[]> {
+    Logger.debug(`[HousecallProClient] Getting booking windows for date: ${date}`);
+    const data = await this.callAPI<{ booking_windows: HCPBookingWindow[] }>(
+      '/company/schedule_availability/booking_windows',
+      {
+        start_date: date,
+        end_date: date,
+      }
+    );
+    Logger.debug(`[HousecallProClient] Booking windows response: ${JSON.stringify(data.booking_windows)}`);
+    Logger.debug(`[HousecallProClient] First window available? ${data.booking_windows?.[0]?.available}`);
+
+    const windows = data.booking_windows || [];
+
+    // Log availability summary
+    const availableCount = windows.filter(w => w.available).length;
+    Logger.debug(`[HousecallProClient] ${availableCount} of ${windows.length} windows are available`);
+
+    // NO FAKE DATA - Return exactly what the API gives us
+    return windows;
+  }
+
   async getJobs(params: {
     scheduled_start_min?: string;
     scheduled_start_max?: string;
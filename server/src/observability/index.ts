@@ -4,6 +4,8 @@
  * Unified initialization and exports for the complete observability stack:
  * - Sentry error tracking
  * - Prometheus metrics collection
+ * - Request tracing with correlation IDs
+ * - On-demand CPU profiles and heap snapshots
  * - Uptime monitoring
  * - Alerting system
  */
@@ -32,6 +34,8 @@ export {
   metricsMiddleware,
   recordDbQuery,
   recordExternalCall,
+  recordRequestBreakdown,
+  recordMcpToolCall,
   recordBookingAttempt,
   updateCapacityState,
   getMetrics,
@@ -42,6 +46,27 @@ export {
   type MetricsSummary,
 } from './metrics';
 
+// Tracing exports
+export {
+  tracingMiddleware,
+  trackDependency,
+  tracedFetch,
+  runWithTrace,
+  getTrace,
+  getCorrelationId,
+  getTraceBreakdown,
+  normalizeEndpoint,
+  type Dependency,
+  type RequestTrace,
+} from './tracing';
+
+// Profiler exports
+export {
+  captureCpuProfile,
+  captureHeapSnapshot,
+  isProfilerBusy,
+} from './profiler';
+
 // Uptime exports
 export {
   uptimeRouter,
@@ -74,6 +99,7 @@ export {
 // Import for unified initialization
 import { initSentry, sentryErrorHandler, sentryRequestContext } from './sentry';
 import { metricsMiddleware, startMetricsCollection, createMetricsRouter } from './metrics';
+import { tracingMiddleware } from './tracing';
 import { uptimeRouter, startSelfMonitoring, registerHealthCheck } from './uptime';
 import { startAlertMonitor } from './alerts';
 import { db } from '../../db';
@@ -100,7 +126,8 @@ export function initObservability(app: Express): void {
     // 2. Add Sentry request context middleware (early to track all requests)
     app.use(sentryRequestContext());
 
-    // 3. Add metrics middleware (must be early to capture all requests)
+    // 3. Add tracing and metrics middleware (must be early to capture all requests)
+    app.use(tracingMiddleware());
     app.use(metricsMiddleware());
 
     // 4. Register health check endpoints
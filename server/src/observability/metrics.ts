@@ -7,6 +7,8 @@
  * - Active connection tracking
  * - Database query metrics
  * - External API call metrics
+ * - Per-request time breakdown by dependency (db, hcp, openai, app)
+ * - MCP tool latency
  * - Memory and event loop monitoring
  */
 
@@ -77,6 +79,25 @@ const externalApiTotal = new Counter({
   registers: [register],
 });
 
+// Where request time goes: each finished request observes its time in every
+// dependency plus the remainder spent in our own code ('app')
+const requestDependencyDuration = new Histogram({
+  name: 'http_request_dependency_duration_seconds',
+  help: 'Time spent per HTTP request in each dependency, in seconds',
+  labelNames: ['route', 'dependency'],
+  buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+  registers: [register],
+});
+
+// MCP tool metrics
+const mcpToolDuration = new Histogram({
+  name: 'mcp_tool_duration_seconds',
+  help: 'Duration of MCP tool calls in seconds',
+  labelNames: ['tool', 'success'],
+  buckets: [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+  registers: [register],
+});
+
 // Event loop lag gauge
 const eventLoopLag = new Gauge({
   name: 'event_loop_lag_seconds',
@@ -158,7 +179,7 @@ function addSample(arr: MetricSample[], value: number): void {
 /**
  * Normalize route path for metrics (avoid high cardinality)
  */
-function normalizeRoute(path: string): string {
+export function normalizeRoute(path: string): string {
   return path
     // Replace UUIDs
     .replace(/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}/gi, ':id')
@@ -243,6 +264,22 @@ export function recordExternalCall(
   addSample(inMemoryMetrics.externalApiLatencies.get(key)!, durationMs);
 }
 
+/**
+ * Record how a finished request's time split across dependencies
+ */
+export function recordRequestBreakdown(route: string, breakdownMs: Record<string, number>): void {
+  for (const [dependency, durationMs] of Object.entries(breakdownMs)) {
+    requestDependencyDuration.observe({ route, dependency }, durationMs / 1000);
+  }
+}
+
+/**
+ * Record MCP tool call metrics
+ */
+export function recordMcpToolCall(tool: string, durationMs: number, success: boolean): void {
+  mcpToolDuration.observe({ tool, success: String(success) }, durationMs / 1000);
+}
+
 /**
  * Record booking attempt
  */
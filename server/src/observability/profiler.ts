@@ -0,0 +1,82 @@
+/**
+ * On-demand Profiling
+ *
+ * Provides:
+ * - CPU profiles captured through the inspector for a bounded duration
+ *   (load the .cpuprofile in Chrome DevTools or speedscope)
+ * - V8 heap snapshots written to the temp directory
+ *
+ * Only one capture runs at a time; both are exposed to admins only.
+ */
+
+import { Session } from 'inspector';
+import { writeHeapSnapshot } from 'v8';
+import { tmpdir } from 'os';
+import { join } from 'path';
+import { Logger } from '../logger';
+
+export const MAX_CPU_PROFILE_MS = 60 * 1000;
+
+let busy = false;
+
+export function isProfilerBusy(): boolean {
+  return busy;
+}
+
+function post<T = any>(session: Session, method: string, params?: object): Promise<T> {
+  return new Promise((resolve, reject) => {
+    session.post(method, params ?? {}, (error, result) => {
+      if (error) reject(error);
+      else resolve(result as T);
+    });
+  });
+}
+
+/**
+ * Sample the CPU for `durationMs` and return the profile in .cpuprofile format
+ */
+export async function captureCpuProfile(durationMs: number): Promise<object> {
+  if (busy) {
+    throw new Error('A profile capture is already in progress');
+  }
+  busy = true;
+
+  const duration = Math.min(Math.max(durationMs, 1000), MAX_CPU_PROFILE_MS);
+  const session = new Session();
+  session.connect();
+
+  try {
+    await post(session, 'Profiler.enable');
+    await post(session, 'Profiler.start');
+    Logger.info('CPU profile started', { durationMs: duration });
+
+    await new Promise(resolve => setTimeout(resolve, duration));
+
+    const { profile } = await post<{ profile: object }>(session, 'Profiler.stop');
+    Logger.info('CPU profile captured', { durationMs: duration });
+    return profile;
+  } finally {
+    session.disconnect();
+    busy = false;
+  }
+}
+
+/**
+ * Write a heap snapshot and return its path. Blocks the event loop while the
+ * heap is serialized, so expect a pause proportional to heap size.
+ */
+export function captureHeapSnapshot(): string {
+  if (busy) {
+    throw new Error('A profile capture is already in progress');
+  }
+  busy = true;
+
+  try {
+    const startTime = Date.now();
+    const file = writeHeapSnapshot(join(tmpdir(), `heap-${process.pid}-${Date.now()}.heapsnapshot`));
+    Logger.info('Heap snapshot written', { file, durationMs: Date.now() - startTime });
+    return file;
+  } finally {
+    busy = false;
+  }
+}
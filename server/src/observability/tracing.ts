@@ -0,0 +1,189 @@
+/**
+ * Request Tracing
+ *
+ * Provides:
+ * - A correlation ID per request (taken from X-Correlation-ID / X-Request-ID or generated)
+ * - Async-context spans so DB, HCP and OpenAI calls are attributed to the
+ *   request or MCP tool call that made them
+ * - A per-request time breakdown (db, hcp, openai, app) exported as histograms
+ * - Slow-request logging with the breakdown and correlation ID
+ */
+
+import { AsyncLocalStorage } from 'async_hooks';
+import { randomUUID } from 'crypto';
+import type { Request, Response, NextFunction, RequestHandler } from 'express';
+import { Logger } from '../logger';
+import { normalizeRoute, recordDbQuery, recordExternalCall, recordRequestBreakdown } from './metrics';
+
+export type Dependency = 'db' | 'hcp' | 'openai';
+
+export interface RequestTrace {
+  correlationId: string;
+  startedAt: number;
+  /** Milliseconds spent waiting on each dependency */
+  dependencyMs: Record<Dependency, number>;
+  dependencyCalls: Record<Dependency, number>;
+}
+
+// Service labels used for external_api_* metrics
+const EXTERNAL_SERVICES: Record<Exclude<Dependency, 'db'>, string> = {
+  hcp: 'housecall_pro',
+  openai: 'openai',
+};
+
+const SLOW_REQUEST_MS = parseInt(process.env.SLOW_REQUEST_MS || '2000', 10);
+
+const traceStorage = new AsyncLocalStorage<RequestTrace>();
+
+function createTrace(correlationId: string): RequestTrace {
+  return {
+    correlationId,
+    startedAt: Date.now(),
+    dependencyMs: { db: 0, hcp: 0, openai: 0 },
+    dependencyCalls: { db: 0, hcp: 0, openai: 0 },
+  };
+}
+
+/**
+ * The trace for the request or tool call currently executing, if any
+ */
+export function getTrace(): RequestTrace | undefined {
+  return traceStorage.getStore();
+}
+
+export function getCorrelationId(): string | undefined {
+  return traceStorage.getStore()?.correlationId;
+}
+
+/**
+ * Run `fn` under a new trace, for work that doesn't come through Express
+ * (MCP tool calls, background jobs).
+ */
+export function runWithTrace<T>(correlationId: string, fn: (trace: RequestTrace) => T): T {
+  const trace = createTrace(correlationId);
+  return traceStorage.run(trace, () => fn(trace));
+}
+
+/**
+ * Time spent in each dependency plus the remainder in our own code.
+ * Concurrent dependency calls overlap, so 'app' is floored at zero.
+ */
+export function getTraceBreakdown(trace: RequestTrace, totalMs: number): Record<Dependency | 'app', number> {
+  const waited = trace.dependencyMs.db + trace.dependencyMs.hcp + trace.dependencyMs.openai;
+  return {
+    ...trace.dependencyMs,
+    app: Math.max(0, totalMs - waited),
+  };
+}
+
+/**
+ * Collapse IDs in an upstream path so it can be used as a metric label
+ */
+export function normalizeEndpoint(path: string): string {
+  return path
+    .split('/')
+    .map(segment => (/\d/.test(segment) ? ':id' : segment))
+    .join('/') || '/';
+}
+
+/**
+ * Time a dependency call, record it in the dependency's Prometheus metrics
+ * and attribute it to the current trace.
+ */
+export async function trackDependency<T>(
+  dependency: Dependency,
+  operation: string,
+  fn: () => Promise<T>,
+  isSuccess: (result: T) => boolean = () => true
+): Promise<T> {
+  const startTime = process.hrtime.bigint();
+  let success = false;
+
+  try {
+    const result = await fn();
+    success = isSuccess(result);
+    return result;
+  } finally {
+    const durationMs = Number(process.hrtime.bigint() - startTime) / 1e6;
+
+    if (dependency === 'db') {
+      recordDbQuery(durationMs, operation, success);
+    } else {
+      recordExternalCall(EXTERNAL_SERVICES[dependency], durationMs, success, operation);
+    }
+
+    const trace = traceStorage.getStore();
+    if (trace) {
+      trace.dependencyMs[dependency] += durationMs;
+      trace.dependencyCalls[dependency]++;
+    }
+  }
+}
+
+/**
+ * Attribute time spent waiting on a call someone else started (a coalesced
+ * HCP read) to the current trace. The call itself is already counted in the
+ * dependency's metrics by whoever made it, so only the trace is updated.
+ */
+export async function traceDependencyWait<T>(dependency: Dependency, pending: Promise<T>): Promise<T> {
+  const trace = traceStorage.getStore();
+  if (!trace) return pending;
+
+  const startTime = process.hrtime.bigint();
+  try {
+    return await pending;
+  } finally {
+    trace.dependencyMs[dependency] += Number(process.hrtime.bigint() - startTime) / 1e6;
+    trace.dependencyCalls[dependency]++;
+  }
+}
+
+/**
+ * A fetch that records every call as `dependency`, labelled by method and
+ * normalized path. For SDK clients that accept a custom fetch.
+ */
+export function tracedFetch(dependency: Exclude<Dependency, 'db'>): typeof fetch {
+  return (input, init) => {
+    const request = typeof input === 'object' && 'url' in input ? input : undefined;
+    const url = new URL(request ? request.url : String(input));
+    const method = init?.method || request?.method || 'GET';
+    const operation = `${method} ${normalizeEndpoint(url.pathname)}`;
+    return trackDependency(dependency, operation, () => fetch(input, init), response => response.ok);
+  };
+}
+
+/**
+ * Express middleware that opens a trace per request and, when the response
+ * finishes, records where its time went.
+ */
+export function tracingMiddleware(): RequestHandler {
+  return (req: Request, res: Response, next: NextFunction) => {
+    const incoming = req.get('x-correlation-id') || req.get('x-request-id');
+    // Only accept caller IDs that are safe to echo back and log
+    const correlationId = incoming && /^[\w.:-]{1,128}$/.test(incoming) ? incoming : randomUUID();
+    const trace = createTrace(correlationId);
+    res.setHeader('X-Correlation-ID', correlationId);
+
+    res.on('finish', () => {
+      const totalMs = Date.now() - trace.startedAt;
+      const route = normalizeRoute(req.route?.path || req.path);
+      const breakdown = getTraceBreakdown(trace, totalMs);
+
+      recordRequestBreakdown(route, breakdown);
+
+      if (totalMs >= SLOW_REQUEST_MS) {
+        Logger.warn('Slow request', {
+          requestId: correlationId,
+          method: req.method,
+          route,
+          status: res.statusCode,
+          latency: totalMs,
+          breakdownMs: breakdown,
+          calls: trace.dependencyCalls,
+        });
+      }
+    });
+
+    traceStorage.run(trace, () => next());
+  };
+}
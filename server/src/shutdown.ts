@@ -4,6 +4,8 @@ import { stopRateLimiterCleanup } from '../lib/mcpRateLimiter';
 import { stopScheduledSmsProcessor } from '../lib/smsBookingAgent';
 import { stopChatKitCleanup } from './chatkitRoutes';
 import { stopTwilioCleanup } from '../lib/twilioWebhooks';
+import { webhookProcessor } from './webhooks';
+import { CapacitySnapshotService } from './capacitySnapshot';
 
 let isShuttingDown = false;
 
@@ -36,6 +38,12 @@ export async function gracefulShutdown(signal: string): Promise<void> {
       (global as any).__adsSyncInterval = null;
     }
     
+    console.log('[Shutdown] Stopping capacity snapshot refresh...');
+    CapacitySnapshotService.getInstance().stop();
+    
+    console.log('[Shutdown] Draining webhook queue...');
+    await webhookProcessor.drainQueue();
+    
     console.log('[Shutdown] Clearing cache...');
     shutdownCache();
     
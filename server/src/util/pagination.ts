@@ -0,0 +1,81 @@
+// Paging helpers for walking HousecallPro list endpoints
+
+export interface PageResult<T> {
+  items: T[];
+  totalPages?: number;
+}
+
+export interface PrefetchOptions {
+  /** First page to fetch (1-based, as HCP numbers them) */
+  startPage?: number;
+  /** Maximum number of page requests in flight at once */
+  concurrency?: number;
+  /** Stop after this page even if more are available */
+  maxPages?: number;
+}
+
+/**
+ * Walk a paged endpoint with bounded-concurrency prefetch.
+ *
+ * Pages are yielded strictly in order so callers can checkpoint, but up to
+ * `concurrency` later pages are already being fetched while the caller is
+ * processing the current one. When the endpoint doesn't report
+ * `totalPages`, falls back to fetching until an empty page comes back.
+ */
+export async function* prefetchPages<T>(
+  fetchPage: (page: number) => Promise<PageResult<T>>,
+  options: PrefetchOptions = {}
+): AsyncGenerator<{ page: number; items: T[]; totalPages?: number }> {
+  const { startPage = 1, concurrency = 3, maxPages = Infinity } = options;
+
+  const first = await fetchPage(startPage);
+  yield { page: startPage, items: first.items, totalPages: first.totalPages };
+
+  if (first.items.length === 0) return;
+
+  const knownTotal = first.totalPages;
+  const lastPage = Math.min(knownTotal ?? Infinity, startPage + maxPages - 1);
+  const pending = new Map<number, Promise<PageResult<T>>>();
+  let nextToFetch = startPage + 1;
+  let nextToYield = startPage + 1;
+
+  const fill = () => {
+    // Without a known total we can't safely fetch ahead of an empty page
+    const window = knownTotal === undefined ? 1 : concurrency;
+    while (pending.size < window && nextToFetch <= lastPage) {
+      const page = nextToFetch++;
+      const request = fetchPage(page);
+      // Avoid unhandled rejections for pages we haven't awaited yet
+      request.catch(() => undefined);
+      pending.set(page, request);
+    }
+  };
+
+  try {
+    while (nextToYield <= lastPage) {
+      fill();
+      const request = pending.get(nextToYield);
+      if (!request) break;
+
+      const result = await request;
+      pending.delete(nextToYield);
+      yield { page: nextToYield, items: result.items, totalPages: result.totalPages ?? knownTotal };
+
+      if (knownTotal === undefined && result.items.length === 0) break;
+      nextToYield++;
+    }
+  } finally {
+    pending.clear();
+  }
+}
+
+/**
+ * Split an array into chunks of at most `size` items.
+ */
+export function chunk<T>(items: T[], size: number): T[][] {
+  const chunks: T[][] = [];
+  for (let i = 0; i < items.length; i += size) {
+    chunks.push(items.slice(i, i + size));
+  }
+  return chunks;
+}
@@ -7,11 +7,14 @@ import {
   webhookSubscriptions,
   InsertWebhookEvent,
   InsertWebhookEventTag,
-  InsertWebhookProcessedData
+  InsertWebhookProcessedData,
+  WebhookEvent
 } from '@shared/schema';
-import { eq, and, desc, sql } from 'drizzle-orm';
+import { eq, and, desc, sql, inArray, type AnyColumn } from 'drizzle-orm';
 import crypto from 'crypto';
 import { heatMapService } from './heatmap';
+import { getHCPSyncService } from './hcpSync';
+import { invalidateForWrite } from './hcpGateway';
 
 // Event type categories for organizing webhook events
 const EVENT_CATEGORIES: Record<string, string> = {
@@ -42,7 +45,48 @@ const EVENT_CATEGORIES: Record<string, string> = {
   'lead.lost': 'lead',
 };
 
+// Durable queue settings. Events are stored as status='pending' rows in
+// webhook_events and claimed with FOR UPDATE SKIP LOCKED, so any number of
+// instances can share the work and nothing is lost on restart.
+const QUEUE_BATCH_SIZE = parseInt(process.env.WEBHOOK_QUEUE_BATCH_SIZE || '25', 10);
+const QUEUE_CONCURRENCY = parseInt(process.env.WEBHOOK_QUEUE_CONCURRENCY || '2', 10);
+// New events wake the workers directly; polling only picks up retries and other instances' work
+const QUEUE_POLL_INTERVAL_MS = 5000;
+const QUEUE_MAX_ATTEMPTS = 5;
+// A claimed event whose worker died becomes claimable again after this lease
+const QUEUE_LEASE_MS = 5 * 60 * 1000;
+const QUEUE_BASE_BACKOFF_MS = 30 * 1000;
+const QUEUE_MAX_BACKOFF_MS = 60 * 60 * 1000;
+
+function isExhausted(attempts: number): boolean {
+  return attempts >= QUEUE_MAX_ATTEMPTS;
+}
+
+type QueuedEvent = Pick<WebhookEvent, 'id' | 'eventType' | 'payload' | 'retryCount' | 'handledAt'> & {
+  /** Claimed from an expired 'processing' lease rather than from 'pending' */
+  reclaimed?: boolean;
+};
+
+// Anything with insert() - the db itself or an open transaction
+type Writer = Pick<typeof db, 'insert'>;
+
+type AnalyticsDelta = {
+  totalEvents: number;
+  processedEvents: number;
+  failedEvents: number;
+  newCustomers: number;
+  jobsCompleted: number;
+  estimatesSent: number;
+  invoicesCreated: number;
+  totalRevenue: number;
+};
+
 export class WebhookProcessor {
+  private pollInterval: NodeJS.Timeout | null = null;
+  private activeWorkers = 0;
+  private draining = false;
+  private idleWaiters: Array<() => void> = [];
+
   // Process incoming webhook event
   async processWebhookEvent(
     eventType: string,
@@ -67,10 +111,8 @@ export class WebhookProcessor {
         status: 'pending',
       }).returning();
 
-      // Process the event asynchronously
-      setImmediate(() => {
-        this.processEventAsync(webhookEvent.id, eventType, payload).catch(console.error);
-      });
+      // Wake the queue workers; the row itself is the durable work item
+      this.pump();
 
       return { success: true, eventId: webhookEvent.id };
     } catch (error) {
@@ -105,58 +147,238 @@ export class WebhookProcessor {
     }
   }
 
-  // Process event asynchronously
-  private async processEventAsync(eventId: number, eventType: string, payload: any) {
-    try {
-      // Parse and categorize the event data
-      const processedData = await this.parseEventData(eventType, payload);
-
-      // Store processed data
-      await db.insert(webhookProcessedData).values({
-        eventId,
-        ...processedData,
-      } as InsertWebhookProcessedData);
-
-      // Generate and store tags
-      const tags = this.generateEventTags(eventType, payload, processedData);
-      if (tags.length > 0) {
-        await db.insert(webhookEventTags).values(
-          tags.map(tag => ({ ...tag, eventId })) as any
-        );
-      }
+  // Start polling the durable queue (also picks up events left pending by a
+  // previous process)
+  startQueue(): void {
+    if (this.pollInterval) return;
+    this.draining = false;
+    this.pollInterval = setInterval(() => this.pump(), QUEUE_POLL_INTERVAL_MS);
+    this.pump();
+    console.log('[Webhooks] Queue workers started', { concurrency: QUEUE_CONCURRENCY, batchSize: QUEUE_BATCH_SIZE });
+  }
 
-      // Update analytics
-      await this.updateAnalytics(eventType, processedData);
+  // Stop claiming new work and wait for in-flight batches to finish.
+  // Unclaimed events stay pending in the database for the next start.
+  async drainQueue(timeoutMs = 10000): Promise<void> {
+    this.draining = true;
+    if (this.pollInterval) {
+      clearInterval(this.pollInterval);
+      this.pollInterval = null;
+    }
+    if (this.activeWorkers === 0) return;
+
+    await Promise.race([
+      new Promise<void>(resolve => this.idleWaiters.push(resolve)),
+      new Promise<void>(resolve => setTimeout(resolve, timeoutMs)),
+    ]);
+    console.log('[Webhooks] Queue drained', { activeWorkers: this.activeWorkers });
+  }
+
+  // Spin up workers up to the concurrency limit
+  private pump(): void {
+    while (!this.draining && this.activeWorkers < QUEUE_CONCURRENCY) {
+      this.activeWorkers++;
+      this.runWorker()
+        .catch(error => console.error('[Webhooks] Queue worker error:', error))
+        .finally(() => {
+          this.activeWorkers--;
+          if (this.activeWorkers === 0) {
+            this.idleWaiters.splice(0).forEach(resolve => resolve());
+          }
+        });
+    }
+  }
 
-      // Send notification for referral leads
-      if (eventType === 'lead.created' && processedData.notes === 'REFERRAL LEAD') {
-        await this.notifyReferralLead(payload, processedData);
+  // Claim and process batches until the queue is empty
+  private async runWorker(): Promise<void> {
+    while (!this.draining) {
+      const claimed = await this.claimBatch();
+      if (claimed.length === 0) return;
+
+      // An event whose lease keeps expiring crashes or hangs its worker;
+      // stop retrying it once the lost leases use up its attempts
+      const batch: QueuedEvent[] = [];
+      for (const event of claimed) {
+        if (event.reclaimed && isExhausted(event.retryCount || 0)) {
+          await this.deadLetter(event, 'Processing lease expired', event.retryCount || 0);
+        } else {
+          batch.push(event);
+        }
       }
+      if (batch.length > 0) await this.processBatch(batch);
+    }
+  }
 
-      // Process job completion for heat map
-      if (eventType === 'job.completed' && payload.address) {
-        await heatMapService.processJobCompletion(payload);
+  // Claim due events. Expired leases on 'processing' rows are reclaimed so a
+  // crashed instance doesn't strand its batch; each reclaim counts as an attempt.
+  private async claimBatch(): Promise<QueuedEvent[]> {
+    const result = await db.execute(sql`
+      WITH due AS (
+        SELECT id, status = 'processing' AS reclaimed FROM ${webhookEvents}
+         WHERE status IN ('pending', 'processing')
+           AND (next_attempt_at IS NULL OR next_attempt_at <= now())
+         ORDER BY received_at
+         LIMIT ${QUEUE_BATCH_SIZE}
+         FOR UPDATE SKIP LOCKED
+      )
+      UPDATE ${webhookEvents} AS e
+         SET status = 'processing',
+             retry_count = coalesce(e.retry_count, 0) + CASE WHEN due.reclaimed THEN 1 ELSE 0 END,
+             next_attempt_at = now() + ${`${QUEUE_LEASE_MS} milliseconds`}::interval
+        FROM due
+       WHERE e.id = due.id
+      RETURNING e.id, e.event_type AS "eventType", e.payload, e.retry_count AS "retryCount",
+                e.handled_at AS "handledAt", due.reclaimed
+    `);
+    return result.rows as QueuedEvent[];
+  }
+
+  // Run per-event side effects, then write the batch's processed data, tags,
+  // analytics counters and statuses in one transaction of multi-row statements.
+  // Each event is marked handled as soon as its side effects have run, so a
+  // retry after a failed batch write only redoes the writes. Failure counters
+  // are flushed outside the transaction so a rollback doesn't lose them.
+  private async processBatch(events: QueuedEvent[]) {
+    const processedRows: InsertWebhookProcessedData[] = [];
+    const tagRows: InsertWebhookEventTag[] = [];
+    const analytics = new Map<string, AnalyticsDelta>();
+    const failures = new Map<string, AnalyticsDelta>();
+    const processedIds: number[] = [];
+
+    for (const event of events) {
+      try {
+        const payload = JSON.parse(event.payload);
+        const processedData = await this.parseEventData(event.eventType, payload);
+        if (!event.handledAt) {
+          await this.runSideEffects(event.eventType, payload, processedData);
+          await db.update(webhookEvents)
+            .set({ handledAt: new Date() })
+            .where(eq(webhookEvents.id, event.id));
+        }
+
+        processedRows.push({ eventId: event.id, ...processedData } as InsertWebhookProcessedData);
+        const tags = this.generateEventTags(event.eventType, payload, processedData);
+        tagRows.push(...tags.map(tag => ({ ...tag, eventId: event.id }) as InsertWebhookEventTag));
+        this.addAnalytics(analytics, event.eventType, processedData, 'processed');
+        processedIds.push(event.id);
+      } catch (error) {
+        console.error('Error processing webhook event:', { eventId: event.id, error });
+        await this.recordFailure(event, error, failures);
       }
+    }
 
-      // Mark event as processed
-      await db.update(webhookEvents)
-        .set({
-          status: 'processed',
-          processedAt: new Date(),
-        })
-        .where(eq(webhookEvents.id, eventId));
+    try {
+      await db.transaction(async (tx) => {
+        if (processedRows.length > 0) {
+          await tx.insert(webhookProcessedData).values(processedRows);
+        }
+        if (tagRows.length > 0) {
+          await tx.insert(webhookEventTags).values(tagRows);
+        }
+        await this.flushAnalytics(analytics, tx);
+        if (processedIds.length > 0) {
+          await tx.update(webhookEvents)
+            .set({
+              status: 'processed',
+              processedAt: new Date(),
+              nextAttemptAt: null,
+              error: null,
+            })
+            .where(inArray(webhookEvents.id, processedIds));
+        }
+      });
+    } catch (error) {
+      // Batch write rolled back - put the handled events back to retry the
+      // writes (their side effects won't run again)
+      console.error('Error writing webhook batch:', error);
+      for (const event of events.filter(e => processedIds.includes(e.id))) {
+        await this.recordFailure(event, error, failures);
+      }
+    }
 
+    try {
+      await this.flushAnalytics(failures);
     } catch (error) {
-      console.error('Error processing event async:', error);
+      console.error('Error writing webhook failure analytics:', error);
+    }
+  }
 
-      // Mark event as failed
-      await db.update(webhookEvents)
-        .set({
-          status: 'failed',
-          error: error instanceof Error ? error.message : 'Unknown error',
-        })
-        .where(eq(webhookEvents.id, eventId));
+  // Event-specific side effects (notifications, HCP mirror, heat map)
+  private async runSideEffects(
+    eventType: string,
+    payload: any,
+    processedData: Partial<InsertWebhookProcessedData>
+  ): Promise<void> {
+    // Send notification for referral leads
+    if (eventType === 'lead.created' && processedData.notes === 'REFERRAL LEAD') {
+      await this.notifyReferralLead(payload, processedData);
     }
+
+    // Apply job/estimate changes straight to the local HCP mirror so
+    // dashboards don't wait for the next incremental sync
+    const category = EVENT_CATEGORIES[eventType];
+    if (category === 'job') {
+      await getHCPSyncService().applyJobEvent(payload);
+      invalidateForWrite('/jobs');
+    } else if (category === 'estimate') {
+      await getHCPSyncService().applyEstimateEvent(payload);
+      invalidateForWrite('/estimates');
+    } else if (category === 'appointment') {
+      // Appointments aren't mirrored, but they move booked capacity
+      invalidateForWrite('/jobs');
+    }
+
+    // Process job completion for heat map
+    if (eventType === 'job.completed' && payload.address) {
+      await heatMapService.processJobCompletion(payload);
+    }
+  }
+
+  // Schedule a retry with exponential backoff, or dead-letter the event once
+  // it has used up its attempts
+  private async recordFailure(event: QueuedEvent, error: unknown, analytics?: Map<string, AnalyticsDelta>) {
+    const attempts = (event.retryCount || 0) + 1;
+    const message = error instanceof Error ? error.message : 'Unknown error';
+
+    if (isExhausted(attempts)) {
+      await this.deadLetter(event, message, attempts, analytics);
+      return;
+    }
+
+    const backoffMs = Math.min(QUEUE_BASE_BACKOFF_MS * 2 ** (attempts - 1), QUEUE_MAX_BACKOFF_MS);
+    await db.update(webhookEvents)
+      .set({
+        status: 'pending',
+        error: message,
+        retryCount: attempts,
+        nextAttemptAt: new Date(Date.now() + backoffMs),
+      })
+      .where(eq(webhookEvents.id, event.id));
+  }
+
+  private async deadLetter(event: QueuedEvent, message: string, attempts: number, analytics?: Map<string, AnalyticsDelta>) {
+    await db.update(webhookEvents)
+      .set({ status: 'dead_letter', error: message, retryCount: attempts, nextAttemptAt: null })
+      .where(eq(webhookEvents.id, event.id));
+
+    // Count it with the batch when there is one, otherwise straight away
+    const totals = analytics ?? new Map<string, AnalyticsDelta>();
+    this.addAnalytics(totals, event.eventType, {}, 'failed');
+    if (!analytics) await this.flushAnalytics(totals);
+  }
+
+  // Re-queue dead-lettered events (e.g. after fixing the cause)
+  async requeueDeadLetters(ids?: number[]): Promise<number> {
+    const conditions = [eq(webhookEvents.status, 'dead_letter')];
+    if (ids && ids.length > 0) {
+      conditions.push(inArray(webhookEvents.id, ids));
+    }
+    const requeued = await db.update(webhookEvents)
+      .set({ status: 'pending', retryCount: 0, nextAttemptAt: null })
+      .where(and(...conditions))
+      .returning({ id: webhookEvents.id });
+    this.pump();
+    return requeued.length;
   }
 
   // Parse event data based on event type
@@ -325,65 +547,82 @@ export class WebhookProcessor {
     return tags;
   }
 
-  // Update analytics
-  private async updateAnalytics(eventType: string, processedData: Partial<InsertWebhookProcessedData>) {
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-
+  // Accumulate analytics counters for one event into the batch totals
+  private addAnalytics(
+    totals: Map<string, AnalyticsDelta>,
+    eventType: string,
+    processedData: Partial<InsertWebhookProcessedData>,
+    outcome: 'processed' | 'failed'
+  ) {
     const category = EVENT_CATEGORIES[eventType] || 'unknown';
+    const delta = totals.get(category) || {
+      totalEvents: 0,
+      processedEvents: 0,
+      failedEvents: 0,
+      newCustomers: 0,
+      jobsCompleted: 0,
+      estimatesSent: 0,
+      invoicesCreated: 0,
+      totalRevenue: 0,
+    };
 
-    // Get or create today's analytics record
-    const [analytics] = await db.select()
-      .from(webhookAnalytics)
-      .where(
-        and(
-          eq(webhookAnalytics.date, today),
-          eq(webhookAnalytics.eventCategory, category)
-        )
-      )
-      .limit(1);
+    delta.totalEvents++;
+    if (outcome === 'failed') {
+      delta.failedEvents++;
+      totals.set(category, delta);
+      return;
+    }
 
-    const updates: any = {
-      totalEvents: sql`${webhookAnalytics.totalEvents} + 1`,
-      processedEvents: sql`${webhookAnalytics.processedEvents} + 1`,
-    };
+    delta.processedEvents++;
 
     // Update specific metrics based on event type
     if (eventType === 'customer.created') {
-      updates.newCustomers = sql`${webhookAnalytics.newCustomers} + 1`;
+      delta.newCustomers++;
     }
     if (eventType === 'job.completed') {
-      updates.jobsCompleted = sql`${webhookAnalytics.jobsCompleted} + 1`;
-      if (processedData.totalAmount) {
-        updates.totalRevenue = sql`${webhookAnalytics.totalRevenue} + ${processedData.totalAmount}`;
-      }
+      delta.jobsCompleted++;
+      delta.totalRevenue += Number(processedData.totalAmount) || 0;
     }
     if (eventType === 'estimate.sent' || eventType === 'estimate.created') {
-      updates.estimatesSent = sql`${webhookAnalytics.estimatesSent} + 1`;
+      delta.estimatesSent++;
     }
     if (eventType === 'invoice.created') {
-      updates.invoicesCreated = sql`${webhookAnalytics.invoicesCreated} + 1`;
+      delta.invoicesCreated++;
     }
 
-    if (analytics) {
-      // Update existing record
-      await db.update(webhookAnalytics)
-        .set(updates)
-        .where(eq(webhookAnalytics.id, analytics.id));
-    } else {
-      // Create new record
-      await db.insert(webhookAnalytics).values({
+    totals.set(category, delta);
+  }
+
+  // Write a batch's analytics counters as one upsert per date/category
+  private async flushAnalytics(totals: Map<string, AnalyticsDelta>, writer: Writer = db) {
+    if (totals.size === 0) return;
+
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+
+    const increment = (column: AnyColumn, excluded: string) =>
+      sql`coalesce(${column}, 0) + ${sql.raw(`excluded.${excluded}`)}`;
+
+    await writer.insert(webhookAnalytics)
+      .values(Array.from(totals.entries()).map(([eventCategory, delta]) => ({
         date: today,
-        eventCategory: category,
-        totalEvents: 1,
-        processedEvents: 1,
-        newCustomers: eventType === 'customer.created' ? 1 : 0,
-        jobsCompleted: eventType === 'job.completed' ? 1 : 0,
-        estimatesSent: eventType.includes('estimate') ? 1 : 0,
-        invoicesCreated: eventType === 'invoice.created' ? 1 : 0,
-        totalRevenue: processedData.totalAmount || 0,
+        eventCategory,
+        ...delta,
+      })))
+      .onConflictDoUpdate({
+        target: [webhookAnalytics.date, webhookAnalytics.eventCategory],
+        set: {
+          totalEvents: increment(webhookAnalytics.totalEvents, 'total_events'),
+          processedEvents: increment(webhookAnalytics.processedEvents, 'processed_events'),
+          failedEvents: increment(webhookAnalytics.failedEvents, 'failed_events'),
+          newCustomers: increment(webhookAnalytics.newCustomers, 'new_customers'),
+          jobsCompleted: increment(webhookAnalytics.jobsCompleted, 'jobs_completed'),
+          estimatesSent: increment(webhookAnalytics.estimatesSent, 'estimates_sent'),
+          invoicesCreated: increment(webhookAnalytics.invoicesCreated, 'invoices_created'),
+          totalRevenue: increment(webhookAnalytics.totalRevenue, 'total_revenue'),
+          updatedAt: new Date(),
+        },
       });
-    }
   }
 
   // Get recent events for dashboard
@@ -65,6 +65,7 @@ export const syncStatus = pgTable('sync_status', {
   recordsProcessed: integer('records_processed').default(0),
   status: text('status').default('pending'), // 'pending', 'running', 'completed', 'failed'
   error: text('error'),
+  checkpoint: jsonb('checkpoint'), // Resume state for long-running imports
 });
 
 // Conversion Tracking Tables
@@ -974,10 +975,12 @@ export const webhookEvents = pgTable('webhook_events', {
   entityId: text('entity_id'), // ID of the related entity (customer_id, job_id, etc.)
   companyId: text('company_id'),
   payload: text('payload').notNull(), // JSON string of the full webhook payload
-  status: text('status').notNull().default('pending'), // 'pending', 'processed', 'failed', 'archived'
+  status: text('status').notNull().default('pending'), // 'pending', 'processing', 'processed', 'failed', 'dead_letter', 'archived'
   processedAt: timestamp('processed_at'),
   error: text('error'),
   retryCount: integer('retry_count').default(0),
+  nextAttemptAt: timestamp('next_attempt_at'), // retry backoff / processing lease expiry
+  handledAt: timestamp('handled_at'), // side effects ran; retries only redo the batch writes
   receivedAt: timestamp('received_at').defaultNow().notNull(),
   createdAt: timestamp('created_at').defaultNow().notNull(),
 }, (table) => ({
@@ -987,6 +990,7 @@ export const webhookEvents = pgTable('webhook_events', {
   statusIdx: index('webhook_status_idx').on(table.status),
   receivedAtIdx: index('webhook_received_at_idx').on(table.receivedAt),
   processingIdx: index('webhook_events_processing_idx').on(table.status, table.receivedAt),
+  queueIdx: index('webhook_events_queue_idx').on(table.status, table.nextAttemptAt),
 }));
 
 // Webhook Event Tags table - flexible tagging system for events
@@ -1179,7 +1183,7 @@ export const jobLocations = pgTable('job_locations', {
   isActive: boolean('is_active').default(true).notNull(), // For soft deletes/archiving
   createdAt: timestamp('created_at').defaultNow().notNull(),
 }, (table) => ({
-  jobIdIdx: index('job_id_idx').on(table.jobId),
+  jobIdIdx: uniqueIndex('job_id_idx').on(table.jobId),
   coordsIdx: index('job_coords_idx').on(table.latitude, table.longitude),
   jobDateIdx: index('job_date_idx').on(table.jobDate),
   cityIdx: index('job_city_idx').on(table.city),
@@ -2537,6 +2541,25 @@ export const insertApiUsageSchema = createInsertSchema(apiUsage).omit({
 export type ApiUsage = typeof apiUsage.$inferSelect;
 export type InsertApiUsage = z.infer<typeof insertApiUsageSchema>;
 
+// ============================================
+// GEOCODE CACHE (Google Geocoding results)
+// ============================================
+
+export const geocodeCache = pgTable('geocode_cache', {
+  id: serial('id').primaryKey(),
+  normalizedAddress: text('normalized_address').notNull(), // lowercased, punctuation-free lookup key
+  result: jsonb('result').notNull(), // GeocodeResult (all nulls for negative entries)
+  status: text('status').notNull(), // 'ok', 'not_found'
+  expiresAt: timestamp('expires_at').notNull(),
+  createdAt: timestamp('created_at').defaultNow().notNull(),
+  updatedAt: timestamp('updated_at').defaultNow().notNull(),
+}, (table) => ({
+  normalizedAddressIdx: uniqueIndex('geocode_cache_normalized_address_idx').on(table.normalizedAddress),
+  expiresAtIdx: index('geocode_cache_expires_at_idx').on(table.expiresAt),
+}));
+
+export type GeocodeCache = typeof geocodeCache.$inferSelect;
+
 // ============================================
 // AVAILABLE TIME SLOTS (Scheduling)
 // ============================================
@@ -3001,6 +3024,13 @@ export const hcpSyncLog = pgTable('hcp_sync_log', {
   startedAtIdx: index('hcp_sync_started_idx').on(table.startedAt),
 }));
 
+// HCP Stats Dirty Days - days a sync moved jobs/estimates away from, so the
+// incremental daily stats run recomputes them too
+export const hcpStatsDirtyDays = pgTable('hcp_stats_dirty_days', {
+  day: timestamp('day').primaryKey(), // UTC midnight, matches date_trunc('day', scheduled_start)
+  markedAt: timestamp('marked_at').defaultNow().notNull(),
+});
+
 // HCP Daily Stats - aggregated daily metrics for historical analytics
 export const hcpDailyStats = pgTable('hcp_daily_stats', {
   id: serial('id').primaryKey(),
@@ -9,6 +9,10 @@ import { readFile } from "node:fs/promises";
 import { join } from "node:path";
 import { parse as parseYaml } from "yaml";
 import { CapacityCalculator } from "../server/src/capacity.js";
+import { CapacitySnapshotService } from "../server/src/capacitySnapshot.js";
+import { hcpCache, invalidateForWrite } from "../server/src/hcpGateway.js";
+import { getCorrelationId, getTraceBreakdown, normalizeEndpoint, runWithTrace, trackDependency } from "../server/src/observability/tracing.js";
+import { recordMcpToolCall } from "../server/src/observability/metrics.js";
 import {
   formatBookingConfirmation,
   formatAvailabilityResponse,
@@ -250,6 +254,21 @@ function createStructuredError(
 }
 
 async function hcpGet(path: string, query?: Record<string, string | number | boolean | undefined>, correlationId?: string) {
+  // Shared with HousecallProClient so identical reads are cached and coalesced
+  try {
+    return await hcpCache.get(path, query || {}, () => fetchHcpGet(path, query, correlationId));
+  } catch (err: any) {
+    // A coalesced read rejects every waiter with the error built for the
+    // request that ran it; re-tag it so failures trace to this request
+    if (correlationId && err?.type && err.correlationId !== correlationId) {
+      log.error({ path, code: err.code, correlationId, sharedCorrelationId: err.correlationId }, "HCP API error on shared request");
+      throw { ...err, correlationId, details: { ...err.details, sharedCorrelationId: err.correlationId } } as StructuredError;
+    }
+    throw err;
+  }
+}
+
+async function fetchHcpGet(path: string, query?: Record<string, string | number | boolean | undefined>, correlationId?: string) {
   const corrId = correlationId || randomUUID();
   const url = new URL(path, HCP_BASE);
   if (query) Object.entries(query).forEach(([k, v]) => {
@@ -257,7 +276,12 @@ async function hcpGet(path: string, query?: Record<string, string | number | boo
   });
   
   try {
-    const res = await fetch(url, { headers: hcpHeaders(corrId) });
+    const res = await trackDependency(
+      "hcp",
+      `GET ${normalizeEndpoint(path)}`,
+      () => fetch(url, { headers: hcpHeaders(corrId) }),
+      r => r.ok
+    );
     if (!res.ok) {
       const errorText = await res.text();
       log.error({ path, errorText, status: res.status, correlationId: corrId }, `HCP API error: ${res.status}`);
@@ -321,11 +345,16 @@ async function hcpPost(path: string, body: unknown, correlationId?: string) {
   const url = new URL(path, HCP_BASE);
   
   try {
-    const res = await fetch(url, {
-      method: "POST",
-      headers: hcpHeaders(corrId),
-      body: JSON.stringify(body)
-    });
+    const res = await trackDependency(
+      "hcp",
+      `POST ${normalizeEndpoint(path)}`,
+      () => fetch(url, {
+        method: "POST",
+        headers: hcpHeaders(corrId),
+        body: JSON.stringify(body)
+      }),
+      r => r.ok
+    );
     if (!res.ok) {
       const errorText = await res.text();
       log.error({ path, errorText, body: redactPayload(body), status: res.status, correlationId: corrId }, `HCP API POST error: ${res.status}`);
@@ -368,6 +397,7 @@ async function hcpPost(path: string, body: unknown, correlationId?: string) {
         );
       }
     }
+    invalidateForWrite(path);
     return res.json();
   } catch (err: any) {
     if (err.type) throw err; // Already a structured error
@@ -967,7 +997,7 @@ function normalizeToolResponse(
 
   try {
     const payload = JSON.parse(content.text);
-    const correlationId = payload.correlation_id || randomUUID();
+    const correlationId = payload.correlation_id || getCorrelationId() || randomUUID();
     const success = payload.success !== false;
 
     if (!payload.correlation_id) {
@@ -998,7 +1028,8 @@ function registerToolWithDiagnostics(
   definition: any,
   handler: (raw: any) => Promise<any>
 ) {
-  server.registerTool(name, definition, async (raw) => {
+  // Each call runs under its own trace so HCP and DB time is attributed to the tool
+  server.registerTool(name, definition, (raw) => runWithTrace(randomUUID(), async (trace) => {
     const startTime = Date.now();
 
     try {
@@ -1007,13 +1038,16 @@ function registerToolWithDiagnostics(
       const normalized = normalizeToolResponse(name, result, latencyMs);
 
       recordToolMetric(name, normalized.success, latencyMs);
+      recordMcpToolCall(name, latencyMs, normalized.success);
+      log.debug({ tool: name, correlationId: trace.correlationId, latencyMs, breakdownMs: getTraceBreakdown(trace, latencyMs) }, "Tool call timing");
       return normalized.response;
     } catch (error: any) {
       const latencyMs = Date.now() - startTime;
       recordToolMetric(name, false, latencyMs, error?.message || "Unknown error");
+      recordMcpToolCall(name, latencyMs, false);
       throw error;
     }
-  });
+  }));
 }
 
 registerToolWithDiagnostics(
@@ -1586,13 +1620,21 @@ TIP: Use 'get_capacity' first to understand overall scheduling availability befo
       const input = SearchAvailabilityInput.parse(raw);
       log.info({ input, correlationId }, "search_availability: start");
 
-      // Step 1: fetch booking windows
-      const params: Record<string, string> = {};
-      params.start_date = input.date;
-      if (input.show_for_days) params.show_for_days = String(input.show_for_days);
+      // Step 1: fetch booking windows - today/tomorrow come from the capacity snapshot
+      let windows: Array<{ start_time: string; end_time: string; available: boolean }>;
+      const snapshotWindows = await CapacitySnapshotService.getInstance()
+        .getBookingWindows(input.date, input.show_for_days);
 
-      const bw = await hcpGet("/company/schedule_availability/booking_windows", params, correlationId) as any;
-      const windows: Array<{ start_time: string; end_time: string; available: boolean }> = bw.booking_windows || [];
+      if (snapshotWindows) {
+        windows = snapshotWindows;
+      } else {
+        const params: Record<string, string> = {};
+        params.start_date = input.date;
+        if (input.show_for_days) params.show_for_days = String(input.show_for_days);
+
+        const bw = await hcpGet("/company/schedule_availability/booking_windows", params, correlationId) as any;
+        windows = bw.booking_windows || [];
+      }
 
       if (!windows.length) {
         log.warn({ correlationId, date: input.date }, "No booking windows available");
@@ -1779,7 +1821,8 @@ RETURNS: Capacity state, score (0-100), express window availability, and recomme
         const date = new Date(`${input.date}T12:00:00`);
         capacity = await calculator.calculateCapacity(date, input.zip || input.service_area);
       } else {
-        capacity = await calculator.getTodayCapacity(input.zip || input.service_area);
+        const rendered = await CapacitySnapshotService.getInstance().getCapacity("today", input.zip || input.service_area);
+        capacity = rendered.capacity;
       }
 
       const expressWindows = capacity.unique_express_windows || [];
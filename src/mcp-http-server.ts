@@ -6,6 +6,8 @@ import pino from 'pino';
 import cors from 'cors';
 import rateLimit from 'express-rate-limit';
 import { getToolMetricsSnapshot, server } from './booker.js';
+import { CapacitySnapshotService } from '../server/src/capacitySnapshot.js';
+import { metricsRegistry } from '../server/src/observability/metrics.js';
 
 const log = pino({ name: 'mcp-http-server', level: process.env.LOG_LEVEL || 'info' });
 
@@ -346,6 +348,16 @@ app.get('/health', (req, res) => {
   });
 });
 
+// Prometheus metrics for this process (MCP tool latency, HCP and DB timings)
+app.get('/metrics', async (req, res) => {
+  try {
+    res.set('Content-Type', metricsRegistry.contentType);
+    res.end(await metricsRegistry.metrics());
+  } catch (error) {
+    res.status(500).json({ error: 'Failed to get metrics' });
+  }
+});
+
 // Root endpoint with info
 app.get('/', (req, res) => {
   res.json({
@@ -395,6 +407,8 @@ app.get('/', (req, res) => {
 const PORT = process.env.MCP_PORT || 3001;
 app.listen(PORT, () => {
   log.info({ port: PORT }, 'MCP HTTP server started successfully');
+  // Keep today/tomorrow availability warm for get_capacity and search_availability
+  CapacitySnapshotService.getInstance().start();
   console.log(`
 ╔════════════════════════════════════════════════════════════╗
 ║  Johnson Bros. Plumbing MCP Server                         ║